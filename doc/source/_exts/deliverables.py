@@ -88,7 +88,7 @@ def _initialize_deliverable_data():
 
     _series_status_data = series_status.SeriesStatus.default()
     deliverable.Deliverable.init_series_status_data(_series_status_data)
-    _deliverables = deliverable.Deliverables('deliverables')
+    _deliverables = deliverable.Deliverables('deliverables', jobs=0)
 
 
 class DeliverableDirectiveBase(rst.Directive):
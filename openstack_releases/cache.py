@@ -0,0 +1,124 @@
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Helpers for keeping data on disk between runs of the tools.
+"""
+
+import contextlib
+import fcntl
+import logging
+import os
+import os.path
+import pickle
+import shutil
+import tempfile
+
+import appdirs
+
+LOG = logging.getLogger(__name__)
+
+# Set to a directory name to override the default cache location.
+CACHE_DIR_ENV = 'OPENSTACK_RELEASES_CACHE_DIR'
+# Set to any non-empty value to ignore all of the on-disk caches.
+NO_CACHE_ENV = 'OPENSTACK_RELEASES_NO_CACHE'
+
+
+def enabled():
+    "Return boolean indicating whether on-disk caches should be used."
+    return not os.environ.get(NO_CACHE_ENV)
+
+
+def get_cache_dir(*parts):
+    """Return the name of a cache directory, creating it if needed.
+
+    :param parts: Optional subdirectory names below the cache root.
+    """
+    root = os.environ.get(CACHE_DIR_ENV) or appdirs.user_cache_dir(
+        'openstack-release', 'openstack')
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@contextlib.contextmanager
+def lock(path, exclusive=True, blocking=True):
+    """Lock a cached item against changes by other processes.
+
+    Readers take a shared lock, while updating or removing the item
+    needs an exclusive one. Raises BlockingIOError if blocking is
+    false and the lock is not available.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.lock', 'a') as f:
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        fcntl.flock(f, flags)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def clear(*parts):
+    "Remove a cache directory and everything in it."
+    path = get_cache_dir(*parts)
+    LOG.debug('removing cache directory %s', path)
+    shutil.rmtree(path, True)
+
+
+def get_dir_size(path):
+    "Return the total size, in bytes, of the files below path."
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def load_pickle(filename):
+    """Return the data stored in filename.
+
+    Returns None if the file does not exist or cannot be read, so
+    callers can treat a damaged cache the same way as an empty one.
+    """
+    try:
+        with open(filename, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        LOG.debug('ignoring unreadable cache file %s: %s', filename, e)
+        return None
+
+
+def save_pickle(filename, data):
+    """Store data in filename.
+
+    The new content is written to a temporary file first and then
+    renamed so that concurrent readers never see a partial file.
+    """
+    dirname = os.path.dirname(filename)
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmpname = tempfile.mkstemp(dir=dirname, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpname, filename)
+    except Exception:
+        os.unlink(tmpname)
+        raise
@@ -97,7 +97,8 @@ def main():
             print('  diff-start: {!r}'.format(diff_start))
 
         for project in new_release['projects']:
-            gitutils.clone_repo(workdir, project['repo'])
+            gitutils.clone_repo(workdir, project['repo'],
+                                mode=gitutils.CLONE_REF_ONLY)
 
             branch_base = gitutils.get_branch_base(
                 workdir, project['repo'], branch,
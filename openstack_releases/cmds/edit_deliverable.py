@@ -57,7 +57,7 @@ def eol_tag(args, series, deliverable_info):
         if not gitutils.tag_exists(repo, tag):
             print('No {} tag for {}'.format(tag, repo))
             continue
-        gitutils.clone_repo(workdir, repo)
+        gitutils.clone_repo(workdir, repo, mode=gitutils.CLONE_REF_ONLY)
         sha = gitutils.sha_for_tag(workdir, repo, tag)
         projects.append({
             'repo': repo,
@@ -23,13 +23,13 @@ import os.path
 import urllib
 
 import appdirs
-from openstack_governance import governance
 import requests
 from requests.packages import urllib3
 
 import openstack_releases
 from openstack_releases import defaults
 from openstack_releases import deliverable
+from openstack_releases import governanceutils
 
 # Disable warnings about insecure connections.
 urllib3.disable_warnings()
@@ -121,24 +121,23 @@ def main():
     if not config.has_option('DEFAULT', 'password'):
         parser.error('No password set in {}'.format(config_filename))
 
-    gov_data = governance.Governance.from_remote_repo()
+    gov_data = governanceutils.get_governance()
 
     # Some deliverables were independent at one time but might not be
     # any more, so compare the independent list with the current
     # release series.
+    all_deliv = deliverable.Deliverables(
+        root_dir=args.deliverables_dir,
+        collapse_history=True,
+        lazy=True,
+    )
     all_independent_deliverables = set(
-        name
-        for team, series, name, deliv in deliverable.Deliverables(
-            root_dir=args.deliverables_dir,
-            collapse_history=True,
-        ).get_deliverables(None, None)
+        deliv.name
+        for deliv in all_deliv.get_deliverables(None, None)
     )
     current_deliverables = set(
-        name
-        for team, series, name, deliv in deliverable.Deliverables(
-            root_dir=args.deliverables_dir,
-            collapse_history=True,
-        ).get_deliverables(None, defaults.RELEASE)
+        deliv.name
+        for deliv in all_deliv.get_deliverables(None, defaults.RELEASE)
     )
     independent_deliverables = all_independent_deliverables.difference(
         current_deliverables)
@@ -21,7 +21,7 @@ import argparse
 import pathlib
 import sys
 
-from openstack_governance import governance
+from openstack_releases import governanceutils
 
 
 class Contact:
@@ -72,10 +72,10 @@ def main():
             print(f'ERROR: {args.governance_repo} is not a valid directory',
                   file=sys.stderr)
             sys.exit(1)
-        gov_data = governance.Governance.from_local_repo(
+        gov_data = governanceutils.load_local_governance(
             str(args.governance_repo))
     else:
-        gov_data = governance.Governance.from_remote_repo()
+        gov_data = governanceutils.get_governance()
 
     for team_name in args.team:
         contacts = set()
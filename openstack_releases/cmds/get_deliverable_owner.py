@@ -43,6 +43,7 @@ def main():
         all_deliv = deliverable.Deliverables(
             root_dir=args.deliverables_dir,
             collapse_history=False,
+            lazy=True,
         )
         deliv = next(all_deliv.get_deliverable_history(args.deliverable))
 
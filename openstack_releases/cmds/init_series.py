@@ -45,6 +45,9 @@ def main():
     all_deliv = deliverable.Deliverables(
         root_dir=args.deliverables_dir,
         collapse_history=False,
+        lazy=True,
+        # The data is written back out, so keep the formatting.
+        round_trip=True,
     )
 
     new_deliverables = set(
@@ -27,12 +27,11 @@ import subprocess
 import sys
 import tempfile
 
-from openstack_governance import governance
-
 from openstack_releases import defaults
 from openstack_releases import deliverable
 from openstack_releases import gerritutils
 from openstack_releases import gitutils
+from openstack_releases import governanceutils
 from openstack_releases import hound
 from openstack_releases import release_notes
 from openstack_releases import yamlutils
@@ -223,7 +222,7 @@ def main():
             print('not cleaning up %s' % workdir)
     atexit.register(cleanup_workdir)
 
-    gov_data = governance.Governance.from_remote_repo()
+    gov_data = governanceutils.get_governance()
     official_repos = set(
         r.name
         for r in gov_data.get_repositories()
@@ -232,6 +231,7 @@ def main():
     all_deliverables = deliverable.Deliverables(
         './deliverables',
         False,
+        lazy=True,
     )
 
     # Remove any inherited PAGER environment variable to avoid
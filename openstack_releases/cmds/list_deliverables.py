@@ -207,6 +207,7 @@ def main():
     all_deliv = deliverable.Deliverables(
         root_dir=args.deliverables_dir,
         collapse_history=False,
+        lazy=True,
     )
     deliv_iter = list(all_deliv.get_deliverables(args.team, series))
     if args.group_key:
@@ -248,6 +248,7 @@ def main():
             workdir,
             repo,
             branch='master',
+            mode=gitutils.CLONE_BLOBLESS,
         )
 
         # Set some git configuration values to allow us to perform
@@ -273,6 +274,7 @@ def main():
                 workdir,
                 repo,
                 branch=branch,
+                mode=gitutils.CLONE_BLOBLESS,
             )
 
         # look at the previous tag for the parent of the commit
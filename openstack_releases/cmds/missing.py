@@ -31,17 +31,43 @@ from openstack_releases import pythonutils
 urllib3.disable_warnings()
 
 
-def check_url(type, url):
-    if links.link_exists(url):
+def check_url(type, url, link_checker=None):
+    if link_checker is None:
+        exists = links.link_exists(url)
+    else:
+        exists = link_checker.exists(url)
+    if exists:
         print('  found {}'.format(type))
     else:
         print('  did not find {} {}'.format(type, url))
         yield 'missing {} {}'.format(type, url)
 
 
-def check_signed_file(type, url):
+def check_signed_file(type, url, link_checker=None):
     for item_type, item in [(type, url), (type + ' signature', url + '.asc')]:
-        yield from check_url(item_type, item)
+        yield from check_url(item_type, item, link_checker)
+
+
+def _is_pre_release(version):
+    return 'a' in version or 'b' in version or 'rc' in version
+
+
+def _get_expected_links(deliv, releases, artifacts_only):
+    "Return the links main() will look for in most cases."
+    for release in releases:
+        version = release.version
+        for project in release.projects:
+            if not artifacts_only:
+                yield gitutils.tag_url(project.repo.name, version)
+            if deliv.artifact_link_mode != 'tarball':
+                continue
+            tb_url = links.tarball_url(version, project)
+            yield tb_url
+            yield tb_url + '.asc'
+            if not _is_pre_release(version):
+                wheel_url = links.wheel_py3_url(version, project)
+                yield wheel_url
+                yield wheel_url + '.asc'
 
 
 def main():
@@ -62,6 +88,27 @@ def main():
         action='store_true',
         help='scan all releases, not just most recent',
     )
+    parser.add_argument(
+        '--jobs', '-j',
+        default=8,
+        type=int,
+        help='number of links to check at the same time, '
+        'defaults to %(default)s',
+    )
+    parser.add_argument(
+        '--per-host',
+        default=4,
+        type=int,
+        help='number of links to check at the same time on any one host, '
+        'defaults to %(default)s',
+    )
+    parser.add_argument(
+        '--host-delay',
+        default=0.0,
+        type=float,
+        help='minimum number of seconds between requests to the same host, '
+        'defaults to %(default)s',
+    )
     parser.add_argument(
         'input',
         nargs='*',
@@ -81,22 +128,42 @@ def main():
               % defaults.RELEASE)
         filenames = glob.glob('deliverables/' + defaults.RELEASE + '/*.yaml')
 
-    errors = []
+    link_checker = links.LinkChecker(
+        max_workers=args.jobs,
+        per_host=args.per_host,
+        min_interval=args.host_delay,
+    )
+    with link_checker:
+        return _check_files(filenames, args, link_checker)
 
-    for filename in filenames:
-        # Skip our test deliverable
-        if 'release-test' in filename:
-            continue
 
-        print('\nChecking %s' % filename)
+def _check_files(filenames, args, link_checker):
+    # Skip our test deliverable
+    filenames = [f for f in filenames if 'release-test' not in f]
+
+    # Start looking for the links we know we will need, so the
+    # requests are running while the results are reported below in
+    # the order of the files.
+    delivs = {}
+    for filename in filenames:
         if not os.path.exists(filename):
-            print("File was deleted, skipping.")
             continue
         deliv = deliverable.Deliverable.read_file(filename)
-
         releases = deliv.releases
         if not args.all:
             releases = releases[-1:]
+        delivs[filename] = (deliv, releases)
+        link_checker.add(
+            *_get_expected_links(deliv, releases, args.artifacts))
+
+    errors = []
+
+    for filename in filenames:
+        print('\nChecking %s' % filename)
+        if filename not in delivs:
+            print("File was deleted, skipping.")
+            continue
+        deliv, releases = delivs[filename]
 
         for release in releases:
 
@@ -112,7 +179,7 @@ def main():
 
                 if not args.artifacts:
                     version_exists = gitutils.tag_exists(
-                        project.repo.name, version,
+                        project.repo.name, version, link_checker,
                     )
                     if version_exists:
                         print('  found tag')
@@ -126,24 +193,29 @@ def main():
                 if deliv.artifact_link_mode == 'tarball':
 
                     tb_url = links.tarball_url(version, project)
-                    errors.extend(check_signed_file('tarball', tb_url))
+                    errors.extend(
+                        check_signed_file('tarball', tb_url, link_checker))
 
-                    if 'a' in version or 'b' in version or 'rc' in version:
+                    if _is_pre_release(version):
                         print('  pre-releases are not uploaded to PyPI')
                         continue
 
                     pypi_name = project.repo.pypi_name
                     if not pypi_name:
                         pypi_name = project.guess_sdist_name()
-                    pypi_info = pythonutils.get_pypi_info(pypi_name)
-                    if not pypi_info:
+                    # The files may have just been uploaded, so do
+                    # not trust a recently cached answer.
+                    release_files = pythonutils.get_pypi_release_files(
+                        pypi_name, version, refresh=True)
+                    if release_files is None:
                         print('  apparently not a python module')
                         continue
 
                     wheel_errors = list(
                         check_url(
                             'python 3 wheel',
-                            links.wheel_py3_url(version, project)
+                            links.wheel_py3_url(version, project),
+                            link_checker,
                         )
                     )
                     has_23_wheel = False
@@ -153,7 +225,8 @@ def main():
                         wheel_errors = list(
                             check_url(
                                 'python 2/3 wheel',
-                                links.wheel_both_url(version, project)
+                                links.wheel_both_url(version, project),
+                                link_checker,
                             )
                         )
                     if wheel_errors:
@@ -167,6 +240,7 @@ def main():
                                 'python 2/3 wheel signature',
                                 links.wheel_both_url(version,
                                                      project) + '.asc',
+                                link_checker,
                             )
                         )
                     else:
@@ -177,10 +251,11 @@ def main():
                                 'python 3 wheel signature',
                                 links.wheel_py3_url(version,
                                                     project) + '.asc',
+                                link_checker,
                             )
                         )
 
-                    if version not in pypi_info.get('releases', {}):
+                    if not release_files:
                         msg = ('{} dist with version {} '
                                'not uploaded to PyPI').format(
                                    pypi_name, version)
@@ -192,7 +267,7 @@ def main():
                         expected_types = set(['bdist_wheel', 'sdist'])
                         actual_types = set(
                             r['packagetype']
-                            for r in pypi_info['releases'][version]
+                            for r in release_files
                         )
                         for actual in actual_types:
                             print('  found {} on PyPI'.format(actual))
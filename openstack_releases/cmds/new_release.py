@@ -459,7 +459,8 @@ def main():
 
         else:
             # Figure out the hash for the HEAD of the branch.
-            gitutils.clone_repo(workdir, repo)
+            gitutils.clone_repo(workdir, repo,
+                                mode=gitutils.CLONE_BLOBLESS)
 
             version = 'master'
             if series != '_independent':
@@ -42,7 +42,7 @@ def get_prior_branch_point(workdir, repo, branch):
     for a better description of what the desired tag info is.
 
     """
-    gitutils.clone_repo(workdir, repo)
+    gitutils.clone_repo(workdir, repo, mode=gitutils.CLONE_REF_ONLY)
     branch_base = gitutils.get_branch_base(
         workdir, repo, branch,
     )
@@ -142,6 +142,9 @@ def main():
     all_deliv = deliverable.Deliverables(
         root_dir=args.deliverables_dir,
         collapse_history=False,
+        lazy=True,
+        # The data is written back out, so keep the formatting.
+        round_trip=True,
     )
 
     for deliv in all_deliv.get_deliverables(None, args.series):
@@ -17,9 +17,13 @@
 import argparse
 import atexit
 import collections
+import concurrent.futures
+import contextlib
+import contextvars
 import functools
 import glob
 import inspect
+import io
 import logging
 import os
 import os.path
@@ -27,8 +31,9 @@ import re
 import shutil
 import sys
 import tempfile
+import threading
+import traceback
 
-from openstack_governance import governance
 import requests
 
 # Disable warnings about insecure connections.
@@ -37,6 +42,8 @@ from requests.packages import urllib3
 from openstack_releases import defaults
 from openstack_releases import deliverable
 from openstack_releases import gitutils
+from openstack_releases import governanceutils
+from openstack_releases import httputils
 from openstack_releases import npmutils
 from openstack_releases import project_config
 from openstack_releases import puppetutils
@@ -103,6 +110,9 @@ _TYPE_TO_RELEASE_TYPE = {
 
 _PYTHON_RELEASE_TYPES = ['python-service', 'python-pypi', 'neutron', 'horizon']
 
+# The maximum number of repositories to clone at the same time.
+_CLONE_WORKERS = 8
+
 _PLEASE = ('It is too expensive to determine this value during '
            'the site build, please set it explicitly.')
 
@@ -147,6 +157,36 @@ def applies_to_cycle(f):
     return decorated
 
 
+def needs(*resources, provides=()):
+    """Declare what a check depends on, for the check scheduler.
+
+    The resources are:
+
+    clone
+      The check uses the working tree of the repositories, so it must
+      wait for them to be cloned and must not run at the same time as
+      any other check using the working tree.
+    git
+      The check only queries the git history of the repositories, so
+      it must wait for them to be cloned.
+    sdist
+      The check uses the sdist built for the repositories.
+    network
+      The check talks to remote services.
+    tags
+      The check temporarily adds tags to the repositories, so it must
+      not run at the same time as any other check querying the history
+      because they would see the tags as existing releases.
+
+    :param provides: The resources produced by the check.
+    """
+    def decorator(f):
+        f.needs = frozenset(resources)
+        f.provides = frozenset(provides)
+        return f
+    return decorator
+
+
 # Remember which tags already exist so we don't have to repeat the
 # expensive check.
 existing_tag_cache = collections.defaultdict(set)
@@ -218,6 +258,7 @@ def skip_eom_tag_when_series_eom(f):
     return decorated
 
 
+@needs('git')
 @skip_existing_tags
 @applies_to_cycle
 @applies_to_released
@@ -271,6 +312,7 @@ def validate_series_open(deliv, context):
             expected_branch, previous_deliverable_file, deliv.series))
 
 
+@needs('git')
 @skip_existing_tags
 @applies_to_released
 @applies_to_cycle
@@ -308,6 +350,7 @@ def validate_series_first(deliv, context):
         )
 
 
+@needs('git')
 @skip_existing_tags
 @applies_to_current
 @applies_to_released
@@ -375,6 +418,7 @@ def validate_pre_release_progression(deliv, context):
         print('OK')
 
 
+@needs('git')
 @skip_existing_tags
 @applies_to_released
 def validate_series_final(deliv, context):
@@ -443,6 +487,7 @@ def _require_tag_on_all_repos(deliv, current_release, eol_or_em, context):
         print('OK')
 
 
+@needs('git')
 @skip_existing_tags
 @applies_to_released
 def validate_series_eol(deliv, context):
@@ -465,6 +510,7 @@ def validate_series_eol(deliv, context):
     )
 
 
+@needs('git')
 @skip_existing_tags
 @applies_to_released
 def validate_series_eom(deliv, context):
@@ -487,6 +533,7 @@ def validate_series_eom(deliv, context):
     )
 
 
+@needs('git')
 @skip_existing_tags
 @applies_to_released
 def validate_series_em(deliv, context):
@@ -534,6 +581,7 @@ def validate_series_em(deliv, context):
                           (current_hash, previous_hash))
 
 
+@needs('network')
 @skip_em_eom_eol_tags
 def validate_bugtracker(deliv, context):
     "Does the bug tracker info link to something that exists?"
@@ -541,8 +589,9 @@ def validate_bugtracker(deliv, context):
     sb_id = deliv.storyboard_id
     if lp_name:
         try:
-            lp_resp = requests.get('https://api.launchpad.net/1.0/' + lp_name)
-        except requests.exceptions.ConnectionError as e:
+            lp_resp = httputils.get('https://api.launchpad.net/1.0/' + lp_name)
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as e:
             # The flakey Launchpad API failed. Don't punish the user for that.
             context.warning('Could not verify launchpad project %s (%s)' %
                             (lp_name, e))
@@ -552,10 +601,11 @@ def validate_bugtracker(deliv, context):
         print('launchpad project ID {} OK'.format(lp_name))
     elif sb_id:
         try:
-            projects_resp = requests.get(
+            projects_resp = httputils.get(
                 'https://storyboard.openstack.org/api/v1/projects'
             )
-        except requests.exceptions.ConnectionError as e:
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as e:
             # The flakey Launchpad API failed. Don't punish the user for that.
             context.warning('Could not verify storyboard project %s (%s)' %
                             (sb_id, e))
@@ -579,6 +629,7 @@ def validate_bugtracker(deliv, context):
         context.error('No launchpad or storyboard project given')
 
 
+@needs('network')
 @skip_em_eom_eol_tags
 def validate_team(deliv, context):
     "Look for the team name in the governance data."
@@ -594,6 +645,7 @@ def validate_team(deliv, context):
         print('owned by team {}'.format(deliv.team))
 
 
+@needs('network')
 @skip_em_eom_eol_tags
 def validate_release_notes(deliv, context):
     "Make sure the release notes page exists, if it is specified."
@@ -618,7 +670,7 @@ def validate_release_notes(deliv, context):
     else:
         links = [notes_link]
     for link in links:
-        rn_resp = requests.get(link)
+        rn_resp = httputils.get(link)
         if (rn_resp.status_code // 100) != 2:
             context.error('Could not fetch release notes page %s: %s' %
                           (link, rn_resp.status_code))
@@ -668,6 +720,7 @@ def validate_model(deliv, context):
         return
 
 
+@needs(provides=('clone',))
 def clone_deliverable(deliv, context):
     """Clone all of the repositories for the deliverable into the workdir.
 
@@ -675,18 +728,22 @@ def clone_deliverable(deliv, context):
     performed as expected.
 
     """
-    cloned = set()
-    ok = True
+    to_clone = []
     for repo in deliv.repos:
-        if repo.name in cloned:
+        if repo.name in to_clone:
             continue
         if repo.is_retired:
             LOG.info('{} is retired, skipping clone'.format(repo.name))
             continue
-        if not gitutils.safe_clone_repo(context.workdir, repo.name,
-                                        'master', context):
-            ok = False
-    return ok
+        to_clone.append(repo.name)
+    return gitutils.safe_clone_repos(
+        context.workdir, to_clone, 'master', context,
+        max_workers=_CLONE_WORKERS,
+        # Several checks read files at a ref or build from the working
+        # tree, so they need the contents. A blobless clone lets git
+        # fetch only the contents they actually read.
+        mode=gitutils.CLONE_BLOBLESS,
+    )
 
 
 def _require_gitreview(repo, context):
@@ -700,6 +757,7 @@ def _require_gitreview(repo, context):
         print('found {}'.format(filename))
 
 
+@needs('clone')
 @skip_existing_tags
 def validate_gitreview(deliv, context):
     "All repos must include a .gitreview file for new releases."
@@ -727,8 +785,12 @@ def validate_gitreview(deliv, context):
                     release.version))
 
 
-def get_release_type(deliv, repo, workdir):
-    "Return tuple with release type and whether it was explicitly set."
+def get_release_type(deliv, repo, workdir, ref=None):
+    """Return tuple with release type and whether it was explicitly set.
+
+    If ref is given, any files needed to guess the type are read at
+    that ref instead of from the working tree.
+    """
     if deliv.release_type is not None:
         return (deliv.release_type, True)
 
@@ -739,15 +801,16 @@ def get_release_type(deliv, repo, workdir):
     if deliv.include_pypi_link:
         return ('python-pypi', False)
 
-    if puppetutils.looks_like_a_module(workdir, repo.name):
+    if puppetutils.looks_like_a_module(workdir, repo.name, ref):
         return ('puppet', False)
 
-    if npmutils.looks_like_a_module(workdir, repo.name):
+    if npmutils.looks_like_a_module(workdir, repo.name, ref):
         return ('nodejs', False)
 
     return ('python-service', False)
 
 
+@needs('git', 'network')
 @skip_em_eom_eol_tags
 @skip_existing_tags
 @applies_to_released
@@ -764,7 +827,7 @@ def validate_release_type(deliv, context):
         LOG.debug('checking release-type for {}'.format(project.repo.name))
 
         release_type, was_explicit = get_release_type(
-            deliv, project.repo, context.workdir,
+            deliv, project.repo, context.workdir, project.hash,
         )
         if was_explicit:
             LOG.debug('found explicit release-type {!r}'.format(
@@ -780,16 +843,16 @@ def validate_release_type(deliv, context):
         if not version_exists:
             LOG.debug('new version {}, checking release jobs'.format(
                 release.version))
-            gitutils.checkout_ref(
-                context.workdir, project.repo.name, project.hash, context)
             project_config.require_release_jobs_for_repo(
                 deliv,
                 project.repo,
                 release_type,
                 context,
+                ref=project.hash,
             )
 
 
+@needs('clone')
 @skip_em_eom_eol_tags
 @applies_to_released
 def validate_tarball_base(deliv, context):
@@ -844,6 +907,7 @@ def validate_tarball_base(deliv, context):
                         sdist, expected))
 
 
+@needs('clone', 'tags', provides=('sdist',))
 @skip_em_eom_eol_tags
 @applies_to_released
 def validate_build_sdist(deliv, context):
@@ -900,6 +964,7 @@ def validate_build_sdist(deliv, context):
             )
 
 
+@needs('clone', 'sdist', 'network')
 @skip_em_eom_eol_tags
 @skip_existing_tags
 @applies_to_released
@@ -958,6 +1023,7 @@ def validate_pypi_readme(deliv, context):
             print('OK')
 
 
+@needs('clone', 'network')
 @skip_em_eom_eol_tags
 @skip_existing_tags
 @applies_to_released
@@ -1039,6 +1105,7 @@ def validate_pypi_permissions(deliv, context):
                 sorted(uploaders), pypi_name))
 
 
+@needs('git')
 @skip_existing_tags
 @applies_to_released
 def validate_deliverable_is_not_abandoned(deliv, context):
@@ -1048,6 +1115,7 @@ def validate_deliverable_is_not_abandoned(deliv, context):
         context.error('Abandoned deliverables should not see new releases')
 
 
+@needs('clone')
 @skip_existing_tags
 @applies_to_released
 def validate_release_sha_exists(deliv, context):
@@ -1092,6 +1160,7 @@ def validate_release_sha_exists(deliv, context):
                                  'repo': project.repo.name})
 
 
+@needs('clone')
 @applies_to_released
 def validate_existing_tags(deliv, context):
     "Ensure tags that exist point to the SHAs listed."
@@ -1143,6 +1212,7 @@ def validate_existing_tags(deliv, context):
                     release.version, project.repo.name))
 
 
+@needs('git')
 @skip_existing_tags
 @applies_to_released
 def validate_version_numbers(deliv, context):
@@ -1218,8 +1288,13 @@ def validate_version_numbers(deliv, context):
 
         for project in release.projects:
 
-            if not gitutils.checkout_ref(context.workdir, project.repo.name,
-                                         project.hash, context):
+            # The files are read at the release SHA, so the working
+            # tree does not need to be checked out.
+            if not gitutils.commit_exists(context.workdir,
+                                          project.repo.name, project.hash):
+                context.error(
+                    'Could not find {} in repository {}'.format(
+                        project.hash, project.repo.name))
                 continue
 
             version_exists = gitutils.commit_exists(
@@ -1233,7 +1308,7 @@ def validate_version_numbers(deliv, context):
                 release.version, project.repo))
 
             release_type, was_explicit = get_release_type(
-                deliv, project.repo, context.workdir,
+                deliv, project.repo, context.workdir, project.hash,
             )
             if was_explicit:
                 LOG.debug('found explicit release-type {!r}'.format(
@@ -1248,7 +1323,7 @@ def validate_version_numbers(deliv, context):
             if release_type == 'puppet':
                 LOG.debug('applying puppet version rules')
                 puppet_ver = puppetutils.get_version(
-                    context.workdir, project.repo.name)
+                    context.workdir, project.repo.name, project.hash)
                 if puppet_ver != release.version:
                     context.error(
                         '%s metadata contains "%s" '
@@ -1265,7 +1340,7 @@ def validate_version_numbers(deliv, context):
             if release_type == 'nodejs':
                 LOG.debug('applying nodejs version rules')
                 npm_ver = npmutils.get_version(
-                    context.workdir, project.repo.name)
+                    context.workdir, project.repo.name, project.hash)
                 if npm_ver != release.version:
                     context.error(
                         '%s package.json contains "%s" '
@@ -1281,7 +1356,7 @@ def validate_version_numbers(deliv, context):
             if release_type == 'xstatic':
                 LOG.debug('performing xstatic version checks')
                 xs_versions = xstaticutils.get_versions(
-                    context.workdir, project.repo.name)
+                    context.workdir, project.repo.name, project.hash)
                 if not xs_versions:
                     context.error(
                         '%s should contain a PACKAGE_VERSION but none found')
@@ -1339,6 +1414,7 @@ def validate_version_numbers(deliv, context):
             prev_version[project.repo.name] = release.version
 
 
+@needs('clone')
 @skip_existing_tags
 @applies_to_released
 def validate_new_releases_at_end(deliv, context):
@@ -1378,6 +1454,7 @@ def validate_new_releases_at_end(deliv, context):
             print('OK')
 
 
+@needs('clone')
 @skip_em_eom_eol_tags
 @skip_existing_tags
 @applies_to_released
@@ -1435,6 +1512,7 @@ def validate_new_releases_in_open_series(deliv, context):
         print('OK')
 
 
+@needs('clone')
 @skip_eom_tag_when_series_eom
 @applies_to_released
 def validate_release_branch_membership(deliv, context):
@@ -1532,6 +1610,7 @@ def validate_release_branch_membership(deliv, context):
             prev_version[project.repo.name] = release.version
 
 
+@needs('network')
 @skip_em_eom_eol_tags
 @applies_to_current
 @applies_to_released
@@ -1597,6 +1676,7 @@ def _is_branch_with_release_id(branch_name):
             re.search(r'^[0-9]{4}.[1-2]{1}$', branch_id, re.I) is not None)
 
 
+@needs('clone')
 def validate_stable_branches(deliv, context):
     "Apply the rules for stable branches."
 
@@ -1782,6 +1862,7 @@ def validate_stable_branches(deliv, context):
                             branch.name, deliv.series))
 
 
+@needs('git')
 def validate_feature_branches(deliv, context):
     "Apply the rules for feature branches."
 
@@ -1829,6 +1910,7 @@ def validate_feature_branches(deliv, context):
                 )
 
 
+@needs('git', 'network')
 def validate_branch_points(deliv, context):
     "Make sure the branch points given are on the expected branches."
 
@@ -1922,28 +2004,35 @@ class ValidationContext(object):
     _zuul_projects = None
     _gov_data = None
 
-    def __init__(self, debug=False, cleanup=True):
+    def __init__(self, debug=False, cleanup=True, workdir=True):
         self.warnings = []
         self.errors = []
         self.debug = debug
         self.cleanup = cleanup
         self.filename = None
-        self._setup_workdir()
+        self.workdir = None
+        # Checks run in threads with --check-jobs share the data
+        # loaded on demand by the properties below.
+        self._data_lock = threading.Lock()
+        if workdir:
+            self._setup_workdir()
         self.function_name = 'unknown'
 
     def _setup_workdir(self):
         workdir = tempfile.mkdtemp(prefix='releases-')
         LOG.debug('creating temporary files in {}'.format(workdir))
-
-        def cleanup_workdir():
-            if self.cleanup:
-                shutil.rmtree(workdir, True)
-            else:
-                print('not cleaning up %s' % workdir)
-        atexit.register(cleanup_workdir)
-
+        atexit.register(self.cleanup_workdir)
         self.workdir = workdir
 
+    def cleanup_workdir(self):
+        if self.workdir is None:
+            return
+        if self.cleanup:
+            gitutils.close_worktree_pool(self.workdir)
+            shutil.rmtree(self.workdir, True)
+        else:
+            print('not cleaning up %s' % self.workdir)
+
     def set_filename(self, filename):
         self.filename = filename
 
@@ -1975,15 +2064,309 @@ class ValidationContext(object):
 
     @property
     def zuul_projects(self):
-        if not self._zuul_projects:
-            self._zuul_projects = project_config.get_zuul_project_data()
-        return self._zuul_projects
+        with self._data_lock:
+            if not self._zuul_projects:
+                self._zuul_projects = project_config.get_zuul_project_data()
+            return self._zuul_projects
 
     @property
     def gov_data(self):
-        if not self._gov_data:
-            self._gov_data = governance.Governance.from_remote_repo()
-        return self._gov_data
+        with self._data_lock:
+            if not self._gov_data:
+                self._gov_data = governanceutils.get_governance()
+            return self._gov_data
+
+
+class _CheckContext(object):
+    """The view of a ValidationContext given to one scheduled check.
+
+    The messages are kept separately so they can be added to the
+    shared context in the order of the checks list instead of the
+    order in which the checks finish.
+    """
+
+    def __init__(self, parent, check):
+        self._parent = parent
+        self.function_name = check.__name__
+        self.warnings = []
+        self.errors = []
+
+    def __getattr__(self, name):
+        return getattr(self._parent, name)
+
+    warning = ValidationContext.warning
+    error = ValidationContext.error
+
+
+# The buffer collecting the output of the check running in the
+# current thread, see _ThreadOutput.
+_output_buffer = contextvars.ContextVar('output_buffer', default=None)
+
+
+class _ThreadOutput(io.TextIOBase):
+    "Send text written by a thread to its capture buffer, if it has one."
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+
+    def write(self, text):
+        buffer = _output_buffer.get()
+        if buffer is None:
+            return self.stream.write(text)
+        return buffer.write(text)
+
+    def flush(self):
+        if _output_buffer.get() is None:
+            self.stream.flush()
+
+    @contextlib.contextmanager
+    def capture(self):
+        buffer = io.StringIO()
+        token = _output_buffer.set(buffer)
+        try:
+            yield buffer
+        finally:
+            _output_buffer.reset(token)
+
+
+@contextlib.contextmanager
+def _thread_output():
+    "Route stdout and the log output through a _ThreadOutput."
+    router = _ThreadOutput(sys.stdout)
+    handlers = [
+        h
+        for h in logging.getLogger().handlers
+        if isinstance(h, logging.StreamHandler) and h.stream is sys.stdout
+    ]
+    for h in handlers:
+        h.setStream(router)
+    try:
+        with contextlib.redirect_stdout(router):
+            yield router
+    finally:
+        for h in handlers:
+            h.setStream(router.stream)
+
+
+_CHECKS = [
+    clone_deliverable,
+    validate_bugtracker,
+    validate_team,
+    validate_release_notes,
+    validate_model,
+    validate_release_type,
+    validate_pypi_permissions,
+    validate_build_sdist,
+    # Check readme after sdist build to slightly optimize things
+    validate_pypi_readme,
+    validate_gitreview,
+    validate_deliverable_is_not_abandoned,
+    validate_release_sha_exists,
+    validate_existing_tags,
+    validate_version_numbers,
+    validate_new_releases_at_end,
+    validate_new_releases_in_open_series,
+    validate_release_branch_membership,
+    validate_tarball_base,
+    validate_new_releases,
+    validate_series_open,
+    validate_series_first,
+    validate_series_final,
+    validate_pre_release_progression,
+    validate_series_eol,
+    validate_series_eom,
+    validate_series_em,
+    validate_branch_prefixes,
+    validate_stable_branches,
+    validate_feature_branches,
+    validate_branch_points,
+]
+
+_LOG_FORMAT = '%(levelname)7s: %(message)s'
+
+
+def _setup_logging():
+    # Set up logging, including making some loggers quiet.
+    logging.basicConfig(
+        format=_LOG_FORMAT,
+        stream=sys.stdout,
+        level=logging.DEBUG,
+    )
+    logging.getLogger('urllib3.connectionpool').setLevel(logging.WARNING)
+
+
+def validate_one_file(filename, context, check_jobs=1):
+    "Run all of the checks for one deliverable file."
+    header('Checking %s' % filename, '=')
+
+    if not os.path.isfile(filename):
+        print("File was deleted, skipping.")
+        return
+
+    context.set_filename(filename)
+
+    deliv = deliverable.Deliverable.read_file(filename)
+
+    if deliv.series in _CLOSED_SERIES:
+        print('File is part of a closed series, skipping')
+        return
+
+    if check_jobs > 1:
+        run_checks(deliv, context, _CHECKS, check_jobs)
+        return
+
+    for check in _CHECKS:
+        title = inspect.getdoc(check).splitlines()[0].strip()
+        header(title)
+        context.set_function(check)
+        check(deliv, context)
+
+
+def _get_check_dependencies(checks):
+    """Return the indexes of the checks each check has to wait for.
+
+    A check waits for the most recent earlier check providing each
+    resource it needs. Checks using the working tree also wait for the
+    previous check using it, so they run one at a time in order. A
+    check changing the tags waits for every earlier check using the
+    repositories, and every later one waits for it.
+    """
+    providers = {}
+    last_clone_user = None
+    last_tag_user = None
+    # The checks using the repositories since the last one changing
+    # the tags.
+    repo_users = []
+    dependencies = []
+    for i, check in enumerate(checks):
+        check_needs = getattr(check, 'needs', frozenset())
+        check_provides = getattr(check, 'provides', frozenset())
+        deps = set()
+        if 'tags' in check_needs:
+            deps.update(repo_users)
+            repo_users = []
+            last_tag_user = i
+        elif check_needs & {'clone', 'git'} and last_tag_user is not None:
+            deps.add(last_tag_user)
+        if check_needs & {'clone', 'git'} or 'clone' in check_provides:
+            repo_users.append(i)
+        for resource in check_needs:
+            if resource == 'git':
+                resource = 'clone'
+            if resource in providers:
+                deps.add(providers[resource])
+        if 'clone' in check_needs or 'clone' in check_provides:
+            if last_clone_user is not None:
+                deps.add(last_clone_user)
+            last_clone_user = i
+        for resource in check_provides:
+            providers[resource] = i
+        dependencies.append(deps)
+    return dependencies
+
+
+def _run_one_check(check, deliv, context, router):
+    check_context = _CheckContext(context, check)
+    error = None
+    with router.capture() as output:
+        try:
+            check(deliv, check_context)
+        except Exception as e:
+            error = e
+    return (output.getvalue(), check_context, error)
+
+
+def run_checks(deliv, context, checks, max_workers):
+    """Run the checks, letting independent ones run at the same time.
+
+    The order in which checks start is based on the resources they
+    declare with the needs() decorator. The output and messages of
+    each check are reported grouped under its header, in the order of
+    the checks list, so the report looks like a serial run.
+    """
+    dependencies = _get_check_dependencies(checks)
+    results = {}
+    running = {}
+    next_to_report = 0
+    # Once a check fails only the checks before it are started, so the
+    # report stops at the same place as a serial run.
+    stop_at = len(checks)
+
+    with _thread_output() as router:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers) as executor:
+            while next_to_report < len(checks):
+                for i, check in enumerate(checks[:stop_at]):
+                    if i in results or i in running.values():
+                        continue
+                    if all(d in results for d in dependencies[i]):
+                        future = executor.submit(
+                            _run_one_check, check, deliv, context, router)
+                        running[future] = i
+                done, _ = concurrent.futures.wait(
+                    running,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for future in done:
+                    i = running.pop(future)
+                    results[i] = future.result()
+                    if results[i][2] is not None:
+                        stop_at = min(stop_at, i)
+
+                while next_to_report in results:
+                    check = checks[next_to_report]
+                    output, check_context, error = results[next_to_report]
+                    title = inspect.getdoc(check).splitlines()[0].strip()
+                    header(title)
+                    sys.stdout.write(output)
+                    context.warnings.extend(check_context.warnings)
+                    context.errors.extend(check_context.errors)
+                    if error is not None:
+                        raise error
+                    next_to_report += 1
+
+
+def _init_worker():
+    """Set up a worker process for --jobs.
+
+    Workers started with spawn or forkserver do not inherit the
+    logging settings from main(), so apply them again.
+    """
+    _setup_logging()
+
+
+def _validate_one_file_isolated(filename, debug, cleanup, check_jobs=1):
+    """Validate one file in a worker process for --jobs.
+
+    Each file gets its own working directory, and everything printed
+    or logged is captured so the parent can show it in the same order
+    as a serial run.
+
+    Returns a tuple containing the output, the warnings, the errors,
+    and a boolean indicating whether the validation failed with an
+    exception.
+    """
+    output = io.StringIO()
+    handler = logging.StreamHandler(output)
+    handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+    root = logging.getLogger()
+    old_handlers = root.handlers
+    root.handlers = [handler]
+    failed = False
+    try:
+        with contextlib.redirect_stdout(output):
+            context = ValidationContext(debug=debug, cleanup=cleanup)
+            try:
+                validate_one_file(filename, context, check_jobs)
+            except Exception:
+                traceback.print_exc(file=output)
+                failed = True
+            finally:
+                context.cleanup_workdir()
+    finally:
+        root.handlers = old_handlers
+    return (output.getvalue(), context.warnings, context.errors, failed)
 
 
 def main():
@@ -2001,6 +2384,20 @@ def main():
         action='store_true',
         help='throw exception on error',
     )
+    parser.add_argument(
+        '--jobs', '-j',
+        default=1,
+        type=int,
+        help=('number of deliverable files to validate at the same time, '
+              'defaults to %(default)s'),
+    )
+    parser.add_argument(
+        '--check-jobs',
+        default=1,
+        type=int,
+        help=('number of independent checks to run at the same time for '
+              'each file, defaults to %(default)s'),
+    )
     parser.add_argument(
         'input',
         nargs='*',
@@ -2009,13 +2406,7 @@ def main():
     )
     args = parser.parse_args()
 
-    # Set up logging, including making some loggers quiet.
-    logging.basicConfig(
-        format='%(levelname)7s: %(message)s',
-        stream=sys.stdout,
-        level=logging.DEBUG,
-    )
-    logging.getLogger('urllib3.connectionpool').setLevel(logging.WARNING)
+    _setup_logging()
 
     filenames = args.input or gitutils.find_modified_deliverable_files()
     if not filenames:
@@ -2023,64 +2414,41 @@ def main():
                     'skipping validation')
         return 0
 
+    use_workers = args.jobs > 1 and len(filenames) > 1
+    # The workers each make their own working directory.
     context = ValidationContext(
         debug=args.debug,
         cleanup=args.cleanup,
+        workdir=not use_workers,
     )
 
-    for filename in filenames:
-        header('Checking %s' % filename, '=')
-
-        if not os.path.isfile(filename):
-            print("File was deleted, skipping.")
-            continue
-
-        context.set_filename(filename)
-
-        deliv = deliverable.Deliverable.read_file(filename)
-
-        if deliv.series in _CLOSED_SERIES:
-            print('File is part of a closed series, skipping')
-            continue
-
-        checks = [
-            clone_deliverable,
-            validate_bugtracker,
-            validate_team,
-            validate_release_notes,
-            validate_model,
-            validate_release_type,
-            validate_pypi_permissions,
-            validate_build_sdist,
-            # Check readme after sdist build to slightly optimize things
-            validate_pypi_readme,
-            validate_gitreview,
-            validate_deliverable_is_not_abandoned,
-            validate_release_sha_exists,
-            validate_existing_tags,
-            validate_version_numbers,
-            validate_new_releases_at_end,
-            validate_new_releases_in_open_series,
-            validate_release_branch_membership,
-            validate_tarball_base,
-            validate_new_releases,
-            validate_series_open,
-            validate_series_first,
-            validate_series_final,
-            validate_pre_release_progression,
-            validate_series_eol,
-            validate_series_eom,
-            validate_series_em,
-            validate_branch_prefixes,
-            validate_stable_branches,
-            validate_feature_branches,
-            validate_branch_points,
-        ]
-        for check in checks:
-            title = inspect.getdoc(check).splitlines()[0].strip()
-            header(title)
-            context.set_function(check)
-            check(deliv, context)
+    if use_workers:
+        # Validate the files in separate processes and then report
+        # the results in the order the files were given, so the
+        # output matches a serial run.
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=args.jobs,
+                initializer=_init_worker) as executor:
+            futures = [
+                executor.submit(_validate_one_file_isolated,
+                                filename, args.debug, args.cleanup,
+                                args.check_jobs)
+                for filename in filenames
+            ]
+            for filename, future in zip(filenames, futures):
+                output, warnings, errors, failed = future.result()
+                sys.stdout.write(output)
+                sys.stdout.flush()
+                context.warnings.extend(warnings)
+                context.errors.extend(errors)
+                if failed:
+                    for f in futures:
+                        f.cancel()
+                    raise RuntimeError(
+                        'Failed to validate {}'.format(filename))
+    else:
+        for filename in filenames:
+            validate_one_file(filename, context, args.check_jobs)
 
     context.show_summary()
 
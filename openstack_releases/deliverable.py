@@ -13,19 +13,30 @@
 #    under the License.
 """Class for manipulating all of the deliverable data."""
 
+import bisect
 import collections
+import concurrent.futures
 import copy
 import functools
 import glob
+import hashlib
+import logging
 import os
 import os.path
 import weakref
 
 import pbr.version
 
+from openstack_releases import cache
 from openstack_releases import series_status
 from openstack_releases import yamlutils
 
+LOG = logging.getLogger(__name__)
+
+# Increment this when the structure of the parsed data changes so that
+# old cache files are ignored.
+_CACHE_VERSION = 1
+
 
 def _safe_semver(v):
     """Get a SemanticVersion that closely represents the version string.
@@ -105,11 +116,52 @@ def _collapse_deliverable_history(name, info):
     info['releases'] = list(reversed(releases))
 
 
+def _parse_deliverable_file(filename, collapse_history, round_trip):
+    """Return the parsed content of one deliverable file.
+
+    This is a module-level function so it can be given to a process
+    pool.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        if round_trip:
+            d_info = yamlutils.loads(f.read())
+        else:
+            d_info = yamlutils.safe_loads(f.read())
+    if collapse_history:
+        name = os.path.splitext(os.path.basename(filename))[0]
+        _collapse_deliverable_history(name, d_info)
+    return d_info
+
+
 class Deliverables(object):
 
-    def __init__(self, root_dir, collapse_history=True):
+    def __init__(self, root_dir, collapse_history=True, use_cache=None,
+                 jobs=1, lazy=False, round_trip=False):
+        """Load the deliverable files found in root_dir.
+
+        :param root_dir: The directory containing the series directories.
+        :param collapse_history: Boolean indicating whether pre-releases
+          should be collapsed into their final release.
+        :param use_cache: Boolean indicating whether to use the on-disk
+          cache of parsed files. Defaults to the value of
+          cache.enabled().
+        :param jobs: Number of processes to use to parse files that are
+          not in the cache. A value of 0 or None uses one process per
+          CPU.
+        :param lazy: Boolean indicating whether to delay parsing the
+          files for a series until they are needed. Lookups by team
+          still load the entire tree.
+        :param round_trip: Boolean indicating whether to parse the files
+          with the round-trip loader, which is slower but preserves the
+          comments and formatting needed to write the data back out.
+        """
         self._root_dir = root_dir
         self._collapse_history = collapse_history
+        if use_cache is None:
+            use_cache = cache.enabled()
+        self._use_cache = use_cache
+        self._jobs = jobs or os.cpu_count() or 1
+        self._round_trip = round_trip
 
         # Map team names to a list of all of their deliverables.
         self._team_deliverables = collections.defaultdict(set)
@@ -122,24 +174,169 @@ class Deliverables(object):
         self._by_team_and_series = collections.defaultdict(list)
         self._by_series = collections.defaultdict(list)
         self._by_deliverable_name = collections.defaultdict(list)
+        # Map repository names to the deliverable files that include
+        # them.
+        self._by_repo = collections.defaultdict(list)
         # Map filenames to parsed content.
         self._by_filename = {}
 
-        self._load_deliverable_files(root_dir)
+        # Map series directories, series names, and deliverable names
+        # to the files that exist, whether they are loaded or not.
+        self._files_by_dir = collections.defaultdict(list)
+        self._files_by_series = collections.defaultdict(list)
+        self._files_by_name = collections.defaultdict(list)
+        # Map filenames to the (mtime, size) key used for the cache.
+        self._file_keys = {}
+        self._loaded_dirs = set()
+
+        self._index_deliverable_files(root_dir)
+        if not lazy:
+            self._load_dirs(self._files_by_dir.keys())
 
-    def _load_deliverable_files(self, root_dir):
+    def _index_deliverable_files(self, root_dir):
         deliverable_files = glob.glob(os.path.join(root_dir, '*/*.yaml'))
         for filename in sorted(deliverable_files):
-            series = self._series_from_filename(filename)
-            deliverable = self._deliverable_from_filename(filename)
-            with open(filename, 'r', encoding='utf-8') as f:
-                d_info = yamlutils.loads(f.read())
-                if self._collapse_history:
-                    _collapse_deliverable_history(deliverable, d_info)
-            team = d_info['team']
-            self._add_deliverable_file(
-                filename, series, team, deliverable, d_info,
+            self._files_by_dir[os.path.dirname(filename)].append(filename)
+            self._files_by_series[
+                self._series_from_filename(filename)].append(filename)
+            self._files_by_name[
+                self._deliverable_from_filename(filename)].append(filename)
+
+    def _load_all(self):
+        self._load_dirs(self._files_by_dir.keys())
+
+    def _load_series(self, series):
+        self._load_dirs(set(
+            os.path.dirname(filename)
+            for filename in self._files_by_series.get(series, [])
+        ))
+
+    def _load_dirs(self, dirnames):
+        """Parse the files in the series directories not yet loaded.
+
+        The on-disk cache is kept per directory, so only the files
+        that have changed since the cache was written are parsed.
+        """
+        dirnames = sorted(set(dirnames) - self._loaded_dirs)
+        if not dirnames:
+            return
+        self._loaded_dirs.update(dirnames)
+        caches = {}
+        new_files = []
+        to_parse = []
+        for dirname in dirnames:
+            caches[dirname] = self._read_cache(dirname)
+            for filename in self._files_by_dir[dirname]:
+                if filename in self._by_filename:
+                    # Already loaded by get_deliverable_history().
+                    continue
+                new_files.append(filename)
+                key = self._file_key(filename)
+                entry = caches[dirname].get(filename)
+                if entry is not None and entry[0] == key:
+                    self._by_filename[filename] = entry[1]
+                else:
+                    to_parse.append(filename)
+        self._parse_files(to_parse)
+        # Add the files in sorted order, regardless of how they were
+        # parsed, so the indexes are always built the same way.
+        for filename in new_files:
+            self._add_deliverable_file(filename)
+        # Rewrite the cache if anything was parsed or if files were
+        # removed since it was last saved.
+        parsed_dirs = set(os.path.dirname(filename) for filename in to_parse)
+        for dirname in dirnames:
+            filenames = self._files_by_dir[dirname]
+            if (dirname in parsed_dirs or
+                    len(filenames) != len(caches[dirname])):
+                self._write_cache(dirname, {
+                    filename: (self._file_keys[filename],
+                               self._by_filename[filename])
+                    for filename in filenames
+                })
+
+    def _load_files(self, filenames):
+        "Parse individual files, without using the cache."
+        to_parse = [
+            filename
+            for filename in filenames
+            if filename not in self._by_filename
+        ]
+        for filename in to_parse:
+            self._file_key(filename)
+        self._parse_files(to_parse)
+        for filename in to_parse:
+            self._add_deliverable_file(filename)
+
+    def _file_key(self, filename):
+        st = os.stat(filename)
+        key = (st.st_mtime_ns, st.st_size)
+        self._file_keys[filename] = key
+        return key
+
+    def _parse_files(self, filenames):
+        "Parse the files and store the results in _by_filename."
+        if self._jobs <= 1 or len(filenames) <= 1:
+            results = [
+                _parse_deliverable_file(filename, self._collapse_history,
+                                        self._round_trip)
+                for filename in filenames
+            ]
+        else:
+            LOG.debug('parsing %d deliverable files using %d processes',
+                      len(filenames), self._jobs)
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self._jobs) as executor:
+                results = list(executor.map(
+                    _parse_deliverable_file,
+                    filenames,
+                    [self._collapse_history] * len(filenames),
+                    [self._round_trip] * len(filenames),
+                    chunksize=max(1, len(filenames) // (self._jobs * 4)),
+                ))
+        self._by_filename.update(zip(filenames, results))
+
+    def _cache_filename(self, dirname):
+        # Each series directory, history mode, and loader gets its own
+        # cache file so that series can be loaded independently and
+        # different checkouts do not overwrite each other's data.
+        digest = hashlib.sha1(
+            os.path.abspath(dirname).encode('utf-8')).hexdigest()
+        mode = 'collapsed' if self._collapse_history else 'full'
+        loader = 'rt' if self._round_trip else 'safe'
+        return os.path.join(
+            cache.get_cache_dir('deliverables'),
+            '{}-{}-{}.pickle'.format(digest, mode, loader),
+        )
+
+    def _read_cache(self, dirname):
+        """Return the cached parse results for the files in dirname.
+
+        The result maps filenames to tuples containing the
+        (mtime, size) key for the file when it was parsed and the
+        parsed data.
+        """
+        if not self._use_cache:
+            return {}
+        try:
+            data = cache.load_pickle(self._cache_filename(dirname))
+        except OSError as e:
+            LOG.debug('could not read deliverable cache: %s', e)
+            return {}
+        if not data or data.get('version') != _CACHE_VERSION:
+            return {}
+        return data['files']
+
+    def _write_cache(self, dirname, parsed):
+        if not self._use_cache:
+            return
+        try:
+            cache.save_pickle(
+                self._cache_filename(dirname),
+                {'version': _CACHE_VERSION, 'files': parsed},
             )
+        except OSError as e:
+            LOG.debug('could not write deliverable cache: %s', e)
 
     @staticmethod
     def _series_from_filename(filename):
@@ -149,33 +346,42 @@ class Deliverables(object):
     def _deliverable_from_filename(filename):
         return os.path.splitext(os.path.basename(filename))[0]
 
-    def _add_deliverable_file(self, filename, series, team, deliverable,
-                              d_info):
-        self._by_filename[filename] = d_info
-        self._by_team_and_series[(team, series)].append(filename)
-        self._by_series[series].append(filename)
+    def _add_deliverable_file(self, filename):
+        series = self._series_from_filename(filename)
+        deliverable = self._deliverable_from_filename(filename)
+        d_info = self._by_filename[filename]
+        team = d_info['team']
+        # Files may be loaded in any order in lazy mode, so insert
+        # them to keep each list sorted by filename.
+        bisect.insort(self._by_team_and_series[(team, series)], filename)
+        bisect.insort(self._by_series[series], filename)
         self._team_deliverables[team].add(deliverable)
         self._team_series[team].add(series)
         d = Deliverable(team, series, deliverable, d_info)
         if d.allows_releases:
             self._active_teams.add(team)
-        deliv = self._deliverable_from_filename(filename)
-        self._by_deliverable_name[deliv].append(filename)
+        bisect.insort(self._by_deliverable_name[deliverable], filename)
+        for repo in d.repos:
+            bisect.insort(self._by_repo[repo.name], filename)
 
     def get_team_deliverables(self, team):
         "Returns a list of deliverable names produced by the team."
+        self._load_all()
         return list(sorted(self._team_deliverables[team]))
 
     def get_team_series(self, team):
         "Return the names of the series in which the team produced anything."
+        self._load_all()
         return self._team_series[team]
 
     def get_teams(self):
         "Return all of the names of all of the teams seen."
+        self._load_all()
         return list(self._team_series.keys())
 
     def get_active_teams(self):
         "Return the names of all teams which have releasable deliverables."
+        self._load_all()
         return self._active_teams
 
     def get_deliverables(self, team, series):
@@ -189,10 +395,12 @@ class Deliverables(object):
         if team is None:
             if series is None:
                 series = 'independent'
+            self._load_series(series)
             filenames = self._by_series[series]
         else:
+            self._load_series(series)
             filenames = self._by_team_and_series[(team, series)]
-        for filename in filenames:
+        for filename in list(filenames):
             yield Deliverable(
                 team,
                 self._series_from_filename(filename),
@@ -200,9 +408,37 @@ class Deliverables(object):
                 self._by_filename.get(filename, {}),
             )
 
+    def get_deliverables_for_repo(self, repo_name, series=None):
+        """Return a sequence of the deliverables that include a repository.
+
+        The deliverables are found through an index built as the files
+        are loaded, instead of by looking at every deliverable.
+
+        :param repo_name: Long name of the repository, such as
+          'openstack/nova'.
+        :param series: Optional series name to limit the results to.
+          If None, all of the series are loaded and searched.
+        """
+        if series is None:
+            self._load_all()
+        else:
+            self._load_series(series)
+        for filename in list(self._by_repo.get(repo_name, [])):
+            file_series = self._series_from_filename(filename)
+            if series is not None and file_series != series:
+                continue
+            d_info = self._by_filename[filename]
+            yield Deliverable(
+                d_info['team'],
+                file_series,
+                self._deliverable_from_filename(filename),
+                d_info,
+            )
+
     def get_deliverable_history(self, name):
         """Return info associated with a deliverable name."""
-        for filename in self._by_deliverable_name.get(name, []):
+        self._load_files(self._files_by_name.get(name, []))
+        for filename in list(self._by_deliverable_name.get(name, [])):
             yield Deliverable(
                 None,  # team will be taken from the data
                 self._series_from_filename(filename),
@@ -446,7 +682,7 @@ class Deliverable(object):
     @classmethod
     def read_file(cls, filename):
         with open(filename, 'r', encoding='utf-8') as f:
-            data = yamlutils.loads(f.read())
+            data = yamlutils.safe_loads(f.read())
 
         series_name = os.path.basename(
             os.path.dirname(filename)
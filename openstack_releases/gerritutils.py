@@ -13,7 +13,8 @@
 #    under the License.
 
 import json
-import requests
+
+from openstack_releases import httputils
 
 
 GERRIT_URL = 'https://review.opendev.org/changes/?q='
@@ -21,7 +22,7 @@ GERRIT_URL = 'https://review.opendev.org/changes/?q='
 
 def gerrit_query(*query):
     query_url = GERRIT_URL + '+'.join(query)
-    response = requests.get(query_url)
+    response = httputils.get(query_url)
     if (response.status_code // 100) != 2:
         raise RuntimeError(
             'Bad HTTP response from gerrit %s: %s' %
@@ -12,11 +12,22 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import atexit
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
+import itertools
 import logging
 import os
 import os.path
+import re
+import shutil
 import subprocess
+import tempfile
+import threading
 
+from openstack_releases import cache
 from openstack_releases import links
 from openstack_releases import processutils
 from openstack_releases import series_status
@@ -29,6 +40,26 @@ LOG = logging.getLogger(__name__)
 
 GIT_TAG_TEMPLATE = 'https://opendev.org/%s/src/tag/%s'
 
+# How much of a repository clone_repo() downloads. The partial modes
+# leave git to fetch any missing file contents when they are used, so
+# callers only pay for the files they read. See tools/clone_repo.sh.
+CLONE_FULL = 'full'
+# All of the history, with the files for the checked out ref.
+CLONE_BLOBLESS = 'blobless'
+# All of the history, with nothing checked out.
+CLONE_NO_CHECKOUT = 'no-checkout'
+# Only commits and refs, for callers looking at history but not files.
+CLONE_REF_ONLY = 'ref-only'
+CLONE_MODES = (CLONE_FULL, CLONE_BLOBLESS, CLONE_NO_CHECKOUT, CLONE_REF_ONLY)
+
+MIRROR_UPSTREAM = 'https://opendev.org'
+# Set to the maximum total size, in megabytes, of the local mirrors.
+MIRROR_MAX_SIZE_ENV = 'OPENSTACK_RELEASES_GIT_MIRROR_MAX_SIZE'
+MIRROR_DEFAULT_MAX_SIZE = 10 * 1024
+# The directory below the mirror root holding the repositories, laid
+# out the way tools/clone_repo.sh expects for --cache-dir.
+_MIRROR_HOST = 'opendev.org'
+
 
 def find_modified_deliverable_files():
     "Return a list of files modified by the most recent commit."
@@ -63,31 +94,488 @@ def changes_since(workdir, repo, ref):
     return changes
 
 
+_SHA_RE = re.compile('^[0-9a-f]{40}$')
+_FACTS_VERSION = 1
+
+
+def _is_sha(ref):
+    return bool(_SHA_RE.match(str(ref)))
+
+
+class _RepoFacts(object):
+    """Answers to git queries about one repository that cannot change.
+
+    Facts are only recorded when they hold for every clone of the
+    repository, such as a commit existing or one commit being an
+    ancestor of another. They are saved in the cache directory as soon
+    as they are learned, so later runs can skip the git commands.
+    """
+
+    def __init__(self, cache_dir, repo):
+        self._filename = os.path.join(
+            cache_dir,
+            '{}-{}.pickle'.format(repo, _FACTS_VERSION),
+        )
+        self._lock = threading.Lock()
+        self._facts = cache.load_pickle(self._filename) or {}
+
+    def get(self, *key):
+        with self._lock:
+            return self._facts.get(key)
+
+    def set(self, value, *key):
+        with self._lock:
+            if self._facts.get(key) == value:
+                return
+            self._facts[key] = value
+            self._save(lambda saved: saved.__setitem__(key, value))
+
+    def discard(self, *key):
+        with self._lock:
+            if self._facts.pop(key, None) is None:
+                return
+            self._save(lambda saved: saved.pop(key, None))
+
+    def _save(self, change):
+        # Merge with what other processes have saved since we loaded
+        # the file, so their facts are not lost.
+        saved = cache.load_pickle(self._filename) or {}
+        change(saved)
+        try:
+            cache.save_pickle(self._filename, saved)
+        except OSError as e:
+            LOG.debug('could not save git facts to %s: %s',
+                      self._filename, e)
+
+
+_repo_facts = {}
+_repo_facts_lock = threading.Lock()
+# Tags created by add_tag() in this process. They only exist in the
+# local clone, so facts about them are never recorded.
+_local_tags = set()
+
+
+def _get_facts(repo):
+    "Return the _RepoFacts for repo, or None if caching is disabled."
+    if not cache.enabled():
+        return None
+    key = (cache.get_cache_dir('git-facts'), repo)
+    with _repo_facts_lock:
+        if key not in _repo_facts:
+            _repo_facts[key] = _RepoFacts(*key)
+        return _repo_facts[key]
+
+
+def get_repo_facts(repo):
+    """Return the store of facts about repo, or None if caching is disabled.
+
+    Other modules may record their own facts, as long as they only
+    depend on the content of a commit. Use a key starting with a name
+    for the kind of fact followed by the full SHA of the commit.
+    """
+    return _get_facts(repo)
+
+
+class RefSnapshot(object):
+    """The branches and tags of a local clone.
+
+    Branch names use the same form as "git branch -a", for example
+    "master" or "remotes/origin/stable/ocata". Tags map to the SHA of
+    the commit they point to.
+    """
+
+    _FORMAT = '%(refname)%09%(objectname)%09%(*objectname)%09%(symref)'
+
+    def __init__(self, output):
+        self.branches = {}
+        self.tags = {}
+        for line in output.splitlines():
+            refname, sha, peeled, symref = line.split('\t')
+            if symref:
+                # Skip aliases like remotes/origin/HEAD.
+                continue
+            if refname.startswith('refs/heads/'):
+                self.branches[refname[len('refs/heads/'):]] = sha
+            elif refname.startswith('refs/remotes/'):
+                self.branches[refname[len('refs/'):]] = sha
+            elif refname.startswith('refs/tags/'):
+                self.tags[refname[len('refs/tags/'):]] = peeled or sha
+
+    @classmethod
+    def from_repo(cls, workdir, repo):
+        output = processutils.check_output(
+            ['git', 'for-each-ref', '--format=' + cls._FORMAT],
+            cwd=os.path.join(workdir, repo),
+            stderr=subprocess.STDOUT,
+        ).decode('utf-8')
+        return cls(output)
+
+
+_ref_snapshots = {}
+# Counts the changes to the refs of each clone, so a snapshot taken
+# while the refs were being changed is not kept.
+_ref_generations = collections.Counter()
+_ref_snapshots_lock = threading.Lock()
+
+
+def get_refs(workdir, repo):
+    """Return the RefSnapshot for a local clone.
+
+    The snapshot is taken the first time it is needed and reused until
+    one of the functions in this module changes the refs in the clone.
+    Raises CalledProcessError if the refs cannot be read.
+    """
+    key = os.path.abspath(os.path.join(workdir, repo))
+    with _ref_snapshots_lock:
+        snapshot = _ref_snapshots.get(key)
+        generation = _ref_generations[key]
+    if snapshot is None:
+        snapshot = RefSnapshot.from_repo(workdir, repo)
+        with _ref_snapshots_lock:
+            if _ref_generations[key] == generation:
+                _ref_snapshots[key] = snapshot
+    return snapshot
+
+
+def _forget_refs(workdir, repo):
+    key = os.path.abspath(os.path.join(workdir, repo))
+    with _ref_snapshots_lock:
+        _ref_snapshots.pop(key, None)
+        _ref_generations[key] += 1
+        reader = _object_readers.pop(key, None)
+    # A running cat-file process may not notice the new refs.
+    if reader is not None:
+        reader.close()
+
+
+_OBJECT_TYPES = frozenset(['commit', 'tree', 'blob', 'tag'])
+
+
+class ObjectReaderClosed(RuntimeError):
+    "Raised when using an ObjectReader that has been closed."
+
+
+class ObjectReader(object):
+    """Look up objects in a local clone through one git cat-file process.
+
+    The process is started on the first lookup and kept running, so
+    many objects can be resolved without starting a git command for
+    each one. Once the reader is closed it raises ObjectReaderClosed
+    instead of starting a new process, so callers should get a new
+    reader from get_object_reader().
+    """
+
+    # The number of lookups written before reading the answers, to
+    # keep the pipes from filling up.
+    _CHUNK_SIZE = 100
+
+    def __init__(self, workdir, repo):
+        self._path = os.path.join(workdir, repo)
+        self._lock = threading.Lock()
+        self._proc = None
+        self._contents_proc = None
+        self._closed = False
+
+    def _start(self):
+        LOG.debug('starting git cat-file in %s', self._path)
+        self._proc = subprocess.Popen(
+            ['git', 'cat-file',
+             '--batch-check=%(objectname) %(objecttype)'],
+            cwd=self._path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._stop()
+
+    def _check_open(self):
+        # Must be called with the lock held.
+        if self._closed:
+            raise ObjectReaderClosed(
+                'the object reader for {} is closed'.format(self._path))
+
+    def _stop(self):
+        for proc in (self._proc, self._contents_proc):
+            if proc is not None:
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+                proc.wait()
+        self._proc = None
+        self._contents_proc = None
+
+    def lookup(self, ref):
+        """Return a tuple with the SHA and type of the object ref names.
+
+        Returns None if ref does not name an object.
+        """
+        return self.lookup_many([ref])[0]
+
+    def lookup_many(self, refs):
+        "Return the results of lookup() for each of the refs, in order."
+        refs = [str(r) for r in refs]
+        results = [None] * len(refs)
+        # Names with whitespace cannot be passed through the pipe, and
+        # cannot be valid refs anyway.
+        queries = [
+            (i, r) for i, r in enumerate(refs)
+            if r and not any(c.isspace() for c in r)
+        ]
+        with self._lock:
+            self._check_open()
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+            for start in range(0, len(queries), self._CHUNK_SIZE):
+                chunk = queries[start:start + self._CHUNK_SIZE]
+                try:
+                    self._proc.stdin.write(
+                        ''.join(r + '\n' for _, r in chunk).encode('utf-8'))
+                    self._proc.stdin.flush()
+                    for i, r in chunk:
+                        line = self._proc.stdout.readline()
+                        if not line:
+                            raise OSError('git cat-file exited')
+                        results[i] = self._parse(line.decode('utf-8'))
+                except OSError:
+                    self._stop()
+                    raise
+        return results
+
+    def read(self, ref, path=''):
+        """Return a tuple with the SHA, type and content of ref:path.
+
+        The path is relative to the top of the repository, and an
+        empty path names the top directory itself. Returns None if
+        there is no such object.
+        """
+        name = '{}:{}'.format(ref, path)
+        if '\n' in name:
+            return None
+        with self._lock:
+            self._check_open()
+            proc = self._contents_proc
+            if proc is None or proc.poll() is not None:
+                LOG.debug('starting git cat-file --batch in %s', self._path)
+                proc = self._contents_proc = subprocess.Popen(
+                    ['git', 'cat-file', '--batch'],
+                    cwd=self._path,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+            try:
+                proc.stdin.write((name + '\n').encode('utf-8'))
+                proc.stdin.flush()
+                line = proc.stdout.readline()
+                if not line:
+                    raise OSError('git cat-file exited')
+                # Found objects are reported as "<sha> <type> <size>"
+                # followed by the content and a newline.
+                parts = line.decode('utf-8').split()
+                if len(parts) != 3 or parts[1] not in _OBJECT_TYPES:
+                    return None
+                content = proc.stdout.read(int(parts[2]))
+                proc.stdout.read(1)
+            except OSError:
+                self._stop()
+                raise
+        return (parts[0], parts[1], content)
+
+    @staticmethod
+    def _parse(line):
+        # Found objects are reported as "<sha> <type>", others as
+        # "<name> missing" or "<name> ambiguous".
+        parts = line.split()
+        if len(parts) != 2 or parts[1] not in _OBJECT_TYPES:
+            return None
+        return (parts[0], parts[1])
+
+
+_object_readers = {}
+
+
+def get_object_reader(workdir, repo):
+    "Return the ObjectReader for a local clone."
+    key = os.path.abspath(os.path.join(workdir, repo))
+    with _ref_snapshots_lock:
+        if key not in _object_readers:
+            _object_readers[key] = ObjectReader(workdir, repo)
+        return _object_readers[key]
+
+
+def _use_object_reader(workdir, repo, func):
+    """Return the result of calling func with the clone's ObjectReader.
+
+    The reader is closed when the refs of the clone change, which can
+    happen in another thread after it was looked up, so get the new
+    reader and try again.
+    """
+    while True:
+        try:
+            return func(get_object_reader(workdir, repo))
+        except ObjectReaderClosed:
+            LOG.debug('object reader for %s closed, retrying', repo)
+
+
+@atexit.register
+def _close_object_readers():
+    with _ref_snapshots_lock:
+        readers = list(_object_readers.values())
+        _object_readers.clear()
+    for reader in readers:
+        reader.close()
+
+
+def _parse_tree(sha, content):
+    "Return a list of (name, is_dir) tuples for the raw tree content."
+    # Each entry is "<mode> <name>\0" followed by the binary SHA.
+    sha_len = len(sha) // 2
+    entries = []
+    pos = 0
+    while pos < len(content):
+        space = content.index(b' ', pos)
+        nul = content.index(b'\0', space)
+        name = content[space + 1:nul].decode('utf-8', 'surrogateescape')
+        entries.append((name, content[pos:space] == b'40000'))
+        pos = nul + 1 + sha_len
+    return entries
+
+
+def read_file(workdir, repo, filename, ref=None):
+    """Return the text of a file in the repository.
+
+    If ref is given the file is read from the git history, without
+    touching the working tree, so any number of refs can be read
+    without checking them out. Otherwise the file is read from the
+    working tree.
+
+    Raises FileNotFoundError if there is no such file.
+    """
+    if ref is None:
+        with open(os.path.join(workdir, repo, filename),
+                  'r', encoding='utf-8') as f:
+            return f.read()
+    obj = _use_object_reader(
+        workdir, repo, lambda reader: reader.read(ref, filename))
+    if obj is None or obj[1] != 'blob':
+        raise FileNotFoundError(
+            'No file {} in {} at {}'.format(filename, repo, ref))
+    return obj[2].decode('utf-8')
+
+
+def list_dir(workdir, repo, dirname='', ref=None):
+    """Return a sorted list of (name, is_dir) tuples for a directory.
+
+    The ref is used the same way as by read_file(). Raises
+    FileNotFoundError if there is no such directory.
+    """
+    if ref is None:
+        path = os.path.join(workdir, repo, dirname)
+        return sorted(
+            (name, os.path.isdir(os.path.join(path, name)))
+            for name in os.listdir(path)
+        )
+    obj = _use_object_reader(
+        workdir, repo, lambda reader: reader.read(ref, dirname))
+    if obj is None or obj[1] != 'tree':
+        raise FileNotFoundError(
+            'No directory {} in {} at {}'.format(dirname, repo, ref))
+    return sorted(_parse_tree(obj[0], obj[2]))
+
+
+def path_exists(workdir, repo, path, ref=None):
+    """Return boolean indicating whether the path exists in the repository.
+
+    The ref is used the same way as by read_file().
+    """
+    if ref is None:
+        return os.path.exists(os.path.join(workdir, repo, path))
+    try:
+        found = _use_object_reader(
+            workdir, repo,
+            lambda reader: reader.lookup('{}:{}'.format(ref, path)))
+        return found is not None
+    except OSError:
+        # The repository has not been cloned.
+        return False
+
+
+def _get_local_tag_sha(workdir, repo, name):
+    "Return the commit the tag points to in the local clone, or None."
+    try:
+        return get_refs(workdir, repo).tags.get(name)
+    except (processutils.CalledProcessError, OSError):
+        return None
+
+
+def _get_tag_sha(facts, repo, ref):
+    if facts is None or (repo, ref) in _local_tags:
+        return None
+    return facts.get('tag', ref)
+
+
+def _is_merged_upstream(workdir, repo, sha):
+    "Return whether a branch fetched from the upstream remote has sha."
+    try:
+        output = processutils.check_output(
+            ['git', 'for-each-ref', '--count=1', '--contains', sha,
+             '--format=%(refname)', 'refs/remotes/origin/'],
+            cwd=os.path.join(workdir, repo),
+        )
+    except (processutils.CalledProcessError, OSError):
+        return False
+    return bool(output.strip())
+
+
 def commit_exists(workdir, repo, ref):
     """Return boolean specifying whether the reference exists in the repository.
 
     The commit must have been merged into the repository, but this
     check does not enforce any branch membership.
     """
-    try:
-        processutils.check_output(
-            ['git', 'show', ref],
-            cwd=os.path.join(workdir, repo),
-        ).decode('utf-8')
-    except processutils.CalledProcessError as err:
-        LOG.error('Could not find {}: {}'.format(ref, err))
+    facts = _get_facts(repo)
+    if facts is not None:
+        if _is_sha(ref) and facts.get('exists', ref):
+            return True
+        if _get_tag_sha(facts, repo, ref):
+            return True
+    if _get_local_tag_sha(workdir, repo, ref):
+        return True
+    if _use_object_reader(
+            workdir, repo, lambda reader: reader.lookup(ref)) is None:
+        LOG.error('Could not find {}'.format(ref))
         return False
+    # The clone may hold changes that have not merged, such as the
+    # speculative state prepared by zuul, so only remember commits
+    # that are on an upstream branch.
+    if (facts is not None and _is_sha(ref) and
+            _is_merged_upstream(workdir, repo, ref)):
+        facts.set(True, 'exists', ref)
     return True
 
 
-def tag_exists(repo, ref):
+def tag_url(repo, ref):
+    "Return the URL used by tag_exists() to look for the tag."
+    return GIT_TAG_TEMPLATE % (repo, ref)
+
+
+def tag_exists(repo, ref, link_checker=None):
     """Return boolean specifying whether the reference exists in the repository.
 
     Uses a cgit query instead of looking locally to avoid cloning a
     repository or having Depends-On settings in a commit message allow
     someone to fool the check.
+
+    :param link_checker: Optional links.LinkChecker used for the query.
     """
-    url = GIT_TAG_TEMPLATE % (repo, ref)
+    url = tag_url(repo, ref)
+    if link_checker is not None:
+        return link_checker.exists(url)
     return links.link_exists(url)
 
 
@@ -114,32 +602,168 @@ def ensure_basic_git_config(workdir, repo, settings):
             )
 
 
-def clone_repo(workdir, repo, ref=None, branch=None):
-    "Check out the code."
-    LOG.debug('Checking out repository {} to {}'.format(
-        repo, branch or ref or 'master'))
+def get_mirror_root():
+    "Return the directory holding the local mirrors."
+    return cache.get_cache_dir('git-mirrors')
+
+
+def _use_mirrors():
+    # An existing zuul cache is used directly by clone_repo.sh.
+    return cache.enabled() and not os.environ.get('ZUUL_CACHE_DIR')
+
+
+def _get_mirror_dir(root, repo):
+    return os.path.join(root, _MIRROR_HOST, repo)
+
+
+def update_mirror(root, repo, upstream=MIRROR_UPSTREAM):
+    """Create or update the local bare mirror of a repository.
+
+    Only the branches and tags are mirrored. Creating a new mirror may
+    remove the least recently used ones to keep the total size below
+    the limit.
+
+    :param root: The directory holding the mirrors.
+    :param repo: The full repository name, such as "openstack/nova".
+    :param upstream: The server URL to mirror from.
+    :returns: Boolean indicating whether the mirror can be used.
+    """
+    dest = _get_mirror_dir(root, repo)
+    created = False
+    with cache.lock(dest):
+        if os.path.isdir(dest):
+            LOG.debug('Updating mirror of %s in %s', repo, dest)
+            try:
+                processutils.check_call(
+                    ['git', 'fetch', '--prune', '--tags', 'origin'],
+                    cwd=dest,
+                )
+            except processutils.CalledProcessError as err:
+                # A stale mirror is still a good place to start.
+                LOG.warning('Could not update mirror of %s: %s', repo, err)
+        else:
+            LOG.debug('Creating mirror of %s in %s', repo, dest)
+            tmpdir = tempfile.mkdtemp(
+                dir=os.path.dirname(dest), prefix='.tmp-')
+            try:
+                processutils.check_call(
+                    ['git', 'clone', '--bare',
+                     '{}/{}'.format(upstream, repo), tmpdir],
+                )
+                for refspec in ['+refs/heads/*:refs/heads/*',
+                                '+refs/tags/*:refs/tags/*']:
+                    processutils.check_call(
+                        ['git', 'config', '--add', 'remote.origin.fetch',
+                         refspec],
+                        cwd=tmpdir,
+                    )
+                os.rename(tmpdir, dest)
+                created = True
+            except processutils.CalledProcessError as err:
+                LOG.warning('Could not create mirror of %s: %s', repo, err)
+                shutil.rmtree(tmpdir, True)
+                return False
+        os.utime(dest)
+    if created:
+        prune_mirrors(root, get_mirror_max_size())
+    return True
+
+
+def get_mirror_max_size():
+    "Return the maximum total size of the mirrors, in bytes."
+    try:
+        megabytes = int(os.environ.get(MIRROR_MAX_SIZE_ENV) or
+                        MIRROR_DEFAULT_MAX_SIZE)
+    except ValueError:
+        megabytes = MIRROR_DEFAULT_MAX_SIZE
+    return megabytes * 1024 * 1024
+
+
+def prune_mirrors(root, max_size):
+    """Remove the least recently used mirrors above a total size.
+
+    Mirrors in use by another process are skipped.
+
+    :param root: The directory holding the mirrors.
+    :param max_size: The maximum total size, in bytes.
+    """
+    mirrors = []
+    for dirpath, dirnames, filenames in os.walk(
+            os.path.join(root, _MIRROR_HOST)):
+        # Ignore mirrors still being created.
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        if 'HEAD' in filenames and 'objects' in dirnames:
+            dirnames[:] = []
+            mirrors.append((os.stat(dirpath).st_mtime, dirpath,
+                            cache.get_dir_size(dirpath)))
+    total = sum(size for _, _, size in mirrors)
+    for _, path, size in sorted(mirrors):
+        if total <= max_size:
+            break
+        try:
+            with cache.lock(path, blocking=False):
+                LOG.debug('Removing mirror %s', path)
+                shutil.rmtree(path, True)
+        except BlockingIOError:
+            LOG.debug('Not removing mirror %s, it is in use', path)
+            continue
+        total -= size
+
+
+def clone_repo(workdir, repo, ref=None, branch=None, mode=CLONE_FULL):
+    """Check out the code.
+
+    :param mode: One of the CLONE_* values, saying how much of the
+      repository the caller needs.
+    """
+    if mode not in CLONE_MODES:
+        raise ValueError('unknown clone mode {!r}'.format(mode))
+    LOG.debug('Checking out repository {} to {} ({})'.format(
+        repo, branch or ref or 'master', mode))
     cmd = [
         './tools/clone_repo.sh',
         '--workspace', workdir,
     ]
+    if mode != CLONE_FULL:
+        cmd.extend(['--mode', mode])
+    mirror_root = None
+    if _use_mirrors():
+        # Keep a local mirror up to date so the clone only has to
+        # fetch what changed since the mirror was updated.
+        mirror_root = get_mirror_root()
+        if update_mirror(mirror_root, repo):
+            cmd.extend(['--cache-dir', mirror_root])
+        else:
+            mirror_root = None
     if ref:
         cmd.extend(['--ref', ref])
     if branch:
         cmd.extend(['--branch', branch])
     cmd.append(repo)
-    processutils.check_call(cmd)
+    try:
+        if mirror_root:
+            mirror_dir = _get_mirror_dir(mirror_root, repo)
+            with cache.lock(mirror_dir, exclusive=False):
+                processutils.check_call(cmd)
+                if os.path.isdir(mirror_dir):
+                    os.utime(mirror_dir)
+        else:
+            processutils.check_call(cmd)
+    finally:
+        # The clone script fetches new refs into an existing clone.
+        _forget_refs(workdir, repo)
     dest = os.path.join(workdir, repo)
     return dest
 
 
-def safe_clone_repo(workdir, repo, ref, messages):
+def safe_clone_repo(workdir, repo, ref, messages, mode=CLONE_FULL):
     """Clone a git repo and report success or failure.
 
     Ensure we have a local copy of the repository so we can scan for values
     that are more difficult to get remotely.
     """
     try:
-        clone_repo(workdir, repo, ref)
+        clone_repo(workdir, repo, ref, mode=mode)
     except Exception as err:
         messages.error(
             'Could not clone repository %s at %s: %s' % (
@@ -148,8 +772,48 @@ def safe_clone_repo(workdir, repo, ref, messages):
     return True
 
 
+def safe_clone_repos(workdir, repos, ref, messages, max_workers=4,
+                     mode=CLONE_FULL):
+    """Clone several git repos in parallel and report any failures.
+
+    Errors are reported through messages in the order the repos were
+    given, regardless of which clone finishes first.
+
+    :param workdir: The working directory for the local clones.
+    :param repos: A sequence of repo names.
+    :param ref: The git reference to check out in each repo.
+    :param messages: The object used to report errors.
+    :param max_workers: The maximum number of clones to run at once.
+    :param mode: One of the CLONE_* values, used for every repo.
+    :returns: Boolean indicating whether all of the clones worked.
+    """
+    repos = list(repos)
+    if not repos:
+        return True
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(max_workers, len(repos))) as executor:
+        # Run each clone in a copy of the caller's context so anything
+        # tied to it, such as where output is captured, still applies.
+        futures = [
+            executor.submit(contextvars.copy_context().run,
+                            clone_repo, workdir, repo, ref, mode=mode)
+            for repo in repos
+        ]
+    ok = True
+    for repo, future in zip(repos, futures):
+        err = future.exception()
+        if err is not None:
+            messages.error(
+                'Could not clone repository %s at %s: %s' % (
+                    repo, ref, err))
+            ok = False
+    return ok
+
+
 def checkout_ref(workdir, repo, ref, messages=None):
     """Checkout a specific ref in the repo."""
+    # Checking out a remote branch creates a local one.
+    _forget_refs(workdir, repo)
 
     LOG.debug('Resetting the repository %s to HEAD', repo)
     # Reset the repo to HEAD just in case any ot the previous steps
@@ -179,21 +843,179 @@ def checkout_ref(workdir, repo, ref, messages=None):
     return True
 
 
+# The number of unused worktrees a WorktreePool keeps for reuse.
+WORKTREE_POOL_SIZE = 8
+
+
+class _Worktree(object):
+
+    def __init__(self, root):
+        # The directory to use in place of the workdir. The worktree
+        # itself is below it, under the repo name.
+        self.root = root
+        self.users = 0
+        self.created = False
+        self.lock = threading.Lock()
+
+
+class WorktreePool(object):
+    """Check out refs of the clones in a workdir as separate worktrees.
+
+    The worktrees share the object store of the clone, so callers can
+    read or build files at several refs at the same time without
+    touching the main working tree or each other. Worktrees are kept
+    for reuse by later callers asking for the same ref, and the least
+    recently used ones are removed when there are more than max_size
+    that are not in use.
+
+    Callers may leave build output in a worktree, but must not change
+    the files that are checked out.
+    """
+
+    def __init__(self, workdir, max_size=WORKTREE_POOL_SIZE):
+        self.workdir = workdir
+        self.max_size = max_size
+        self._root = os.path.join(workdir, '.worktrees')
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._repo_locks = collections.defaultdict(threading.Lock)
+        self._entries = collections.OrderedDict()
+
+    def _git(self, repo, *args):
+        # Adding and removing worktrees updates the metadata in the
+        # clone, so only do one at a time for each repo.
+        with self._lock:
+            repo_lock = self._repo_locks[repo]
+        with repo_lock:
+            processutils.check_call(
+                ['git'] + list(args),
+                cwd=os.path.join(self.workdir, repo),
+            )
+
+    def acquire(self, repo, ref):
+        """Return a workdir with repo checked out at ref.
+
+        The caller must pass the same values to release() when it is
+        done with the files.
+        """
+        key = (repo, ref)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Worktree(
+                    os.path.join(self._root, str(next(self._counter))))
+                self._entries[key] = entry
+            else:
+                self._entries.move_to_end(key)
+            entry.users += 1
+        with entry.lock:
+            if not entry.created:
+                LOG.debug('adding worktree for %s at %s in %s',
+                          repo, ref, entry.root)
+                try:
+                    self._git(repo, 'worktree', 'add', '--detach',
+                              os.path.join(entry.root, repo), ref)
+                except Exception:
+                    with self._lock:
+                        entry.users -= 1
+                        # Anyone else waiting for the entry will try
+                        # to create it again.
+                        if not entry.users:
+                            del self._entries[key]
+                    raise
+                entry.created = True
+        return entry.root
+
+    def release(self, repo, ref):
+        "Give back a worktree returned by acquire()."
+        with self._lock:
+            self._entries[(repo, ref)].users -= 1
+            unused = [
+                (key, entry)
+                for key, entry in self._entries.items()
+                if not entry.users
+            ]
+            to_remove = unused[:max(0, len(unused) - self.max_size)]
+            for key, entry in to_remove:
+                del self._entries[key]
+        for (repo, ref), entry in to_remove:
+            self._remove(repo, entry)
+
+    @contextlib.contextmanager
+    def checkout(self, repo, ref):
+        "Context manager giving a workdir with repo checked out at ref."
+        root = self.acquire(repo, ref)
+        try:
+            yield root
+        finally:
+            self.release(repo, ref)
+
+    def _remove(self, repo, entry):
+        LOG.debug('removing worktree for %s in %s', repo, entry.root)
+        _forget_refs(entry.root, repo)
+        if entry.created:
+            try:
+                self._git(repo, 'worktree', 'remove', '--force',
+                          os.path.join(entry.root, repo))
+            except processutils.CalledProcessError as err:
+                LOG.debug('could not remove worktree: %s', err)
+        shutil.rmtree(entry.root, True)
+
+    def close(self):
+        "Remove all of the worktrees that are not in use."
+        with self._lock:
+            to_remove = [
+                (key, entry)
+                for key, entry in self._entries.items()
+                if not entry.users
+            ]
+            for key, entry in to_remove:
+                del self._entries[key]
+        for (repo, ref), entry in to_remove:
+            self._remove(repo, entry)
+
+
+_worktree_pools = {}
+_worktree_pools_lock = threading.Lock()
+
+
+def get_worktree_pool(workdir):
+    "Return the WorktreePool for the clones in workdir."
+    key = os.path.abspath(workdir)
+    with _worktree_pools_lock:
+        if key not in _worktree_pools:
+            _worktree_pools[key] = WorktreePool(workdir)
+        return _worktree_pools[key]
+
+
+def close_worktree_pool(workdir):
+    "Remove the worktrees made for the clones in workdir."
+    with _worktree_pools_lock:
+        pool = _worktree_pools.pop(os.path.abspath(workdir), None)
+    if pool is not None:
+        pool.close()
+
+
 def sha_for_tag(workdir, repo, version):
     """Return the SHA for a given tag"""
-    # git log 2.3.11 -n 1 --pretty=format:%H
-    try:
-        actual_sha = processutils.check_output(
-            ['git', 'log', str(version), '-n', '1', '--pretty=format:%H'],
-            cwd=os.path.join(workdir, repo),
-            stderr=subprocess.STDOUT,
-        ).decode('utf-8')
-        actual_sha = actual_sha.strip()
-    except processutils.CalledProcessError as e:
-        LOG.info('ERROR getting SHA for tag %r: %s [%s]',
-                 version, e, e.output.strip())
-        actual_sha = ''
-    return actual_sha
+    facts = _get_facts(repo)
+    cached = _get_tag_sha(facts, repo, str(version))
+    if cached:
+        return cached
+    actual_sha = _get_local_tag_sha(workdir, repo, str(version))
+    if actual_sha:
+        # Release tags never move once they are published, but branch
+        # names and other refs do, so only remember the tags.
+        if facts is not None and (repo, str(version)) not in _local_tags:
+            facts.set(actual_sha, 'tag', str(version))
+        return actual_sha
+    found = _use_object_reader(
+        workdir, repo,
+        lambda reader: reader.lookup('{}^{{commit}}'.format(version)))
+    if found is None:
+        LOG.info('ERROR getting SHA for tag %r: no such commit', version)
+        return ''
+    return found[0]
 
 
 def _filter_branches(output):
@@ -216,15 +1038,10 @@ def branch_exists(workdir, repo, prefix, identifier):
     """
     remote_match = 'remotes/origin/{}/{}'.format(prefix, identifier)
     try:
-        containing_branches = _filter_branches(
-            processutils.check_output(
-                ['git', 'branch', '-a'],
-                cwd=os.path.join(workdir, repo),
-            ).decode('utf-8')
-        )
+        all_branches = get_refs(workdir, repo).branches
         LOG.debug('looking for %s', remote_match)
-        LOG.debug('found branches: %s', containing_branches)
-        return (remote_match in containing_branches)
+        LOG.debug('found branches: %s', list(all_branches))
+        return (remote_match in all_branches)
     except processutils.CalledProcessError as e:
         LOG.error('failed checking for branch: %s [%s]', e, e.output.strip())
         return False
@@ -290,12 +1107,7 @@ def check_branch_sha(workdir, repo, series, sha):
         # that hasn't branched, yet, and is releasing from master for
         # that series. Allow the release, as long as it is on the
         # master branch.
-        all_branches = _filter_branches(
-            processutils.check_output(
-                ['git', 'branch', '-a'],
-                cwd=os.path.join(workdir, repo),
-            ).decode('utf-8')
-        )
+        all_branches = get_refs(workdir, repo).branches
         if remote_match not in all_branches:
             if 'master' in containing_branches:
                 LOG.debug('did not find %s but SHA is on master',
@@ -318,16 +1130,30 @@ def check_branch_sha(workdir, repo, series, sha):
 
 def check_ancestry(workdir, repo, old_version, sha):
     "Check if the SHA is in the ancestry of the previous version."
+    facts = _get_facts(repo)
+    key = None
+    if facts is not None and _is_sha(sha):
+        old_sha = old_version
+        if not _is_sha(old_sha):
+            old_sha = sha_for_tag(workdir, repo, old_version)
+        if _is_sha(old_sha):
+            key = ('ancestry', old_sha, sha)
+            cached = facts.get(*key)
+            if cached is not None:
+                return cached
     try:
         ancestors = processutils.check_output(
             ['git', 'log', '--oneline', '--ancestry-path',
              '%s..%s' % (old_version, sha)],
             cwd=os.path.join(workdir, repo),
         ).decode('utf-8').strip()
-        return bool(ancestors)
     except processutils.CalledProcessError as e:
         LOG.error('failed checking ancestry: %s [%s]' % (e, e.output.strip()))
         return False
+    result = bool(ancestors)
+    if key is not None:
+        facts.set(result, *key)
+    return result
 
 
 def get_head(workdir, repo):
@@ -363,7 +1189,16 @@ def get_latest_tag(workdir, repo, sha=None, always=True):
         return None
 
 
+def _forget_tag(workdir, repo, tag):
+    _forget_refs(workdir, repo)
+    _local_tags.add((repo, tag))
+    facts = _get_facts(repo)
+    if facts is not None:
+        facts.discard('tag', tag)
+
+
 def add_tag(workdir, repo, tag, sha):
+    _forget_tag(workdir, repo, tag)
     cmd = ['git', 'tag', '-m', 'temporary tag', tag, sha]
     try:
         LOG.info(' '.join(cmd))
@@ -379,6 +1214,7 @@ def add_tag(workdir, repo, tag, sha):
 
 
 def delete_tag(workdir, repo, tag):
+    _forget_tag(workdir, repo, tag)
     cmd = ['git', 'tag', '-d', tag]
     try:
         LOG.info(' '.join(cmd))
@@ -395,31 +1231,12 @@ def delete_tag(workdir, repo, tag):
 
 def get_branches(workdir, repo):
     try:
-        output = processutils.check_output(
-            ['git', 'branch', '-a'],
-            cwd=os.path.join(workdir, repo),
-            stderr=subprocess.STDOUT,
-        ).decode('utf-8').strip()
-        # Example output:
-        # * (no branch)
+        # Example results:
         #   master
         #   stable/mitaka
-        #   stable/newton
-        #   stable/ocata
-        #   remotes/origin/HEAD -> origin/master
         #   remotes/origin/master
         #   remotes/origin/stable/mitaka
-        #   remotes/origin/stable/newton
-        #   remotes/origin/stable/ocata
-        results = []
-        for line in output.splitlines():
-            branch = line.strip().lstrip('*').strip()
-            if branch.startswith('('):
-                continue
-            if '->' in branch:
-                continue
-            results.append(branch)
-        return results
+        return list(get_refs(workdir, repo).branches)
     except processutils.CalledProcessError as e:
         LOG.error('failed to retrieve list of branches: %s [%s]',
                   e, e.output.strip())
@@ -450,6 +1267,21 @@ def get_branch_base(workdir, repo, branch):
     # http://stackoverflow.com/questions/1527234/finding-a-branch-point-with-git
     # git rev-list $(git rev-list --first-parent ^origin/stable/newton master | tail -n1)^^!
     #
+    # The branch point cannot change without the branch changing, so
+    # look for an answer based on the commit at the end of the branch.
+    facts = _get_facts(repo)
+    key = None
+    if facts is not None:
+        try:
+            tip = get_refs(workdir, repo).branches.get(
+                'remotes/origin/{}'.format(branch))
+        except (processutils.CalledProcessError, OSError):
+            tip = None
+        if tip:
+            key = ('branch-base', tip)
+            cached = facts.get(*key)
+            if cached:
+                return cached
     # Determine the first parent.
     cmd = [
         'git',
@@ -480,7 +1312,7 @@ def get_branch_base(workdir, repo, branch):
         '{}^^!'.format(parent),
     ]
     try:
-        return processutils.check_output(
+        base = processutils.check_output(
             cmd,
             cwd=os.path.join(workdir, repo),
             stderr=subprocess.STDOUT,
@@ -489,3 +1321,6 @@ def get_branch_base(workdir, repo, branch):
         LOG.warning('failed to retrieve branch base: %s [%s]',
                     e, e.output.strip())
         return None
+    if key is not None and _is_sha(base):
+        facts.set(base, *key)
+    return base
@@ -0,0 +1,179 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Load the governance data, keeping a copy between runs.
+"""
+
+import copy
+import logging
+import os
+import os.path
+import threading
+import time
+
+from openstack_governance import governance
+
+from openstack_releases import cache
+from openstack_releases import httputils
+from openstack_releases import yamlutils
+
+LOG = logging.getLogger(__name__)
+
+# Set to any non-empty value to use the saved governance data, however
+# old it is, instead of downloading it.
+OFFLINE_ENV = 'OPENSTACK_RELEASES_GOVERNANCE_OFFLINE'
+# The number of seconds to use the saved governance data before
+# downloading it again.
+GOVERNANCE_TTL = 60 * 60
+_SNAPSHOT_VERSION = 1
+
+# The files read from the governance repository.
+_GOVERNANCE_FILES = [
+    'reference/projects.yaml',
+    'reference/technical-committee-repos.yaml',
+    'reference/sigs-repos.yaml',
+]
+
+_governance = None
+_governance_lock = threading.Lock()
+
+
+class IndexedGovernance(governance.Governance):
+    """Governance data with lookups by team, deliverable and repository.
+
+    The base class searches through all of the teams for each lookup,
+    so the answers are indexed once when the data is loaded.
+    """
+
+    def __init__(self, team_data, tc_data, sigs_data):
+        super().__init__(team_data, tc_data, sigs_data)
+        self._teams_by_name = {}
+        self._repos_by_deliverable = {}
+        self._repos_by_name = {}
+        for team in self._teams:
+            self._teams_by_name.setdefault(team.name, team)
+            for dname, deliv in team.deliverables.items():
+                for repo in deliv.repositories.values():
+                    self._repos_by_deliverable.setdefault(
+                        dname, []).append(repo)
+                    self._repos_by_name.setdefault(repo.name, repo)
+
+    def get_team(self, name):
+        try:
+            return self._teams_by_name[name]
+        except KeyError:
+            raise ValueError('No team {!r} found'.format(name))
+
+    def get_repository(self, repo_name):
+        """Return the governance Repository for a repository name.
+
+        The team and deliverable are available through the result's
+        deliverable attribute. Returns None if the repository is not
+        in the governance data.
+        """
+        return self._repos_by_name.get(repo_name)
+
+    def get_repo_owner(self, repo_name):
+        repo = self.get_repository(repo_name)
+        if repo is None:
+            raise ValueError(
+                'Repository %s not found in governance list' % repo_name)
+        return repo.deliverable.team.name
+
+    def get_repositories(self, team_name=None, deliverable_name=None):
+        if deliverable_name and not team_name:
+            return iter(self._repos_by_deliverable.get(deliverable_name, []))
+        return super().get_repositories(team_name, deliverable_name)
+
+
+def _get_cache_file():
+    return os.path.join(
+        cache.get_cache_dir('governance'),
+        'snapshot-{}.pickle'.format(_SNAPSHOT_VERSION),
+    )
+
+
+def _fetch_snapshot():
+    data = {}
+    for filename in _GOVERNANCE_FILES:
+        url = governance.REPO_URL_BASE + '/' + filename
+        LOG.debug('fetching governance data from %s', url)
+        r = httputils.get(url)
+        r.raise_for_status()
+        data[filename] = yamlutils.safe_loads(r.text)
+    return {'fetched': time.time(), 'data': data}
+
+
+def _load_snapshot(offline):
+    snapshot = None
+    if cache.enabled():
+        snapshot = cache.load_pickle(_get_cache_file())
+    if offline:
+        if snapshot is None:
+            raise RuntimeError(
+                'No saved governance data to use while {} is set'.format(
+                    OFFLINE_ENV))
+        return snapshot
+    if (snapshot is not None and
+            time.time() - snapshot['fetched'] < GOVERNANCE_TTL):
+        return snapshot
+    try:
+        new_snapshot = _fetch_snapshot()
+    except Exception as err:
+        if snapshot is None:
+            raise
+        LOG.warning('could not refresh governance data (%s), '
+                    'using the saved copy', err)
+        return snapshot
+    if cache.enabled():
+        try:
+            cache.save_pickle(_get_cache_file(), new_snapshot)
+        except OSError as err:
+            LOG.debug('could not save governance data: %s', err)
+    return new_snapshot
+
+
+def get_governance(offline=None):
+    """Return an IndexedGovernance with the current governance data.
+
+    The data is kept in the cache and downloaded again when it is
+    older than GOVERNANCE_TTL seconds. If the download fails, the
+    saved copy is used anyway. The result is shared by everything in
+    the process, so callers must not modify it.
+
+    :param offline: Boolean indicating whether to only use the saved
+      copy. Defaults to whether OPENSTACK_RELEASES_GOVERNANCE_OFFLINE
+      is set.
+
+    """
+    global _governance
+    if offline is None:
+        offline = bool(os.environ.get(OFFLINE_ENV))
+    with _governance_lock:
+        if _governance is None:
+            snapshot = _load_snapshot(offline)
+            # Governance adds the TC and SIG teams to the team data,
+            # so give it a copy to keep the snapshot unchanged.
+            data = copy.deepcopy(snapshot['data'])
+            _governance = IndexedGovernance(
+                *(data[filename] for filename in _GOVERNANCE_FILES))
+        return _governance
+
+
+def load_local_governance(repo_dir):
+    "Return an IndexedGovernance for a local governance checkout."
+    data = []
+    for filename in _GOVERNANCE_FILES:
+        with open(os.path.join(repo_dir, filename), 'r',
+                  encoding='utf-8') as f:
+            data.append(yamlutils.safe_loads(f.read()))
+    return IndexedGovernance(*data)
@@ -18,7 +18,7 @@
 
 import logging
 
-import requests
+from openstack_releases import httputils
 
 
 LOG = logging.getLogger(__name__)
@@ -37,7 +37,7 @@ def _query(q, **kwds):
     headers = {
         'Content-Type': 'application/json',
     }
-    response = requests.get(_URL, params=params, headers=headers)
+    response = httputils.get(_URL, params=params, headers=headers)
     return response.json()['Results']
 
 
@@ -0,0 +1,131 @@
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A shared HTTP session for talking to remote services.
+
+Using one session lets the connections to a host be kept open and
+reused, and gives every request the same retry and timeout policy.
+"""
+
+import logging
+import os
+import threading
+
+import requests
+from requests import adapters
+from requests.packages import urllib3
+
+LOG = logging.getLogger(__name__)
+
+# Set to the number of seconds to wait for a server to respond.
+TIMEOUT_ENV = 'OPENSTACK_RELEASES_HTTP_TIMEOUT'
+# Set to the number of times to retry a failed request.
+RETRIES_ENV = 'OPENSTACK_RELEASES_HTTP_RETRIES'
+# Set to the backoff factor, in seconds, used between retries.
+BACKOFF_ENV = 'OPENSTACK_RELEASES_HTTP_BACKOFF'
+
+DEFAULT_TIMEOUT = 60
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+# Responses that mean the server may answer if we try again later.
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+# The number of connections to keep open for each host.
+_POOL_SIZE = 16
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _get_setting(name, default, convert):
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return convert(value)
+    except ValueError:
+        LOG.warning('ignoring invalid value %r for %s', value, name)
+        return default
+
+
+def get_timeout():
+    "Return the default timeout for requests, in seconds."
+    return _get_setting(TIMEOUT_ENV, DEFAULT_TIMEOUT, float)
+
+
+def make_session(retries=None, backoff=None):
+    """Return a new requests Session with the retry policy applied.
+
+    :param retries: The number of times to retry a failed request.
+      Defaults to the value of OPENSTACK_RELEASES_HTTP_RETRIES or
+      DEFAULT_RETRIES.
+    :param backoff: The backoff factor for the delay between retries.
+      Defaults to the value of OPENSTACK_RELEASES_HTTP_BACKOFF or
+      DEFAULT_BACKOFF.
+    """
+    if retries is None:
+        retries = _get_setting(RETRIES_ENV, DEFAULT_RETRIES, int)
+    if backoff is None:
+        backoff = _get_setting(BACKOFF_ENV, DEFAULT_BACKOFF, float)
+    retry = urllib3.util.Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=_RETRY_STATUSES,
+        # Give the caller the last response instead of an exception
+        # so it can look at the status code as before.
+        raise_on_status=False,
+    )
+    adapter = adapters.HTTPAdapter(
+        max_retries=retry,
+        pool_connections=_POOL_SIZE,
+        pool_maxsize=_POOL_SIZE,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    "Return the Session shared by everything in this process."
+    global _session, _session_pid
+    with _session_lock:
+        # Do not share open connections with a parent process.
+        if _session is None or _session_pid != os.getpid():
+            _session = make_session()
+            _session_pid = os.getpid()
+        return _session
+
+
+def request(method, url, **kwargs):
+    """Send a request using the shared session.
+
+    Takes the same arguments as requests.request(), with the timeout
+    defaulting to the value from get_timeout().
+    """
+    kwargs.setdefault('timeout', get_timeout())
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    "Send a GET request using the shared session."
+    kwargs.setdefault('allow_redirects', True)
+    return request('GET', url, **kwargs)
+
+
+def head(url, **kwargs):
+    "Send a HEAD request using the shared session."
+    kwargs.setdefault('allow_redirects', False)
+    return request('HEAD', url, **kwargs)
@@ -12,17 +12,29 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import concurrent.futures
 import re
+import threading
+import time
+import urllib.parse
+
 import requests
 
+from openstack_releases import httputils
+
 
 def _format_name(name):
     return re.sub(r"[-.]+", "_", name).lower()
 
 
-def link_exists(url):
+def _check_link(url):
+    """Look for url.
+
+    Returns a tuple containing a boolean indicating whether the link
+    exists and the error message if the server could not be reached.
+    """
     try:
-        response = requests.head(
+        response = httputils.head(
             url,
             headers={'user-agent': 'openstack-release-link-checker'},
             allow_redirects=True,
@@ -31,10 +43,98 @@ def link_exists(url):
             (response.status_code // 100 != 2) or
             'Bad object id' in response.text
         )
-    except requests.exceptions.ConnectionError as e:
-        print('Failed to access %s: %s' % (url, e))
-        missing = True
-    return not missing
+    except (requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout) as e:
+        return (False, 'Failed to access %s: %s' % (url, e))
+    return (not missing, None)
+
+
+def link_exists(url):
+    exists, error = _check_link(url)
+    if error:
+        print(error)
+    return exists
+
+
+class _HostLimit(object):
+    "Limit the requests being sent to one host."
+
+    def __init__(self, concurrency, min_interval):
+        self._semaphore = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._min_interval = min_interval
+        self._next_start = 0.0
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._min_interval
+        if start > now:
+            time.sleep(start - now)
+        return self
+
+    def __exit__(self, *args):
+        self._semaphore.release()
+
+
+class LinkChecker(object):
+    """Check whether many links exist, several at a time.
+
+    Links given to add() are checked in the background, with a limit
+    on the total number of requests in flight, the number sent to any
+    one host, and how quickly requests to the same host are started.
+    exists() waits for the result of a single link and prints any
+    error at that point, so the output follows the order in which the
+    caller asks for the results instead of the order the checks finish.
+    """
+
+    def __init__(self, max_workers=8, per_host=4, min_interval=0.0):
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers)
+        self._per_host = per_host
+        self._min_interval = min_interval
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._hosts = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _get_host_limit(self, url):
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = _HostLimit(
+                    self._per_host, self._min_interval)
+            return self._hosts[host]
+
+    def _check(self, url):
+        with self._get_host_limit(url):
+            return _check_link(url)
+
+    def add(self, *urls):
+        "Start checking the urls, if they have not been seen before."
+        with self._lock:
+            for url in urls:
+                if url not in self._futures:
+                    self._futures[url] = self._executor.submit(
+                        self._check, url)
+
+    def exists(self, url):
+        "Return boolean indicating whether the link exists."
+        self.add(url)
+        exists, error = self._futures[url].result()
+        if error:
+            print(error)
+        return exists
 
 
 def tarball_url(version, project):
@@ -13,21 +13,25 @@
 #    under the License.
 
 import json
-import os.path
 
+from openstack_releases import gitutils
 
-def looks_like_a_module(workdir, repo):
-    "Does the directory look like it contains an npm module?"
-    return os.path.exists(os.path.join(workdir, repo, 'package.json'))
 
+def looks_like_a_module(workdir, repo, ref=None):
+    """Does the directory look like it contains an npm module?
 
-def get_metadata(workdir, repo):
+    If ref is given, look at the files at that ref instead of the
+    working tree.
+    """
+    return gitutils.path_exists(workdir, repo, 'package.json', ref)
+
+
+def get_metadata(workdir, repo, ref=None):
     "Load the package.json file from the repo"
-    with open(os.path.join(workdir, repo, 'package.json'), 'r') as f:
-        body = f.read()
+    body = gitutils.read_file(workdir, repo, 'package.json', ref)
     return json.loads(body)
 
 
-def get_version(workdir, repo):
+def get_version(workdir, repo, ref=None):
     "Get the version string from the project metadata."
-    return get_metadata(workdir, repo).get('version')
+    return get_metadata(workdir, repo, ref).get('version')
@@ -13,13 +13,18 @@
 """Work with the project-config repository.
 """
 
+import fnmatch
 import glob
+import hashlib
 import logging
 import os
 import os.path
+import threading
+import time
 
-import requests
-
+from openstack_releases import cache
+from openstack_releases import gitutils
+from openstack_releases import httputils
 from openstack_releases import yamlutils
 
 
@@ -27,6 +32,17 @@ LOG = logging.getLogger()
 
 ZUUL_PROJECTS_URL = 'https://opendev.org/openstack/project-config/raw/branch/master/zuul.d/projects.yaml'  # noqa
 ZUUL_PROJECTS_FILENAME = 'openstack/project-config/zuul.d/projects.yaml'
+# Set to the directory of a local project-config checkout to read the
+# zuul settings from there instead of downloading them.
+PROJECT_CONFIG_DIR_ENV = 'OPENSTACK_RELEASES_PROJECT_CONFIG_DIR'
+# The number of seconds to use the downloaded zuul settings without
+# checking for changes.
+ZUUL_PROJECTS_TTL = 15 * 60
+_ZUUL_PROJECTS_VERSION = 1
+
+# The zuul settings already loaded by this process, by source.
+_zuul_projects = {}
+_zuul_projects_lock = threading.Lock()
 
 # We use this key to modify the data structure read from the zuul
 # layout file. We don't control what are valid keys there, so make it
@@ -34,15 +50,8 @@ ZUUL_PROJECTS_FILENAME = 'openstack/project-config/zuul.d/projects.yaml'
 _VALIDATE_KEY = 'validate-projects-by-name'
 
 
-def get_zuul_project_data(url=ZUUL_PROJECTS_URL):
-    """Return the data from the zuul.d/projects.yaml file.
-
-    :param url: Optional URL to the location of the file. Defaults to
-      the most current version in the public git repository.
-
-    """
-    r = requests.get(url)
-    raw = yamlutils.loads(r.text)
+def _parse_zuul_project_data(body):
+    raw = yamlutils.safe_loads(body) or []
     # Convert the raw list to a mapping from repo name to repo
     # settings, since that is how we access this most often.
     #
@@ -82,10 +91,132 @@ def get_zuul_project_data(url=ZUUL_PROJECTS_URL):
     return {
         p['project']['name']: p['project']
         for p in raw
+        if 'project' in p
     }
 
 
-def read_templates_from_repo(workdir, repo_name):
+def _get_cache_file(source):
+    key = hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(
+        cache.get_cache_dir('project-config'),
+        'zuul-projects-{}-{}.pickle'.format(key, _ZUUL_PROJECTS_VERSION),
+    )
+
+
+def _load_entry(source):
+    with _zuul_projects_lock:
+        entry = _zuul_projects.get(source)
+    if entry is None and cache.enabled():
+        entry = cache.load_pickle(_get_cache_file(source))
+    return entry
+
+
+def _save_entry(source, entry):
+    with _zuul_projects_lock:
+        _zuul_projects[source] = entry
+    if cache.enabled():
+        try:
+            cache.save_pickle(_get_cache_file(source), entry)
+        except OSError as err:
+            LOG.debug('could not save zuul settings for %s: %s', source, err)
+
+
+def _read_local_project_data(filename):
+    st = os.stat(filename)
+    stamp = (st.st_mtime_ns, st.st_size)
+    entry = _load_entry(filename)
+    if entry is not None and entry['stamp'] == stamp:
+        return entry['projects']
+    LOG.debug('reading zuul settings from %s', filename)
+    with open(filename, 'r', encoding='utf-8') as f:
+        projects = _parse_zuul_project_data(f.read())
+    _save_entry(filename, {'stamp': stamp, 'projects': projects})
+    return projects
+
+
+def _fetch_project_data(url):
+    entry = _load_entry(url)
+    if (entry is not None and
+            time.time() - entry['fetched'] < ZUUL_PROJECTS_TTL):
+        return entry['projects']
+    headers = {}
+    if entry is not None:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+    r = httputils.get(url, headers=headers)
+    if entry is not None and r.status_code == 304:
+        LOG.debug('zuul settings at %s have not changed', url)
+        entry = dict(entry, fetched=time.time())
+    elif r.status_code != 200:
+        if entry is None:
+            # Parsing the error page would give an empty set of
+            # projects, so do not save anything.
+            raise RuntimeError(
+                'could not fetch zuul settings from {} ({})'.format(
+                    url, r.status_code))
+        LOG.warning('could not refresh zuul settings from %s (%s), '
+                    'using the saved copy', url, r.status_code)
+        return entry['projects']
+    else:
+        entry = {
+            'fetched': time.time(),
+            'etag': r.headers.get('ETag'),
+            'last_modified': r.headers.get('Last-Modified'),
+            'projects': _parse_zuul_project_data(r.text),
+        }
+    _save_entry(url, entry)
+    return entry['projects']
+
+
+def get_zuul_project_data(url=ZUUL_PROJECTS_URL):
+    """Return the data from the zuul.d/projects.yaml file.
+
+    The parsed settings are cached, so they are only read again when
+    the file changes. A downloaded copy is used for ZUUL_PROJECTS_TTL
+    seconds, and after that the server is asked whether it has
+    changed. If it cannot be downloaded and there is no saved copy,
+    RuntimeError is raised. The result is shared, so callers must not
+    modify it.
+
+    :param url: Optional URL to the location of the file. Defaults to
+      the most current version in the public git repository, or the
+      file in the checkout named by OPENSTACK_RELEASES_PROJECT_CONFIG_DIR
+      if that is set.
+
+    """
+    local_dir = os.environ.get(PROJECT_CONFIG_DIR_ENV)
+    if local_dir and url == ZUUL_PROJECTS_URL:
+        return _read_local_project_data(
+            os.path.join(os.path.abspath(local_dir), 'zuul.d',
+                         'projects.yaml'))
+    return _fetch_project_data(url)
+
+
+def _find_files(workdir, repo_name, pattern, ref):
+    "Return the names of the files in the repo matching the glob pattern."
+    if ref is None:
+        root = os.path.join(workdir, repo_name)
+        return [
+            os.path.relpath(filename, root)
+            for filename in glob.glob(os.path.join(root, pattern))
+        ]
+    dirname, basename = os.path.split(pattern)
+    try:
+        entries = gitutils.list_dir(workdir, repo_name, dirname, ref)
+    except FileNotFoundError:
+        return []
+    return [
+        os.path.join(dirname, name)
+        for name, is_dir in entries
+        # Match the way glob skips hidden files.
+        if not is_dir and not name.startswith('.') and
+        fnmatch.fnmatch(name, basename)
+    ]
+
+
+def read_templates_from_repo(workdir, repo_name, ref=None):
     """Read the zuul settings from a repo and return them.
 
     Read all of the zuul settings from the YAML files, parse them,
@@ -95,9 +226,11 @@ def read_templates_from_repo(workdir, repo_name):
     :type workdir: str
     :param repo_name: Repository name
     :type repo_name: str
+    :param ref: Optional git reference to read the files at, instead
+      of reading them from the working tree
+    :type ref: str
 
     """
-    root = os.path.join(workdir, repo_name)
     candidates = [
         '.zuul.yaml',
         'zuul.yaml',
@@ -108,16 +241,15 @@ def read_templates_from_repo(workdir, repo_name):
     for pattern in candidates:
         LOG.debug('trying {}'.format(pattern))
         if '*' in pattern:
-            filenames = glob.glob(os.path.join(root, pattern))
+            filenames = _find_files(workdir, repo_name, pattern, ref)
             if not filenames:
                 LOG.debug('did not find {}'.format(pattern))
                 continue
         else:
-            filenames = [os.path.join(root, pattern)]
+            filenames = [pattern]
         for filename in filenames:
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    body = f.read()
+                body = gitutils.read_file(workdir, repo_name, filename, ref)
                 results.extend(yamlutils.loads(body))
                 LOG.debug('read {}'.format(pattern))
             except Exception as e:
@@ -180,10 +312,14 @@ _RELEASE_JOBS_FOR_TYPE = {
 }
 
 
-def require_release_jobs_for_repo(deliv, repo, release_type, context):
+def require_release_jobs_for_repo(deliv, repo, release_type, context,
+                                  ref=None):
 
     """Check the repository for release jobs.
 
+    If ref is given, the zuul settings in the repository are read at
+    that ref instead of from the working tree.
+
     Returns a list of tuples containing a message and a boolean
     indicating if the message is an error.
 
@@ -233,7 +369,8 @@ def require_release_jobs_for_repo(deliv, repo, release_type, context):
     if not found_jobs:
         LOG.debug('looking in {} for zuul settings'.format(
             repo.name))
-        templates = read_templates_from_repo(context.workdir, repo.name)
+        templates = read_templates_from_repo(context.workdir, repo.name,
+                                             ref=ref)
         found_jobs.extend(
             j
             for j in templates
@@ -13,26 +13,30 @@
 #    under the License.
 
 import json
-import os.path
 
+from openstack_releases import gitutils
 
-def looks_like_a_module(workdir, repo):
-    "Does the directory look like it contains a puppet module?"
-    if not os.path.exists(os.path.join(workdir, repo, 'metadata.json')):
+
+def looks_like_a_module(workdir, repo, ref=None):
+    """Does the directory look like it contains a puppet module?
+
+    If ref is given, look at the files at that ref instead of the
+    working tree.
+    """
+    if not gitutils.path_exists(workdir, repo, 'metadata.json', ref):
         return False
     return any([
-        os.path.exists(os.path.join(workdir, repo, 'lib')),
-        os.path.exists(os.path.join(workdir, repo, 'manifests')),
+        gitutils.path_exists(workdir, repo, 'lib', ref),
+        gitutils.path_exists(workdir, repo, 'manifests', ref),
     ])
 
 
-def get_metadata(workdir, repo):
+def get_metadata(workdir, repo, ref=None):
     "Load the metadata.json file from the repo"
-    with open(os.path.join(workdir, repo, 'metadata.json'), 'r') as f:
-        body = f.read()
+    body = gitutils.read_file(workdir, repo, 'metadata.json', ref)
     return json.loads(body)
 
 
-def get_version(workdir, repo):
+def get_version(workdir, repo, ref=None):
     "Get the version string from the project metadata."
-    return get_metadata(workdir, repo).get('version')
+    return get_metadata(workdir, repo, ref).get('version')
@@ -12,56 +12,415 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import ast
+import configparser
+import contextlib
+import glob
+import hashlib
 import json
 import logging
 import os
 import os.path
+import re
+import shutil
+import sys
+import tempfile
+import threading
 import time
 import xmlrpc.client
 
 from packaging import utils as packaging_utils
-import requests
 
+try:
+    import tomllib
+except ImportError:
+    # Python older than 3.11 cannot read pyproject.toml without
+    # another library, so the name is found by running setup.py.
+    tomllib = None
+
+from openstack_releases import cache
+from openstack_releases import gitutils
+from openstack_releases import httputils
 from openstack_releases import processutils
 
 LOG = logging.getLogger(__name__)
 
+# Set to the maximum total size, in megabytes, of the cached builds.
+BUILD_CACHE_MAX_SIZE_ENV = 'OPENSTACK_RELEASES_BUILD_CACHE_MAX_SIZE'
+BUILD_CACHE_DEFAULT_MAX_SIZE = 2 * 1024
+# The number of build environments to keep.
+BUILD_ENV_POOL_SIZE = 10
+
+# What PEP 517 says to use when pyproject.toml does not say.
+_DEFAULT_BUILD_REQUIRES = ['setuptools>=40.8.0']
+_SETUP_REQUIRES_RE = re.compile(r'setup_requires\s*=\s*(\[[^\]]*\])')
+
+# The number of seconds to use PyPI data without checking for changes.
+PYPI_INFO_TTL = 15 * 60
+_PYPI_INFO_VERSION = 2
+# The PyPI data already loaded by this process.
+_pypi_info = {}
+_pypi_info_lock = threading.Lock()
+
+PYPI_XMLRPC_URL = 'https://pypi.org/pypi'
+# How long, in seconds, to use the upload roles read from PyPI.
+PYPI_ROLES_TTL = 60 * 60
+_PYPI_ROLES_VERSION = 1
+# The shortest and longest waits between calls when PyPI is throttling
+# requests, in seconds.
+PYPI_ROLES_MIN_DELAY = 0.5
+PYPI_ROLES_MAX_DELAY = 30
+PYPI_ROLES_ATTEMPTS = 6
+
+_roles_client = None
+_roles_client_pid = None
+_roles_client_lock = threading.Lock()
+
+
+# The files that can set the name of a package.
+_METADATA_FILES = ['setup.py', 'setup.cfg', 'pyproject.toml']
+# Passing a name to setup() overrides the one in setup.cfg.
+_SETUP_NAME_RE = re.compile(r'\bname\s*=')
+
+
+def get_static_sdist_name(workdir, repo):
+    """Return the package name from the static metadata of the repo.
+
+    The name is read from the [project] table of pyproject.toml or the
+    [metadata] section of setup.cfg. Returns None if the name may be
+    computed when setup.py runs.
+    """
+    dest = os.path.join(workdir, repo)
+    try:
+        with open(os.path.join(dest, 'setup.py'), 'r',
+                  encoding='utf-8') as f:
+            if _SETUP_NAME_RE.search(f.read()):
+                return None
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    pyproject_path = os.path.join(dest, 'pyproject.toml')
+    if os.path.exists(pyproject_path):
+        if tomllib is None:
+            return None
+        try:
+            with open(pyproject_path, 'rb') as f:
+                project = tomllib.load(f).get('project', {})
+        except (OSError, tomllib.TOMLDecodeError) as err:
+            LOG.debug('could not read %s: %s', pyproject_path, err)
+            return None
+        if 'name' in project.get('dynamic', []):
+            return None
+        if project.get('name'):
+            return project['name']
+
+    config = configparser.ConfigParser(interpolation=None)
+    try:
+        config.read(os.path.join(dest, 'setup.cfg'), encoding='utf-8')
+    except (configparser.Error, UnicodeDecodeError) as err:
+        LOG.debug('could not read setup.cfg in %s: %s', dest, err)
+        return None
+    name = config.get('metadata', 'name', fallback='').strip()
+    # Values like "attr: pkg.NAME" are computed by setuptools.
+    if not name or ':' in name:
+        return None
+    return name
+
+
+def _get_metadata_sha(dest):
+    """Return the SHA of HEAD, if the metadata files match it.
+
+    Returns None if the files have been changed, or dest is not a git
+    repository.
+    """
+    try:
+        sha = processutils.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=dest)
+        changes = processutils.check_output(
+            ['git', 'status', '--porcelain', '--untracked-files=no',
+             '--'] + _METADATA_FILES,
+            cwd=dest)
+    except processutils.CalledProcessError:
+        return None
+    if changes.strip():
+        return None
+    return sha.decode('utf-8').strip()
+
+
+def _run_setup_name(workdir, repo):
+    dest = os.path.join(workdir, repo)
+    with build_env(get_build_requirements(workdir, repo)) as python:
+        if python is None:
+            python = 'python3'
+        # Run it once and discard the result to ensure any
+        # setup_requires dependencies are installed.
+        cmd = [python, 'setup.py', '--name']
+        processutils.check_call(cmd, cwd=dest)
+        # Run it again to get a clean version of the name.
+        LOG.debug('Running: %s in %s' % (' '.join(cmd), dest))
+        out = processutils.check_output(cmd, cwd=dest).decode('utf-8')
+    LOG.debug('Results: %s' % (out,))
+    name = out.splitlines()[-1].strip()
+    return name
+
 
 def get_sdist_name(workdir, repo):
-    "Find the name of the sdist."
+    """Find the name of the sdist.
+
+    The name is read from the static metadata when possible, and
+    setup.py is only run when that fails. The result is remembered for
+    the commit that is checked out.
+    """
     dest = os.path.join(workdir, repo)
     setup_path = os.path.join(dest, 'setup.py')
     if not os.path.exists(setup_path):
         LOG.debug('did not find %s, maybe %s is not a python project',
                   setup_path, repo)
         return None
-    use_tox = repo.endswith('/pbr')
-    if use_tox and not os.path.exists(os.path.join(dest, '.tox', 'venv')):
-        # Use tox to set up a virtualenv so we can install the
-        # dependencies for the package. This only seems to be
-        # necessary for pbr, but...
-        processutils.check_call(
-            ['tox', '-vv', 'devenv', '-c', 'tox.ini', 'pbrenv'],
-            cwd=dest,
-        )
-    if use_tox:
-        python = 'pbrenv/bin/python3'
-    else:
-        python = 'python3'
-    # Run it once and discard the result to ensure any setup_requires
-    # dependencies are installed.
-    cmd = [python, 'setup.py', '--name']
-    processutils.check_call(cmd, cwd=dest)
-    # Run it again to get a clean version of the name.
-    LOG.debug('Running: %s in %s' % (' '.join(cmd), dest))
-    out = processutils.check_output(cmd, cwd=dest).decode('utf-8')
-    LOG.debug('Results: %s' % (out,))
-    name = out.splitlines()[-1].strip()
+
+    facts = gitutils.get_repo_facts(repo)
+    sha = _get_metadata_sha(dest) if facts is not None else None
+    if sha:
+        name = facts.get('sdist-name', sha)
+        if name:
+            return name
+
+    name = get_static_sdist_name(workdir, repo)
+    if name is None:
+        name = _run_setup_name(workdir, repo)
+    if sha and name:
+        facts.set(name, 'sdist-name', sha)
     return name
 
 
+def _get_build_key(dest, cmd, flags):
+    """Return the key for the cached build of the repo in dest.
+
+    Returns None if the build cannot be cached because the checked
+    out files differ from the commit.
+    """
+    try:
+        sha = processutils.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=dest)
+        # pbr computes the version from the tags, so the same commit
+        # builds differently once a release tag is added to it.
+        describe = processutils.check_output(
+            ['git', 'describe', '--tags', '--always', 'HEAD'], cwd=dest)
+        changes = processutils.check_output(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=dest)
+    except processutils.CalledProcessError as err:
+        LOG.debug('not caching the build in %s: %s', dest, err)
+        return None
+    if changes.strip():
+        LOG.debug('not caching the build in %s: it has local changes',
+                  dest)
+        return None
+    data = json.dumps([
+        sha.decode('utf-8').strip(),
+        describe.decode('utf-8').strip(),
+        cmd,
+        sorted(flags.items()),
+    ])
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def _get_build_outputs(dest):
+    "Return the names of the build outputs in dest worth caching."
+    outputs = [
+        os.path.basename(name)
+        for name in glob.glob(os.path.join(dest, '*.egg-info'))
+    ]
+    if os.path.isdir(os.path.join(dest, 'dist')):
+        outputs.append('dist')
+    return outputs
+
+
+def _restore_build(key, dest):
+    "Copy a cached build into dest. Returns boolean indicating success."
+    entry = os.path.join(cache.get_cache_dir('builds'), key)
+    if not os.path.isdir(entry):
+        return False
+    try:
+        for name in os.listdir(entry):
+            shutil.copytree(os.path.join(entry, name),
+                            os.path.join(dest, name),
+                            dirs_exist_ok=True)
+        os.utime(entry)
+    except OSError as err:
+        LOG.debug('could not use cached build %s: %s', entry, err)
+        shutil.rmtree(os.path.join(dest, 'dist'), True)
+        return False
+    LOG.debug('using cached build %s in %s', entry, dest)
+    return True
+
+
+def _save_build(key, dest):
+    "Copy the build outputs in dest into the cache."
+    root = cache.get_cache_dir('builds')
+    entry = os.path.join(root, key)
+    tmpdir = tempfile.mkdtemp(dir=root, prefix='.tmp-')
+    try:
+        for name in _get_build_outputs(dest):
+            shutil.copytree(os.path.join(dest, name),
+                            os.path.join(tmpdir, name))
+        os.rename(tmpdir, entry)
+    except OSError as err:
+        # Another process may have saved the same build first.
+        LOG.debug('could not cache build from %s: %s', dest, err)
+        shutil.rmtree(tmpdir, True)
+        return
+    prune_builds(root, get_build_cache_max_size())
+
+
+def get_build_cache_max_size():
+    "Return the maximum total size of the cached builds, in bytes."
+    try:
+        megabytes = int(os.environ.get(BUILD_CACHE_MAX_SIZE_ENV) or
+                        BUILD_CACHE_DEFAULT_MAX_SIZE)
+    except ValueError:
+        megabytes = BUILD_CACHE_DEFAULT_MAX_SIZE
+    return megabytes * 1024 * 1024
+
+
+def prune_builds(root, max_size):
+    """Remove the least recently used builds above a total size.
+
+    :param root: The directory holding the cached builds.
+    :param max_size: The maximum total size, in bytes.
+    """
+    builds = []
+    for name in os.listdir(root):
+        # Ignore builds still being saved.
+        if name.startswith('.'):
+            continue
+        path = os.path.join(root, name)
+        builds.append((os.stat(path).st_mtime, path,
+                       cache.get_dir_size(path)))
+    total = sum(size for _, _, size in builds)
+    for _, path, size in sorted(builds):
+        if total <= max_size:
+            break
+        LOG.debug('Removing cached build %s', path)
+        shutil.rmtree(path, True)
+        total -= size
+
+
+def get_build_requirements(workdir, repo):
+    """Return the sorted list of packages needed to build the repo.
+
+    The list combines the build-system requirements from
+    pyproject.toml and the setup_requires given in setup.py. Returns
+    None if they cannot be found without running any code.
+    """
+    dest = os.path.join(workdir, repo)
+    requires = list(_DEFAULT_BUILD_REQUIRES)
+    pyproject_path = os.path.join(dest, 'pyproject.toml')
+    if os.path.exists(pyproject_path):
+        if tomllib is None:
+            return None
+        try:
+            with open(pyproject_path, 'rb') as f:
+                build_system = tomllib.load(f).get('build-system')
+        except (OSError, tomllib.TOMLDecodeError) as err:
+            LOG.debug('could not read %s: %s', pyproject_path, err)
+            return None
+        if build_system is not None:
+            requires = list(build_system.get('requires', []))
+    try:
+        with open(os.path.join(dest, 'setup.py'), 'r',
+                  encoding='utf-8') as f:
+            setup_py = f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+    match = _SETUP_REQUIRES_RE.search(setup_py)
+    if match:
+        try:
+            requires.extend(ast.literal_eval(match.group(1)))
+        except (ValueError, SyntaxError):
+            return None
+    elif 'setup_requires' in setup_py:
+        return None
+    return sorted(set(requires))
+
+
+def _create_build_env(path, requires):
+    LOG.debug('creating build environment %s for %s', path, requires)
+    shutil.rmtree(path, True)
+    processutils.check_call([sys.executable, '-m', 'venv', path])
+    processutils.check_call(
+        [os.path.join(path, 'bin', 'python3'), '-m', 'pip', 'install',
+         '--quiet', 'build', 'wheel'] + requires)
+    # Mark the environment as complete.
+    with open(os.path.join(path, '.ready'), 'w'):
+        pass
+
+
+@contextlib.contextmanager
+def build_env(requires):
+    """Context manager giving the python of a virtualenv for building.
+
+    The virtualenvs are kept in the cache and shared by every build
+    with the same requirements, so the requirements are only installed
+    once. Gives None if there is no environment to use, in which case
+    the caller should build the way it would without one.
+
+    :param requires: The list of packages the build needs, from
+      get_build_requirements().
+    """
+    if requires is None or not cache.enabled():
+        yield None
+        return
+    key = hashlib.sha256(
+        json.dumps([sys.version, requires]).encode('utf-8')).hexdigest()
+    root = cache.get_cache_dir('build-envs')
+    path = os.path.join(root, key[:16])
+    python = os.path.join(path, 'bin', 'python3')
+    with cache.lock(path):
+        if not os.path.exists(os.path.join(path, '.ready')):
+            try:
+                _create_build_env(path, requires)
+            except (processutils.CalledProcessError, OSError) as err:
+                LOG.warning('could not create build environment for %s: %s',
+                            requires, err)
+                shutil.rmtree(path, True)
+                path = None
+    if path is None:
+        yield None
+        return
+    with cache.lock(path, exclusive=False):
+        os.utime(path)
+        yield python
+    prune_build_envs(root, BUILD_ENV_POOL_SIZE)
+
+
+def prune_build_envs(root, max_count):
+    """Remove the least recently used build environments above a count.
+
+    Environments in use by another process are skipped.
+    """
+    envs = sorted(
+        (os.stat(os.path.join(root, name)).st_mtime,
+         os.path.join(root, name))
+        for name in os.listdir(root)
+        if not name.endswith('.lock')
+    )
+    for _, path in envs[:max(0, len(envs) - max_count)]:
+        try:
+            with cache.lock(path, blocking=False):
+                LOG.debug('Removing build environment %s', path)
+                shutil.rmtree(path, True)
+        except BlockingIOError:
+            LOG.debug('Not removing build environment %s, it is in use',
+                      path)
+
+
 def build_sdist(workdir, repo):
-    """Build the sdist."""
+    """Build the sdist.
+
+    The dist directory and egg-info produced for a commit are cached,
+    so building the same commit again copies them instead.
+    """
     dest = os.path.join(workdir, repo)
 
     build_path = os.path.join(dest, 'dist')
@@ -82,10 +441,32 @@ def build_sdist(workdir, repo):
         'SKIP_WRITE_GIT_CHANGELOG': '1',
     }
     cmd = ['python3', '-m', 'build', '--sdist', '--wheel']
-    processutils.check_call(
-        cmd,
-        cwd=dest,
-        env=flags)
+
+    key = None
+    if cache.enabled():
+        key = _get_build_key(dest, cmd, flags)
+        if key and _restore_build(key, dest):
+            return
+
+    with build_env(get_build_requirements(workdir, repo)) as python:
+        if python is None:
+            processutils.check_call(cmd, cwd=dest, env=flags)
+        else:
+            # The environment already has the build requirements, so
+            # build in it instead of an isolated one.
+            try:
+                processutils.check_call(
+                    [python, '-m', 'build', '--sdist', '--wheel',
+                     '--no-isolation'],
+                    cwd=dest,
+                    env=flags)
+            except processutils.CalledProcessError as err:
+                LOG.debug('build in %s failed, trying an isolated '
+                          'build: %s', python, err)
+                processutils.check_call(cmd, cwd=dest, env=flags)
+
+    if key:
+        _save_build(key, dest)
 
 
 def check_readme_format(workdir, repo):
@@ -110,37 +491,238 @@ def check_readme_format(workdir, repo):
     )
 
 
-def get_pypi_info(dist_name):
-    "Return PyPI information for the distribution."
-    canonical_name = packaging_utils.canonicalize_name(dist_name)
-    LOG.debug('looking at PyPI for {!r}'.format(canonical_name))
+def _get_pypi_cache_file(canonical_name):
+    return os.path.join(
+        cache.get_cache_dir('pypi-info'),
+        '{}-{}.pickle'.format(canonical_name, _PYPI_INFO_VERSION),
+    )
+
+
+def _make_pypi_entry(response, info):
+    # Index the release files by version, so looking up one version
+    # does not need to go through the whole document.
+    files = {
+        version: [
+            {'filename': f['filename'], 'packagetype': f.get('packagetype')}
+            for f in sorted(release_files, key=lambda f: f['filename'])
+        ]
+        for version, release_files in info.get('releases', {}).items()
+    }
+    return {
+        'fetched': time.time(),
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'info': info,
+        'files': files,
+    }
+
+
+def _fetch_pypi_entry(canonical_name, entry):
     url = 'https://pypi.org/pypi/{}/json'.format(canonical_name)
+    headers = {}
+    if entry is not None:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+    response = httputils.get(url, headers=headers)
+    if response.status_code == 304 and entry is not None:
+        LOG.debug('PyPI data for {} has not changed'.format(canonical_name))
+        return dict(entry, fetched=time.time())
     try:
-        info = requests.get(url).json()
-        if info == {'message': 'Not Found'}:
-            LOG.debug('{} package not found on PyPI'.format(canonical_name))
-            return {}
-        return info
+        info = response.json()
     except json.decoder.JSONDecodeError:
         LOG.debug('Error parsing JSON response from PyPI')
+        return None
+    if info == {'message': 'Not Found'}:
+        LOG.debug('{} package not found on PyPI'.format(canonical_name))
+        info = {}
+    return _make_pypi_entry(response, info)
+
+
+def _get_pypi_entry(dist_name, refresh=False):
+    canonical_name = packaging_utils.canonicalize_name(dist_name)
+    LOG.debug('looking at PyPI for {!r}'.format(canonical_name))
+    with _pypi_info_lock:
+        entry = _pypi_info.get(canonical_name)
+    use_cache = cache.enabled()
+    if entry is None and use_cache:
+        entry = cache.load_pickle(_get_pypi_cache_file(canonical_name))
+    if (entry is not None and not refresh and
+            time.time() - entry['fetched'] < PYPI_INFO_TTL):
+        return entry
+    entry = _fetch_pypi_entry(canonical_name, entry)
+    if entry is None:
+        return None
+    with _pypi_info_lock:
+        _pypi_info[canonical_name] = entry
+    if use_cache:
+        try:
+            cache.save_pickle(_get_pypi_cache_file(canonical_name), entry)
+        except OSError as err:
+            LOG.debug('could not save PyPI data for %s: %s',
+                      canonical_name, err)
+    return entry
+
+
+def get_pypi_info(dist_name, refresh=False):
+    """Return PyPI information for the distribution.
+
+    The document is kept in the cache and used for PYPI_INFO_TTL
+    seconds. After that PyPI is asked for it again, but only sends it
+    if it has changed.
+
+    :param refresh: Boolean indicating whether to ask PyPI for changes
+      even if the cached document is newer than PYPI_INFO_TTL.
+    """
+    entry = _get_pypi_entry(dist_name, refresh)
+    if entry is None:
         return {}
+    return entry['info']
 
 
-def _get_pypi_roles(dist_name):
-    client = xmlrpc.client.ServerProxy('https://pypi.org/pypi')
-    LOG.debug('retrieving roles for {!r}'.format(
-        dist_name))
-    return client.package_roles(dist_name)
+def get_pypi_release_files(dist_name, version, refresh=False):
+    """Return the files uploaded to PyPI for a version.
 
+    Each file is a dict with its filename and packagetype. The list
+    is empty if the version has not been uploaded, and None is
+    returned if PyPI does not know about the distribution at all.
 
-def get_pypi_uploaders(dist_name):
-    roles = _get_pypi_roles(dist_name)
-    if not roles:
-        # Sleep one second before retrying, to avoid PyPI returning
-        # TooManyRequests and hiding the real issue
-        time.sleep(1)
+    :param refresh: Boolean indicating whether to ask PyPI for changes
+      even if the cached document is newer than PYPI_INFO_TTL.
+    """
+    entry = _get_pypi_entry(dist_name, refresh)
+    if entry is None or not entry['info']:
+        return None
+    return entry['files'].get(str(version), [])
+
+
+class PyPIRolesClient(object):
+    """Look up who can upload to packages on PyPI.
+
+    One XML-RPC connection is shared by all of the lookups, and they
+    are sent one at a time because PyPI limits how quickly a client
+    may call it. When PyPI says there have been too many requests the
+    client waits longer between calls, and when calls succeed it
+    gradually goes back to not waiting. The roles are cached for
+    PYPI_ROLES_TTL seconds, in memory and on disk. Packages without
+    any roles are not cached, so they are looked up every time.
+    """
+
+    def __init__(self, url=PYPI_XMLRPC_URL, ttl=None):
+        self._url = url
+        self._ttl = PYPI_ROLES_TTL if ttl is None else ttl
+        self._proxy = None
+        self._roles = {}
+        self._delay = 0
+        self._lock = threading.Lock()
+
+    def _get_cache_file(self, canonical_name):
+        return os.path.join(
+            cache.get_cache_dir('pypi-roles'),
+            '{}-{}.pickle'.format(canonical_name, _PYPI_ROLES_VERSION),
+        )
+
+    def _get_cached(self, canonical_name):
+        entry = self._roles.get(canonical_name)
+        if entry is None and cache.enabled():
+            entry = cache.load_pickle(self._get_cache_file(canonical_name))
+        if (entry is None or not entry['roles'] or
+                time.time() - entry['fetched'] >= self._ttl):
+            return None
+        self._roles[canonical_name] = entry
+        return entry['roles']
+
+    def _save(self, canonical_name, roles):
+        entry = {'fetched': time.time(), 'roles': roles}
+        self._roles[canonical_name] = entry
+        if cache.enabled():
+            try:
+                cache.save_pickle(self._get_cache_file(canonical_name), entry)
+            except OSError as err:
+                LOG.debug('could not save PyPI roles for %s: %s',
+                          canonical_name, err)
+
+    @staticmethod
+    def _is_throttled(err):
+        if isinstance(err, xmlrpc.client.Fault):
+            return 'TooManyRequests' in str(err.faultString)
+        if isinstance(err, xmlrpc.client.ProtocolError):
+            return err.errcode == 429
+        return False
+
+    @staticmethod
+    def _get_retry_after(err):
+        headers = getattr(err, 'headers', None) or {}
+        try:
+            return float(headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
+
+    def _call_package_roles(self, dist_name):
+        # Must be called with the lock held.
+        for attempt in range(PYPI_ROLES_ATTEMPTS):
+            if self._delay:
+                time.sleep(self._delay)
+            if self._proxy is None:
+                self._proxy = xmlrpc.client.ServerProxy(self._url)
+            LOG.debug('retrieving roles for {!r}'.format(dist_name))
+            try:
+                roles = self._proxy.package_roles(dist_name)
+            except (xmlrpc.client.Fault, xmlrpc.client.ProtocolError) as err:
+                if not self._is_throttled(err):
+                    raise
+                self._delay = min(
+                    max(self._delay * 2, PYPI_ROLES_MIN_DELAY,
+                        self._get_retry_after(err) or 0),
+                    PYPI_ROLES_MAX_DELAY,
+                )
+                LOG.debug('PyPI is throttling requests, waiting %s seconds',
+                          self._delay)
+                continue
+            self._delay /= 2
+            if self._delay < PYPI_ROLES_MIN_DELAY:
+                self._delay = 0
+            return [tuple(r) for r in roles]
+        raise RuntimeError(
+            'PyPI refused too many requests for the roles of {}'.format(
+                dist_name))
+
+    def _fetch(self, dist_name):
+        # Must be called with the lock held.
+        roles = self._call_package_roles(dist_name)
         canonical_name = packaging_utils.canonicalize_name(dist_name)
-        roles = _get_pypi_roles(canonical_name)
+        if not roles and canonical_name != dist_name:
+            roles = self._call_package_roles(canonical_name)
+        return roles
+
+    def get_roles(self, dist_name):
+        "Return the list of (role, user) pairs for the distribution."
+        canonical_name = packaging_utils.canonicalize_name(dist_name)
+        with self._lock:
+            roles = self._get_cached(canonical_name)
+            if roles is None:
+                roles = self._fetch(dist_name)
+                # An empty answer may change as soon as someone is
+                # given access, so only keep real answers.
+                if roles:
+                    self._save(canonical_name, roles)
+            return roles
+
+
+def get_pypi_roles_client():
+    "Return the PyPIRolesClient shared by everything in this process."
+    global _roles_client, _roles_client_pid
+    with _roles_client_lock:
+        # Do not share an open connection with a parent process.
+        if _roles_client is None or _roles_client_pid != os.getpid():
+            _roles_client = PyPIRolesClient()
+            _roles_client_pid = os.getpid()
+        return _roles_client
+
+
+def get_pypi_uploaders(dist_name):
+    roles = get_pypi_roles_client().get_roles(dist_name)
     uploaders = set(
         acct
         for role, acct in roles
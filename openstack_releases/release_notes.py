@@ -24,6 +24,7 @@ from reno import config as reno_config
 from reno import formatter
 from reno import loader
 
+from openstack_releases import deliverable
 from openstack_releases import rst2txt
 from openstack_releases import series_status
 from openstack_releases import yamlutils
@@ -184,6 +185,18 @@ release crew's attention.
 """
 
 
+def _find_deliverable_for_repo(release_repo, series, repo):
+    "Return the deliverable for the series that includes the repo, or None."
+    all_deliv = deliverable.Deliverables(
+        os.path.join(release_repo, 'deliverables'),
+        lazy=True,
+    )
+    for deliv in all_deliv.get_deliverables_for_repo(
+            'openstack/%s' % repo, series.lower()):
+        return deliv
+    return None
+
+
 def parse_deliverable(series, repo, deliverable_file=None):
     """Parse useful information out of the deliverable file.
 
@@ -213,11 +226,17 @@ def parse_deliverable(series, repo, deliverable_file=None):
         with open(deliverable_path, 'r') as d:
             deliverable_info = yamlutils.loads(d)
     except Exception:
-        # TODO(smcginnis): If the deliverable doesn't match the repo name, we
-        # can try to find it by loading all deliverable data and iterating on
-        # each deliverables repos to find it.
-        LOG.warning('Unable to parse %s %s deliverable file', repo, series)
-        return sections
+        # The deliverable may not be named after the repo, so look for
+        # the one that includes it.
+        deliv = _find_deliverable_for_repo(release_repo, series, repo)
+        if deliv is None:
+            LOG.warning('Unable to parse %s %s deliverable file',
+                        repo, series)
+            return sections
+        deliverable_info = {
+            'launchpad': deliv.launchpad_id,
+            'storyboard': deliv.storyboard_id,
+        }
 
     if deliverable_info.get('launchpad'):
         sections['bug_url'] = (
@@ -14,13 +14,18 @@
 
 """Tools for working with requirements lists."""
 
+import collections
+import concurrent.futures
+import configparser
+import contextvars
 import logging
 import os.path
+import re
 
+from packaging import markers as pkg_markers
 from packaging import requirements as pkg_requirements
 
 from openstack_releases import gitutils
-from openstack_releases import processutils
 from openstack_releases import pythonutils
 from openstack_releases import versionutils
 
@@ -35,8 +40,17 @@ def find_bad_lower_bound_increases(workdir, repo,
         # There is no need to look at the requirements so don't do the
         # extra work.
         return
-    start_reqs = get_requirements_at_ref(workdir, repo, start_version)
-    hash_reqs = get_requirements_at_ref(workdir, repo, hash)
+    # Each ref is built in its own worktree, so both builds can run at
+    # the same time. Run the other one in a copy of the caller's
+    # context so anything tied to it, such as where output is
+    # captured, still applies.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        start_future = executor.submit(
+            contextvars.copy_context().run,
+            get_requirements_at_ref, workdir, repo, start_version,
+        )
+        hash_reqs = get_requirements_at_ref(workdir, repo, hash)
+        start_reqs = start_future.result()
     compare_lower_bounds(start_reqs, hash_reqs, report)
 
 
@@ -85,23 +99,128 @@ def get_min_specifier(specifier_set):
             return s
 
 
+# pbr projects pass pbr=True to setup() in setup.py.
+_PBR_RE = re.compile(r'pbr\s*=\s*True')
+# Dependencies listed in pyproject.toml replace the ones pbr reads.
+_PYPROJECT_DEPENDENCIES_RE = re.compile(r'^\s*dependencies\s*=', re.M)
+
+
+def _format_requirements(lines, extra=''):
+    """Return the requires.txt sections for a list of requirements.
+
+    Returns None if any of the lines cannot be handled statically.
+    Requirements with environment markers go in their own section,
+    named the way setuptools names them.
+    """
+    sections = collections.OrderedDict()
+    for line in lines:
+        line = line.split(' #')[0].strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('-') or '://' in line:
+            # Includes, editable installs and URLs need pip.
+            return None
+        try:
+            req = pkg_requirements.Requirement(line)
+        except ValueError:
+            return None
+        section = extra
+        if req.marker is not None:
+            section = '{}:{}'.format(extra, req.marker)
+            req.marker = None
+        sections.setdefault(section, []).append(str(req))
+    return sections
+
+
+def read_static_requirements(workdir, repo, ref):
+    """Return the requires.txt content for the repo at ref, without a build.
+
+    The requirements of pbr projects are read from requirements.txt,
+    and the extras from the [extras] section of setup.cfg.
+
+    Returns None if the requirements cannot be read this way, for
+    example because the project is not using pbr or it lists its
+    dependencies somewhere else.
+    """
+    def read(filename):
+        try:
+            return gitutils.read_file(workdir, repo, filename, ref)
+        except FileNotFoundError:
+            return None
+
+    setup_py = read('setup.py')
+    requirements_txt = read('requirements.txt')
+    setup_cfg = read('setup.cfg')
+    if not (setup_py and _PBR_RE.search(setup_py)):
+        return None
+    if requirements_txt is None or setup_cfg is None:
+        return None
+    pyproject = read('pyproject.toml')
+    if pyproject and _PYPROJECT_DEPENDENCIES_RE.search(pyproject):
+        return None
+
+    config = configparser.ConfigParser(interpolation=None)
+    # Keep the names of the extras as they are written.
+    config.optionxform = str
+    try:
+        config.read_string(setup_cfg)
+    except configparser.Error:
+        return None
+    if (config.has_option('options', 'install_requires') or
+            config.has_option('metadata', 'requires_dist')):
+        return None
+
+    sections = _format_requirements(requirements_txt.splitlines())
+    if sections is None:
+        return None
+    if config.has_section('extras'):
+        for extra, value in config.items('extras'):
+            extra_sections = _format_requirements(value.splitlines(), extra)
+            if extra_sections is None:
+                return None
+            for name, reqs in extra_sections.items():
+                sections.setdefault(name, []).extend(reqs)
+
+    body = []
+    for name, reqs in sections.items():
+        if name:
+            body.append('')
+            body.append('[{}]'.format(name))
+        body.extend(reqs)
+    return '\n'.join(body) + '\n'
+
+
 def get_requirements_at_ref(workdir, repo, ref):
-    """Check out the repo at the ref and load the list of requirements."""
+    """Load the list of requirements for the repo at the ref.
+
+    The requirements are read directly from the files at the ref when
+    possible. Otherwise the ref is checked out and built in a worktree
+    of the clone in workdir, so the main working tree is left alone.
+    """
     body = ''
 
     try:
-        dest = gitutils.clone_repo(workdir, repo, ref=ref)
-        processutils.check_call(['python3', '-m', 'build', '--sdist', '--wheel'], cwd=dest)
-        sdist_name = pythonutils.get_sdist_name(workdir, repo)
-        requirements_filename = os.path.join(
-            dest, sdist_name + '.egg-info', 'requires.txt',
-        )
-        if os.path.exists(requirements_filename):
-            with open(requirements_filename, 'r') as f:
-                body = f.read()
-        else:
-            # The package has no dependencies.
-            pass
+        if not os.path.isdir(os.path.join(workdir, repo)):
+            gitutils.clone_repo(workdir, repo)
+        static_body = read_static_requirements(workdir, repo, ref)
+        if static_body is not None:
+            LOG.debug('read requirements for %s at %s without building',
+                      repo, ref)
+            return parse_requirements(static_body)
+        pool = gitutils.get_worktree_pool(workdir)
+        with pool.checkout(repo, ref) as ref_workdir:
+            dest = os.path.join(ref_workdir, repo)
+            pythonutils.build_sdist(ref_workdir, repo)
+            sdist_name = pythonutils.get_sdist_name(ref_workdir, repo)
+            requirements_filename = os.path.join(
+                dest, sdist_name + '.egg-info', 'requires.txt',
+            )
+            if os.path.exists(requirements_filename):
+                with open(requirements_filename, 'r') as f:
+                    body = f.read()
+            else:
+                # The package has no dependencies.
+                pass
     except Exception:
         # We've had a few cases where a previous version had an issue and could
         # no longer be installed. In this case, just move along.
@@ -112,6 +231,23 @@ def get_requirements_at_ref(workdir, repo, ref):
     return parse_requirements(body)
 
 
+def _normalize_section(section):
+    """Return the name of a requires.txt section for comparisons.
+
+    Versions of setuptools differ in how they write the names of the
+    extras and the environment markers, so both are normalized.
+    """
+    extra, sep, marker = section.partition(':')
+    extra = re.sub(r'[^A-Za-z0-9.-]+', '_', extra).lower()
+    if not sep:
+        return extra
+    try:
+        marker = str(pkg_markers.Marker(marker))
+    except pkg_markers.InvalidMarker:
+        pass
+    return '{}:{}'.format(extra, marker)
+
+
 def parse_requirements(body):
     """Given the requires.txt file for an sdist, parse it.
 
@@ -149,7 +285,7 @@ def parse_requirements(body):
         if (not line.strip()) or line.startswith('#'):
             continue
         if line.startswith('['):
-            section = line.lstrip('[').rstrip(']')
+            section = _normalize_section(line.strip().lstrip('[').rstrip(']'))
             continue
 
         try:
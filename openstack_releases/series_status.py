@@ -96,7 +96,7 @@ class SeriesStatus(collections.abc.Mapping):
     def _load_series_status_data(root_dir):
         filename = os.path.join(root_dir, 'series_status.yaml')
         with open(filename, 'r', encoding='utf-8') as f:
-            return yamlutils.loads(f.read())
+            return yamlutils.safe_loads(f.read())
 
     @staticmethod
     def _organize_data(raw_data):
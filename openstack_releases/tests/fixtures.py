@@ -19,6 +19,7 @@ import textwrap
 
 import fixtures
 
+from openstack_releases import gitutils
 from openstack_releases import processutils
 
 LOG = logging.getLogger(__name__)
@@ -91,45 +92,73 @@ class GPGKeyFixture(fixtures.Fixture):
 
 
 class GitRepoFixture(fixtures.Fixture):
+    """Creates a git repository in a working directory for testing.
 
-    def __init__(self, workdir, name):
+    :param workdir: The directory holding the repositories.
+    :param name: The repository name, e.g. openstack/release-test.
+    :param signed: Boolean indicating whether to create a GPG key and
+      sign the tags. Generating the key is slow, so tests that do not
+      look at signatures should turn it off.
+
+    """
+
+    def __init__(self, workdir, name, signed=True):
         self.workdir = workdir
         self.name = name
         self.path = os.path.join(self.workdir, self.name)
+        self.signed = signed
         super().__init__()
 
     def setUp(self):
         super().setUp()
-        self.useFixture(GPGKeyFixture())
-        os.makedirs(self.path)
+        # Ignore the git settings of whoever is running the tests.
+        self.useFixture(fixtures.EnvironmentVariable('GIT_CONFIG_GLOBAL',
+                                                     os.devnull))
+        if self.signed:
+            self.useFixture(GPGKeyFixture())
+        # Keep what is learned about these fake repositories out of
+        # the real cache.
+        self.cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_CACHE_DIR', self.cache_dir))
+        os.makedirs(self.path, exist_ok=True)
         LOG.debug('initializing repo in %s', self.path)
-        self.git('init', '.')
+        self.git('init', '-q', '-b', 'master')
         self.git('config', '--local', 'user.email', 'example@example.com')
         self.git('config', '--local', 'user.name', 'super developer')
-        self.git('config', '--local', 'user.signingkey',
-                 'example@example.com')
+        if self.signed:
+            self.git('config', '--local', 'user.signingkey',
+                     'example@example.com')
+        self.addCleanup(gitutils._close_object_readers)
 
-    def git(self, *args):
+    def git(self, *args, cwd=None):
         output = processutils.check_output(
             ['git'] + list(args),
-            cwd=self.path,
+            cwd=cwd or self.path,
         )
-        return output
+        return output.decode('utf-8').strip()
+
+    def write(self, name, body):
+        LOG.debug('writing file %r', name)
+        filename = os.path.join(self.path, name)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'w') as f:
+            f.write(body)
 
     def commit(self, message='commit message'):
         LOG.debug('committing %r', message)
         self.git('add', '.')
-        self.git('commit', '-m', message)
-        sha = self.git('log', '-n', '1', '--pretty=format:%H')
+        self.git('commit', '-q', '--allow-empty', '-m', message)
+        sha = self.git('rev-parse', 'HEAD')
         LOG.debug('SHA: %r', sha)
-        return sha.decode('utf-8').strip()
+        return sha
 
     def add_file(self, name):
         LOG.debug('adding file %r', name)
-        with open(os.path.join(self.path, name), 'w') as f:
-            f.write('adding %s\n' % name)
+        self.write(name, 'adding %s\n' % name)
         return self.commit('add %s' % name)
 
     def tag(self, version):
         LOG.debug('tagging %r', version)
-        self.git('tag', '-s', '-m', version, version)
+        self.git('tag', '-s' if self.signed else '-a', '-m', version,
+                 version)
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os.path
 import textwrap
 
 import fixtures
@@ -261,3 +262,200 @@ class TestTarballBase(base.BaseTestCase):
         )
         project = deliv.releases[-1].projects[0]
         self.assertEqual('foo', project.tarball_base)
+
+
+class TestDeliverablesCache(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.root_dir = self.useFixture(fixtures.TempDir()).path
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_CACHE_DIR', cache_dir))
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE'))
+        self._write('dalmatian', 'release-test', '1.0.0')
+
+    def _write(self, series, name, version):
+        dirname = os.path.join(self.root_dir, series)
+        os.makedirs(dirname, exist_ok=True)
+        with open(os.path.join(dirname, name + '.yaml'), 'w') as f:
+            f.write(textwrap.dedent('''
+            team: Release Management
+            release-model: cycle-with-intermediary
+            releases:
+              - version: {}
+                projects:
+                  - repo: openstack/release-test
+                    hash: a26e6a2e8a5e321b2e3517dbb01a7b9a56a8bfd5
+            ''').format(version))
+
+    def _versions(self, all_deliv):
+        return [
+            d.latest_release
+            for d in all_deliv.get_deliverables(None, 'dalmatian')
+        ]
+
+    def test_warm_load_does_not_parse(self):
+        deliverable.Deliverables(self.root_dir)
+        loads = self.useFixture(fixtures.MockPatch(
+            'openstack_releases.yamlutils.safe_loads')).mock
+        all_deliv = deliverable.Deliverables(self.root_dir)
+        loads.assert_not_called()
+        self.assertEqual(['1.0.0'], self._versions(all_deliv))
+
+    def test_modified_file_is_parsed(self):
+        deliverable.Deliverables(self.root_dir)
+        self._write('dalmatian', 'release-test', '1.0.0.0b1')
+        filename = os.path.join(self.root_dir, 'dalmatian',
+                                'release-test.yaml')
+        # Make sure the change is visible even on file systems with
+        # coarse timestamps.
+        st = os.stat(filename)
+        os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        all_deliv = deliverable.Deliverables(self.root_dir)
+        self.assertEqual(['1.0.0.0b1'], self._versions(all_deliv))
+
+    def test_new_file_is_added(self):
+        deliverable.Deliverables(self.root_dir)
+        self._write('dalmatian', 'zzz-release-test', '2.0.0')
+        all_deliv = deliverable.Deliverables(self.root_dir)
+        self.assertEqual(['1.0.0', '2.0.0'], self._versions(all_deliv))
+
+    def test_bypass_cache(self):
+        deliverable.Deliverables(self.root_dir)
+        loads = self.useFixture(fixtures.MockPatch(
+            'openstack_releases.yamlutils.safe_loads',
+            side_effect=yamlutils.safe_loads)).mock
+        deliverable.Deliverables(self.root_dir, use_cache=False)
+        loads.assert_called_once()
+
+    def test_bypass_cache_from_environment(self):
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        deliverable.Deliverables(self.root_dir)
+        loads = self.useFixture(fixtures.MockPatch(
+            'openstack_releases.yamlutils.safe_loads',
+            side_effect=yamlutils.safe_loads)).mock
+        deliverable.Deliverables(self.root_dir)
+        loads.assert_called_once()
+
+    def test_parallel_parse_matches_serial(self):
+        for name in ['nova', 'glance', 'cinder', 'aodh']:
+            self._write('dalmatian', name, '1.0.0')
+        self._write('epoxy', 'nova', '2.0.0')
+        serial = deliverable.Deliverables(self.root_dir, use_cache=False)
+        parallel = deliverable.Deliverables(
+            self.root_dir, use_cache=False, jobs=2)
+        self.assertEqual(serial._by_series, parallel._by_series)
+        self.assertEqual(serial._by_deliverable_name,
+                         parallel._by_deliverable_name)
+        self.assertEqual(serial._by_filename, parallel._by_filename)
+
+
+class TestDeliverablesLazy(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.root_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        for series in ['dalmatian', 'epoxy']:
+            for name in ['nova', 'glance']:
+                dirname = os.path.join(self.root_dir, series)
+                os.makedirs(dirname, exist_ok=True)
+                with open(os.path.join(dirname, name + '.yaml'), 'w') as f:
+                    f.write('team: {}\n'.format(name))
+        self.loads = self.useFixture(fixtures.MockPatch(
+            'openstack_releases.yamlutils.safe_loads',
+            side_effect=yamlutils.safe_loads)).mock
+
+    def test_nothing_parsed_up_front(self):
+        deliverable.Deliverables(self.root_dir, lazy=True)
+        self.loads.assert_not_called()
+
+    def test_get_deliverables_parses_one_series(self):
+        all_deliv = deliverable.Deliverables(self.root_dir, lazy=True)
+        names = [d.name for d in all_deliv.get_deliverables(None, 'epoxy')]
+        self.assertEqual(['glance', 'nova'], names)
+        self.assertEqual(2, self.loads.call_count)
+
+    def test_get_deliverable_history_parses_one_deliverable(self):
+        all_deliv = deliverable.Deliverables(self.root_dir, lazy=True)
+        series = [d.series for d in all_deliv.get_deliverable_history('nova')]
+        self.assertEqual(['dalmatian', 'epoxy'], series)
+        self.assertEqual(2, self.loads.call_count)
+
+    def test_matches_eager(self):
+        eager = deliverable.Deliverables(self.root_dir)
+        lazy = deliverable.Deliverables(self.root_dir, lazy=True)
+        list(lazy.get_deliverable_history('nova'))
+        list(lazy.get_deliverables('glance', 'epoxy'))
+        self.assertEqual(sorted(eager.get_teams()), sorted(lazy.get_teams()))
+        self.assertEqual(eager._by_team_and_series, lazy._by_team_and_series)
+        self.assertEqual(eager._by_series, lazy._by_series)
+        self.assertEqual(eager._by_deliverable_name,
+                         lazy._by_deliverable_name)
+        # Each file is only parsed once per instance.
+        self.assertEqual(8, self.loads.call_count)
+
+
+class TestDeliverablesByRepo(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.root_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        self._write('dalmatian', 'nova', 'Nova', ['openstack/nova'])
+        self._write('dalmatian', 'python-novaclient', 'Nova',
+                    ['openstack/python-novaclient'])
+        self._write('epoxy', 'nova-all', 'Nova',
+                    ['openstack/nova', 'openstack/python-novaclient'])
+        self._write('_independent', 'nova-tools', 'Nova',
+                    ['openstack/nova'])
+
+    def _write(self, series, name, team, repos):
+        dirname = os.path.join(self.root_dir, series)
+        os.makedirs(dirname, exist_ok=True)
+        with open(os.path.join(dirname, name + '.yaml'), 'w') as f:
+            f.write('team: {}\nrepository-settings:\n'.format(team))
+            for repo in repos:
+                f.write('  {}: {{}}\n'.format(repo))
+
+    def _owners(self, all_deliv, repo, series=None):
+        return [
+            (d.series, d.name, d.team)
+            for d in all_deliv.get_deliverables_for_repo(repo, series)
+        ]
+
+    def test_all_series(self):
+        all_deliv = deliverable.Deliverables(self.root_dir)
+        self.assertEqual(
+            [('independent', 'nova-tools', 'Nova'),
+             ('dalmatian', 'nova', 'Nova'),
+             ('epoxy', 'nova-all', 'Nova')],
+            self._owners(all_deliv, 'openstack/nova'))
+
+    def test_one_series(self):
+        all_deliv = deliverable.Deliverables(self.root_dir)
+        self.assertEqual(
+            [('epoxy', 'nova-all', 'Nova')],
+            self._owners(all_deliv, 'openstack/python-novaclient', 'epoxy'))
+        self.assertEqual(
+            [('independent', 'nova-tools', 'Nova')],
+            self._owners(all_deliv, 'openstack/nova', 'independent'))
+
+    def test_unknown_repo(self):
+        all_deliv = deliverable.Deliverables(self.root_dir)
+        self.assertEqual([], self._owners(all_deliv, 'openstack/unknown'))
+
+    def test_lazy_loads_one_series(self):
+        all_deliv = deliverable.Deliverables(self.root_dir, lazy=True)
+        self.assertEqual(
+            [('dalmatian', 'python-novaclient', 'Nova')],
+            self._owners(all_deliv, 'openstack/python-novaclient',
+                         'dalmatian'))
+        self.assertEqual(
+            [os.path.join(self.root_dir, 'dalmatian')],
+            sorted(all_deliv._loaded_dirs))
@@ -12,12 +12,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+import subprocess
 from unittest import mock
 
+import fixtures
 from oslotest import base
 
+from openstack_releases import cache
 from openstack_releases import gitutils
+from openstack_releases import processutils
 from openstack_releases import series_status
+from openstack_releases.tests import fixtures as or_fixtures
 
 
 @mock.patch.object(gitutils, 'branch_exists')
@@ -102,3 +108,571 @@ class TestStableBranchExists(base.BaseTestCase):
         self.assertEqual('stable/zed', result)
         mock_exists.assert_called_once_with('/tmp', 'openstack/nova',
                                             'stable', 'zed')
+
+
+@mock.patch.object(gitutils, 'clone_repo')
+class TestSafeCloneRepos(base.BaseTestCase):
+
+    def test_all_ok(self, mock_clone):
+        messages = mock.Mock()
+        result = gitutils.safe_clone_repos(
+            '/tmp', ['openstack/nova', 'openstack/glance'], 'master',
+            messages)
+        self.assertTrue(result)
+        self.assertEqual(2, mock_clone.call_count)
+        mock_clone.assert_any_call('/tmp', 'openstack/nova', 'master',
+                                   mode=gitutils.CLONE_FULL)
+        mock_clone.assert_any_call('/tmp', 'openstack/glance', 'master',
+                                   mode=gitutils.CLONE_FULL)
+        messages.error.assert_not_called()
+
+    def test_mode(self, mock_clone):
+        gitutils.safe_clone_repos(
+            '/tmp', ['openstack/nova'], 'master', mock.Mock(),
+            mode=gitutils.CLONE_REF_ONLY)
+        mock_clone.assert_called_once_with(
+            '/tmp', 'openstack/nova', 'master',
+            mode=gitutils.CLONE_REF_ONLY)
+
+    def test_errors_reported_in_order(self, mock_clone):
+        def clone(workdir, repo, ref, mode):
+            if repo != 'openstack/glance':
+                raise RuntimeError('failed ' + repo)
+        mock_clone.side_effect = clone
+        messages = mock.Mock()
+        result = gitutils.safe_clone_repos(
+            '/tmp',
+            ['openstack/nova', 'openstack/glance', 'openstack/cinder'],
+            'master', messages)
+        self.assertFalse(result)
+        self.assertEqual(
+            [mock.call('Could not clone repository openstack/nova at '
+                       'master: failed openstack/nova'),
+             mock.call('Could not clone repository openstack/cinder at '
+                       'master: failed openstack/cinder')],
+            messages.error.call_args_list,
+        )
+
+    def test_no_repos(self, mock_clone):
+        self.assertTrue(gitutils.safe_clone_repos('/tmp', [], 'master', None))
+        mock_clone.assert_not_called()
+
+
+class TestMirrors(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.upstream = self.useFixture(fixtures.TempDir()).path
+        self.root = self.useFixture(fixtures.TempDir()).path
+        self.src = self.useFixture(or_fixtures.GitRepoFixture(
+            self.upstream, 'openstack/release-test', signed=False))
+        self.src.commit('first')
+
+    def _update(self, repo='openstack/release-test'):
+        return gitutils.update_mirror(self.root, repo,
+                                      upstream=self.upstream)
+
+    def test_create_and_update(self):
+        self.assertTrue(self._update())
+        mirror = os.path.join(self.root, 'opendev.org',
+                              'openstack', 'release-test')
+        self.src.tag('1.0.0')
+        sha = self.src.commit('second')
+        self.assertTrue(self._update())
+        self.assertEqual(sha,
+                         self.src.git('rev-parse', 'master', cwd=mirror))
+        self.assertEqual('1.0.0', self.src.git('tag', cwd=mirror))
+
+    def test_create_fails(self):
+        self.assertFalse(self._update('openstack/missing'))
+        # Nothing is left behind except the lock file.
+        self.assertEqual(
+            ['missing.lock'],
+            os.listdir(os.path.join(self.root, 'opendev.org', 'openstack')),
+        )
+
+    def test_prune_least_recently_used(self):
+        self.useFixture(or_fixtures.GitRepoFixture(
+            self.upstream, 'openstack/other', signed=False)).commit('first')
+        self._update()
+        self._update('openstack/other')
+        mirrors = os.path.join(self.root, 'opendev.org', 'openstack')
+        os.utime(os.path.join(mirrors, 'release-test'), (1, 1))
+        size = cache.get_dir_size(os.path.join(mirrors, 'other'))
+        gitutils.prune_mirrors(self.root, size)
+        self.assertFalse(os.path.exists(os.path.join(mirrors,
+                                                     'release-test')))
+        self.assertTrue(os.path.exists(os.path.join(mirrors, 'other')))
+
+    def test_prune_skips_locked(self):
+        self._update()
+        mirror = os.path.join(self.root, 'opendev.org',
+                              'openstack', 'release-test')
+        with cache.lock(mirror, exclusive=False):
+            gitutils.prune_mirrors(self.root, 0)
+        self.assertTrue(os.path.exists(mirror))
+
+
+class TestCloneModes(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        self.useFixture(fixtures.EnvironmentVariable('ZUUL_CACHE_DIR',
+                                                     os.devnull))
+        self.upstream = self.useFixture(fixtures.TempDir()).path
+        self.workdir = self.useFixture(fixtures.TempDir()).path
+        self.src = self.useFixture(or_fixtures.GitRepoFixture(
+            self.upstream, 'openstack/release-test', signed=False))
+        # Let partial clones be made from the local upstream.
+        self.src.git('config', 'uploadpack.allowFilter', 'true')
+        self.src.write('setup.py', 'import setuptools\n')
+        self.src.commit('first')
+        self.dest = os.path.join(self.workdir, 'openstack', 'release-test')
+
+    def _clone(self, mode, cache_dir=None):
+        # Run the script from the top of the source tree, the way
+        # clone_repo() does.
+        top = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+        cmd = ['./tools/clone_repo.sh',
+               '--workspace', self.workdir,
+               '--upstream', 'file://' + self.upstream,
+               '--mode', mode]
+        if cache_dir:
+            cmd.extend(['--cache-dir', cache_dir])
+        cmd.append('openstack/release-test')
+        subprocess.check_output(cmd, cwd=top, stderr=subprocess.STDOUT)
+
+    def _make_cache(self):
+        # Change the file, so the clone has some history it can skip.
+        self.src.write('setup.py', 'import setuptools\nsetuptools.setup()\n')
+        self.src.commit('second')
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        # Like the zuul cache, the copy does not allow filters.
+        self.src.git('clone', '-q', '--bare', self.src.path,
+                     os.path.join(cache_dir, 'opendev.org', self.src.name))
+        return cache_dir
+
+    def _missing(self):
+        return [
+            line
+            for line in self.src.git(
+                'rev-list', '--objects', '--all', '--missing=print',
+                cwd=self.dest).splitlines()
+            if line.startswith('?')
+        ]
+
+    def _filter(self):
+        return subprocess.run(
+            ['git', 'config', 'remote.origin.partialclonefilter'],
+            cwd=self.dest, stdout=subprocess.PIPE,
+        ).stdout.decode('utf-8').strip()
+
+    def test_full(self):
+        self._clone(gitutils.CLONE_FULL)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'setup.py')))
+        self.assertEqual('', self._filter())
+
+    def test_blobless(self):
+        self._clone(gitutils.CLONE_BLOBLESS)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'setup.py')))
+        self.assertEqual('blob:none', self._filter())
+
+    def test_full_from_cache(self):
+        self._clone(gitutils.CLONE_FULL, self._make_cache())
+        self.assertEqual('', self._filter())
+        self.assertEqual([], self._missing())
+
+    def test_blobless_from_cache(self):
+        self._clone(gitutils.CLONE_BLOBLESS, self._make_cache())
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'setup.py')))
+        self.assertEqual('blob:none', self._filter())
+        # The contents of the old version of the file were skipped.
+        self.assertEqual(1, len(self._missing()))
+        self.assertEqual(
+            'file://{}/openstack/release-test'.format(self.upstream),
+            self.src.git('remote', 'get-url', 'origin', cwd=self.dest))
+
+    def test_ref_only(self):
+        self._clone(gitutils.CLONE_REF_ONLY)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'setup.py')))
+        self.assertEqual('tree:0', self._filter())
+        self.assertEqual(self.src.git('rev-parse', 'HEAD'),
+                         self.src.git('rev-parse', 'HEAD', cwd=self.dest))
+
+    def test_checkout_after_ref_only(self):
+        # The files are fetched when a later caller needs them.
+        self._clone(gitutils.CLONE_REF_ONLY)
+        self._clone(gitutils.CLONE_FULL)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'setup.py')))
+
+    def test_unknown_mode(self):
+        self.assertRaises(ValueError, gitutils.clone_repo,
+                          self.workdir, 'openstack/release-test',
+                          mode='shallow')
+
+
+class TestRepoFacts(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE'))
+        self.useFixture(fixtures.MockPatchObject(gitutils, '_repo_facts', {}))
+        self.useFixture(fixtures.MockPatchObject(
+            gitutils, '_local_tags', set()))
+        self.workdir = self.useFixture(fixtures.TempDir()).path
+        self.repo = 'openstack/release-test'
+        git_repo = self.useFixture(or_fixtures.GitRepoFixture(
+            self.workdir, self.repo, signed=False))
+        self.first = git_repo.commit('first')
+        git_repo.tag('1.0.0')
+        self.second = git_repo.commit('second')
+        git_repo.git('update-ref', 'refs/remotes/origin/master', self.second)
+        # A change that has not merged upstream.
+        self.unmerged = git_repo.commit('unmerged')
+
+    def _reload(self):
+        # Start over with only what was saved to disk.
+        gitutils._repo_facts.clear()
+
+    def test_commit_exists(self):
+        self.assertTrue(
+            gitutils.commit_exists(self.workdir, self.repo, self.second))
+        self._reload()
+        with mock.patch.object(gitutils.processutils,
+                               'check_output') as check_output:
+            self.assertTrue(
+                gitutils.commit_exists(self.workdir, self.repo, self.second))
+        check_output.assert_not_called()
+
+    def test_unmerged_commit_not_remembered(self):
+        self.assertTrue(
+            gitutils.commit_exists(self.workdir, self.repo, self.unmerged))
+        self.assertIsNone(
+            gitutils._get_facts(self.repo).get('exists', self.unmerged))
+
+    def test_missing_commit_not_remembered(self):
+        sha = '0' * 40
+        self.assertFalse(gitutils.commit_exists(self.workdir, self.repo, sha))
+        self.assertIsNone(gitutils._get_facts(self.repo).get('exists', sha))
+
+    def test_sha_for_tag(self):
+        self.assertEqual(
+            self.first,
+            gitutils.sha_for_tag(self.workdir, self.repo, '1.0.0'))
+        self._reload()
+        with mock.patch.object(gitutils.processutils,
+                               'check_output') as check_output:
+            self.assertEqual(
+                self.first,
+                gitutils.sha_for_tag(self.workdir, self.repo, '1.0.0'))
+            self.assertTrue(
+                gitutils.commit_exists(self.workdir, self.repo, '1.0.0'))
+        check_output.assert_not_called()
+
+    def test_branch_not_remembered(self):
+        self.assertEqual(
+            self.unmerged,
+            gitutils.sha_for_tag(self.workdir, self.repo, 'master'))
+        self.assertIsNone(
+            gitutils._get_facts(self.repo).get('tag', 'master'))
+
+    def test_temporary_tag_not_remembered(self):
+        gitutils.add_tag(self.workdir, self.repo, '2.0.0', self.second)
+        self.assertEqual(
+            self.second,
+            gitutils.sha_for_tag(self.workdir, self.repo, '2.0.0'))
+        self.assertIsNone(gitutils._get_facts(self.repo).get('tag', '2.0.0'))
+        gitutils.delete_tag(self.workdir, self.repo, '2.0.0')
+        self.assertFalse(
+            gitutils.commit_exists(self.workdir, self.repo, '2.0.0'))
+
+    def test_check_ancestry(self):
+        self.assertTrue(gitutils.check_ancestry(
+            self.workdir, self.repo, '1.0.0', self.second))
+        self.assertFalse(gitutils.check_ancestry(
+            self.workdir, self.repo, self.second, self.first))
+        self._reload()
+        with mock.patch.object(gitutils.processutils,
+                               'check_output') as check_output:
+            self.assertTrue(gitutils.check_ancestry(
+                self.workdir, self.repo, '1.0.0', self.second))
+            self.assertFalse(gitutils.check_ancestry(
+                self.workdir, self.repo, self.second, self.first))
+        check_output.assert_not_called()
+
+    def test_disabled(self):
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        gitutils.commit_exists(self.workdir, self.repo, self.second)
+        self.assertEqual({}, gitutils._repo_facts)
+
+
+class TestRefSnapshot(base.BaseTestCase):
+
+    def test_parse(self):
+        output = '\n'.join([
+            'refs/heads/master\taaa\t\t',
+            'refs/remotes/origin/HEAD\taaa\t\trefs/remotes/origin/master',
+            'refs/remotes/origin/master\taaa\t\t',
+            'refs/remotes/origin/stable/ocata\tbbb\t\t',
+            'refs/tags/1.0.0\tccc\tddd\t',
+            'refs/tags/light\teee\t\t',
+        ])
+        refs = gitutils.RefSnapshot(output)
+        self.assertEqual(
+            {'master': 'aaa',
+             'remotes/origin/master': 'aaa',
+             'remotes/origin/stable/ocata': 'bbb'},
+            refs.branches,
+        )
+        self.assertEqual({'1.0.0': 'ddd', 'light': 'eee'}, refs.tags)
+
+
+class TestGetRefs(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        self.useFixture(fixtures.MockPatchObject(
+            gitutils, '_ref_snapshots', {}))
+        self.workdir = self.useFixture(fixtures.TempDir()).path
+        self.repo = 'openstack/release-test'
+        git_repo = self.useFixture(or_fixtures.GitRepoFixture(
+            self.workdir, self.repo, signed=False))
+        self.sha = git_repo.commit('first')
+        git_repo.tag('1.0.0')
+        git_repo.git('branch', 'stable/ocata')
+
+    def test_snapshot(self):
+        refs = gitutils.get_refs(self.workdir, self.repo)
+        self.assertEqual({'1.0.0': self.sha}, refs.tags)
+        self.assertEqual(['master', 'stable/ocata'],
+                         gitutils.get_branches(self.workdir, self.repo))
+        self.assertIs(refs, gitutils.get_refs(self.workdir, self.repo))
+
+    def test_sha_for_tag_uses_snapshot(self):
+        gitutils.get_refs(self.workdir, self.repo)
+        with mock.patch.object(gitutils.processutils,
+                               'check_output') as check_output:
+            self.assertEqual(
+                self.sha,
+                gitutils.sha_for_tag(self.workdir, self.repo, '1.0.0'))
+        check_output.assert_not_called()
+
+    def test_add_and_delete_tag(self):
+        gitutils.get_refs(self.workdir, self.repo)
+        gitutils.add_tag(self.workdir, self.repo, '2.0.0', self.sha)
+        self.assertIn('2.0.0', gitutils.get_refs(self.workdir, self.repo).tags)
+        gitutils.delete_tag(self.workdir, self.repo, '2.0.0')
+        self.assertNotIn('2.0.0',
+                         gitutils.get_refs(self.workdir, self.repo).tags)
+
+    def test_checkout_ref(self):
+        refs = gitutils.get_refs(self.workdir, self.repo)
+        gitutils.checkout_ref(self.workdir, self.repo, 'stable/ocata')
+        self.assertIsNot(refs, gitutils.get_refs(self.workdir, self.repo))
+
+
+class TestObjectReader(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        self.workdir = self.useFixture(fixtures.TempDir()).path
+        self.repo = 'openstack/release-test'
+        git_repo = self.useFixture(or_fixtures.GitRepoFixture(
+            self.workdir, self.repo, signed=False))
+        self.sha = git_repo.commit('first')
+        git_repo.tag('1.0.0')
+        self.tag_sha = git_repo.git('rev-parse', '1.0.0')
+        self.reader = gitutils.ObjectReader(self.workdir, self.repo)
+        self.addCleanup(self.reader.close)
+
+    def test_lookup_many(self):
+        self.assertEqual(
+            [(self.sha, 'commit'),
+             (self.tag_sha, 'tag'),
+             (self.sha, 'commit'),
+             None,
+             None,
+             None],
+            self.reader.lookup_many(
+                ['master', '1.0.0', '1.0.0^{commit}', '0' * 40,
+                 'no-such-branch', 'has space']),
+        )
+
+    def test_more_than_one_chunk(self):
+        refs = ['master'] * (gitutils.ObjectReader._CHUNK_SIZE * 2 + 1)
+        results = self.reader.lookup_many(refs)
+        self.assertEqual([(self.sha, 'commit')] * len(refs), results)
+
+    def test_restart_after_exit(self):
+        self.assertEqual((self.sha, 'commit'), self.reader.lookup('master'))
+        self.reader._proc.kill()
+        self.reader._proc.wait()
+        self.assertEqual((self.sha, 'commit'), self.reader.lookup('master'))
+
+    def test_closed(self):
+        self.assertEqual((self.sha, 'commit'), self.reader.lookup('master'))
+        self.reader.close()
+        self.assertRaises(gitutils.ObjectReaderClosed,
+                          self.reader.lookup, 'master')
+        self.assertRaises(gitutils.ObjectReaderClosed,
+                          self.reader.read, 'master')
+        self.assertIsNone(self.reader._proc)
+        self.assertIsNone(self.reader._contents_proc)
+
+    def test_closed_while_in_use(self):
+        old = gitutils.get_object_reader(self.workdir, self.repo)
+        readers = []
+
+        def lookup(reader):
+            readers.append(reader)
+            if len(readers) == 1:
+                # Another thread changes the refs after this one got
+                # the reader.
+                gitutils._forget_refs(self.workdir, self.repo)
+            return reader.lookup('master')
+
+        self.assertEqual(
+            (self.sha, 'commit'),
+            gitutils._use_object_reader(self.workdir, self.repo, lookup))
+        self.assertIs(old, readers[0])
+        self.assertIsNot(old, readers[1])
+        self.assertIsNone(old._proc)
+
+    def test_helpers(self):
+        self.assertTrue(
+            gitutils.commit_exists(self.workdir, self.repo, self.sha))
+        self.assertFalse(
+            gitutils.commit_exists(self.workdir, self.repo, '0' * 40))
+        self.assertEqual(
+            self.sha,
+            gitutils.sha_for_tag(self.workdir, self.repo, 'master'))
+        self.assertEqual(
+            '', gitutils.sha_for_tag(self.workdir, self.repo, 'missing'))
+
+
+class TestWorktreePool(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        self.workdir = self.useFixture(fixtures.TempDir()).path
+        self.repo = 'openstack/release-test'
+        self.git_repo = self.useFixture(or_fixtures.GitRepoFixture(
+            self.workdir, self.repo, signed=False))
+        self._commit('1.0.0')
+        self.git_repo.tag('1.0.0')
+        self._commit('2.0.0')
+        self.pool = gitutils.WorktreePool(self.workdir, max_size=1)
+        self.addCleanup(self.pool.close)
+
+    def _commit(self, version):
+        self.git_repo.write('VERSION', version)
+        self.git_repo.commit(version)
+
+    def _read(self, root):
+        with open(os.path.join(root, self.repo, 'VERSION')) as f:
+            return f.read()
+
+    def test_several_refs(self):
+        with self.pool.checkout(self.repo, '1.0.0') as old:
+            with self.pool.checkout(self.repo, 'master') as new:
+                self.assertEqual('1.0.0', self._read(old))
+                self.assertEqual('2.0.0', self._read(new))
+        # The main working tree is not changed.
+        self.assertEqual('2.0.0', self._read(self.workdir))
+        self.assertEqual(
+            'master', self.git_repo.git('rev-parse', '--abbrev-ref', 'HEAD'))
+
+    def test_reuse(self):
+        with self.pool.checkout(self.repo, '1.0.0') as first:
+            pass
+        with self.pool.checkout(self.repo, '1.0.0') as second:
+            pass
+        self.assertEqual(first, second)
+
+    def test_evict_least_recently_used(self):
+        with self.pool.checkout(self.repo, '1.0.0') as old:
+            pass
+        with self.pool.checkout(self.repo, 'master') as new:
+            # The worktree in use is not counted.
+            self.assertTrue(os.path.exists(old))
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(new))
+        self.assertNotIn(old, self.git_repo.git('worktree', 'list'))
+
+    def test_bad_ref(self):
+        self.assertRaises(
+            processutils.CalledProcessError,
+            self.pool.acquire, self.repo, 'no-such-ref',
+        )
+        self.assertEqual({}, dict(self.pool._entries))
+
+    def test_close(self):
+        with self.pool.checkout(self.repo, '1.0.0') as old:
+            pass
+        self.pool.close()
+        self.assertFalse(os.path.exists(old))
+        self.assertEqual(
+            1, len(self.git_repo.git('worktree', 'list').splitlines()))
+
+
+class TestReadAtRef(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        self.workdir = self.useFixture(fixtures.TempDir()).path
+        self.repo = 'openstack/release-test'
+        git_repo = self.useFixture(or_fixtures.GitRepoFixture(
+            self.workdir, self.repo, signed=False))
+        git_repo.write('metadata.json', '{"version": "1.0.0"}')
+        git_repo.write('lib/module.rb', '')
+        git_repo.commit('first')
+        git_repo.tag('1.0.0')
+        git_repo.write('metadata.json', '{"version": "2.0.0"}')
+
+    def test_read_file(self):
+        self.assertEqual(
+            '{"version": "1.0.0"}',
+            gitutils.read_file(self.workdir, self.repo, 'metadata.json',
+                               '1.0.0'))
+        # Without a ref the working tree is used.
+        self.assertEqual(
+            '{"version": "2.0.0"}',
+            gitutils.read_file(self.workdir, self.repo, 'metadata.json'))
+
+    def test_read_missing_file(self):
+        for name, ref in [('missing.json', '1.0.0'),
+                          ('metadata.json', 'no-such-ref'),
+                          ('lib', '1.0.0')]:
+            self.assertRaises(FileNotFoundError, gitutils.read_file,
+                              self.workdir, self.repo, name, ref)
+
+    def test_list_dir(self):
+        self.assertEqual(
+            [('lib', True), ('metadata.json', False)],
+            gitutils.list_dir(self.workdir, self.repo, '', '1.0.0'))
+        self.assertEqual(
+            [('module.rb', False)],
+            gitutils.list_dir(self.workdir, self.repo, 'lib', '1.0.0'))
+        self.assertRaises(FileNotFoundError, gitutils.list_dir,
+                          self.workdir, self.repo, 'metadata.json', '1.0.0')
+
+    def test_path_exists(self):
+        self.assertTrue(gitutils.path_exists(
+            self.workdir, self.repo, 'lib', '1.0.0'))
+        self.assertFalse(gitutils.path_exists(
+            self.workdir, self.repo, 'manifests', '1.0.0'))
+        self.assertFalse(gitutils.path_exists(
+            self.workdir, 'openstack/missing', 'lib', '1.0.0'))
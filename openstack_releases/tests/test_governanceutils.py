@@ -0,0 +1,167 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import textwrap
+from unittest import mock
+
+import fixtures
+from oslotest import base
+
+from openstack_releases import governanceutils
+
+_FILES = {
+    'reference/projects.yaml': textwrap.dedent('''
+    oslo:
+      ptl:
+        name: Someone
+        irc: someone
+      deliverables:
+        oslo.config:
+          repos:
+            - openstack/oslo.config
+        oslo.log:
+          repos:
+            - openstack/oslo.log
+    nova:
+      deliverables:
+        nova:
+          repos:
+            - openstack/nova
+            - openstack/python-novaclient
+    '''),
+    'reference/technical-committee-repos.yaml': textwrap.dedent('''
+    Technical Committee:
+      - repo: openstack/governance
+    '''),
+    'reference/sigs-repos.yaml': textwrap.dedent('''
+    security:
+      - repo: openstack/ossa
+    '''),
+}
+
+
+class TestIndexedGovernance(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        root = self.useFixture(fixtures.TempDir()).path
+        os.mkdir(os.path.join(root, 'reference'))
+        for filename, body in _FILES.items():
+            with open(os.path.join(root, filename), 'w') as f:
+                f.write(body)
+        self.gov = governanceutils.load_local_governance(root)
+
+    def test_get_team(self):
+        self.assertEqual('oslo', self.gov.get_team('oslo').name)
+        self.assertEqual('security SIG',
+                         self.gov.get_team('security SIG').name)
+        self.assertRaises(ValueError, self.gov.get_team, 'nosuchteam')
+
+    def test_get_repository(self):
+        repo = self.gov.get_repository('openstack/python-novaclient')
+        self.assertEqual('nova', repo.deliverable.name)
+        self.assertEqual('nova', repo.deliverable.team.name)
+        self.assertIsNone(self.gov.get_repository('openstack/unknown'))
+
+    def test_get_repo_owner(self):
+        self.assertEqual('oslo',
+                         self.gov.get_repo_owner('openstack/oslo.log'))
+        self.assertEqual('Technical Committee',
+                         self.gov.get_repo_owner('openstack/governance'))
+        self.assertRaises(ValueError, self.gov.get_repo_owner,
+                          'openstack/unknown')
+
+    def test_get_repositories(self):
+        self.assertEqual(
+            ['openstack/nova', 'openstack/python-novaclient'],
+            sorted(r.name for r in self.gov.get_repositories(
+                deliverable_name='nova')))
+        self.assertEqual(
+            [], list(self.gov.get_repositories(deliverable_name='unknown')))
+        self.assertEqual(
+            ['openstack/oslo.config', 'openstack/oslo.log'],
+            sorted(r.name for r in self.gov.get_repositories(
+                team_name='oslo')))
+        self.assertEqual(6, len(list(self.gov.get_repositories())))
+
+
+class TestGetGovernance(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_CACHE_DIR',
+            self.useFixture(fixtures.TempDir()).path))
+        self.useFixture(fixtures.EnvironmentVariable(
+            governanceutils.OFFLINE_ENV))
+        self.useFixture(fixtures.MonkeyPatch(
+            'openstack_releases.governanceutils._governance', None))
+        self.now = 1000
+        self.useFixture(fixtures.MockPatch(
+            'time.time', side_effect=lambda: self.now))
+        self.get = self.useFixture(fixtures.MockPatch(
+            'openstack_releases.httputils.get',
+            side_effect=self._get)).mock
+
+    def _get(self, url):
+        filename = url.partition('/branch/master/')[-1]
+        return mock.Mock(status_code=200, text=_FILES[filename])
+
+    def _forget_loaded(self):
+        # Forget what this process loaded, so the disk cache is used.
+        governanceutils._governance = None
+
+    def test_fetch(self):
+        gov = governanceutils.get_governance()
+        self.assertEqual('oslo', gov.get_repo_owner('openstack/oslo.config'))
+        self.assertEqual(3, self.get.call_count)
+        self.assertIs(gov, governanceutils.get_governance())
+        self.assertEqual(3, self.get.call_count)
+
+    def test_cached(self):
+        governanceutils.get_governance()
+        self._forget_loaded()
+        self.now += governanceutils.GOVERNANCE_TTL - 1
+        gov = governanceutils.get_governance()
+        self.assertEqual('oslo', gov.get_team('oslo').name)
+        self.assertEqual(3, self.get.call_count)
+
+    def test_expired(self):
+        governanceutils.get_governance()
+        self._forget_loaded()
+        self.now += governanceutils.GOVERNANCE_TTL
+        governanceutils.get_governance()
+        self.assertEqual(6, self.get.call_count)
+
+    def test_refresh_failed(self):
+        governanceutils.get_governance()
+        self._forget_loaded()
+        self.now += governanceutils.GOVERNANCE_TTL
+        self.get.side_effect = IOError('no network')
+        gov = governanceutils.get_governance()
+        self.assertEqual('oslo', gov.get_team('oslo').name)
+
+    def test_offline(self):
+        governanceutils.get_governance()
+        self._forget_loaded()
+        self.now += governanceutils.GOVERNANCE_TTL * 10
+        self.useFixture(fixtures.EnvironmentVariable(
+            governanceutils.OFFLINE_ENV, '1'))
+        gov = governanceutils.get_governance()
+        self.assertEqual('oslo', gov.get_team('oslo').name)
+        self.assertEqual(3, self.get.call_count)
+
+    def test_offline_without_snapshot(self):
+        self.assertRaises(RuntimeError, governanceutils.get_governance,
+                          offline=True)
+        self.get.assert_not_called()
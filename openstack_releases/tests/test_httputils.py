@@ -0,0 +1,84 @@
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+import fixtures
+from oslotest import base
+
+from openstack_releases import httputils
+
+
+class TestSession(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for name in [httputils.TIMEOUT_ENV, httputils.RETRIES_ENV,
+                     httputils.BACKOFF_ENV]:
+            self.useFixture(fixtures.EnvironmentVariable(name))
+        self.useFixture(fixtures.MockPatchObject(httputils, '_session', None))
+
+    def _get_retry(self, session):
+        return session.get_adapter('https://example.com').max_retries
+
+    def test_defaults(self):
+        retry = self._get_retry(httputils.make_session())
+        self.assertEqual(httputils.DEFAULT_RETRIES, retry.total)
+        self.assertEqual(httputils.DEFAULT_BACKOFF, retry.backoff_factor)
+        self.assertIn(503, retry.status_forcelist)
+        self.assertEqual(httputils.DEFAULT_TIMEOUT, httputils.get_timeout())
+
+    def test_settings_from_environment(self):
+        self.useFixture(fixtures.EnvironmentVariable(
+            httputils.RETRIES_ENV, '7'))
+        self.useFixture(fixtures.EnvironmentVariable(
+            httputils.BACKOFF_ENV, '2.5'))
+        self.useFixture(fixtures.EnvironmentVariable(
+            httputils.TIMEOUT_ENV, '5'))
+        retry = self._get_retry(httputils.make_session())
+        self.assertEqual(7, retry.total)
+        self.assertEqual(2.5, retry.backoff_factor)
+        self.assertEqual(5.0, httputils.get_timeout())
+
+    def test_invalid_setting_ignored(self):
+        self.useFixture(fixtures.EnvironmentVariable(
+            httputils.RETRIES_ENV, 'lots'))
+        retry = self._get_retry(httputils.make_session())
+        self.assertEqual(httputils.DEFAULT_RETRIES, retry.total)
+
+    def test_session_shared(self):
+        self.assertIs(httputils.get_session(), httputils.get_session())
+
+    def test_new_session_after_fork(self):
+        session = httputils.get_session()
+        with mock.patch('os.getpid', return_value=-1):
+            self.assertIsNot(session, httputils.get_session())
+
+    def test_get_uses_default_timeout(self):
+        self.useFixture(fixtures.EnvironmentVariable(
+            httputils.TIMEOUT_ENV, '5'))
+        with mock.patch.object(httputils, 'get_session') as get_session:
+            httputils.get('https://example.com', params={'a': 'b'})
+        get_session.return_value.request.assert_called_once_with(
+            'GET', 'https://example.com',
+            params={'a': 'b'}, timeout=5.0, allow_redirects=True,
+        )
+
+    def test_head_keeps_timeout(self):
+        with mock.patch.object(httputils, 'get_session') as get_session:
+            httputils.head('https://example.com', timeout=1)
+        get_session.return_value.request.assert_called_once_with(
+            'HEAD', 'https://example.com',
+            timeout=1, allow_redirects=False,
+        )
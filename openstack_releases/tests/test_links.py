@@ -0,0 +1,96 @@
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import threading
+import time
+from unittest import mock
+
+from oslotest import base
+
+from openstack_releases import links
+
+
+class TestLinkChecker(base.BaseTestCase):
+
+    def test_results(self):
+        def check(url):
+            return (url.endswith('found'), None)
+
+        with mock.patch.object(links, '_check_link', side_effect=check):
+            with links.LinkChecker() as checker:
+                checker.add('https://a/found', 'https://a/missing')
+                self.assertTrue(checker.exists('https://a/found'))
+                self.assertFalse(checker.exists('https://a/missing'))
+                self.assertTrue(checker.exists('https://b/found'))
+
+    def test_each_link_checked_once(self):
+        with mock.patch.object(links, '_check_link',
+                               return_value=(True, None)) as check:
+            with links.LinkChecker() as checker:
+                checker.add('https://a/1', 'https://a/1')
+                checker.exists('https://a/1')
+                checker.exists('https://a/1')
+        check.assert_called_once_with('https://a/1')
+
+    def test_error_printed_when_asked(self):
+        with mock.patch.object(links, '_check_link',
+                               return_value=(False, 'no route')):
+            with links.LinkChecker() as checker:
+                checker.add('https://a/1')
+                with mock.patch('sys.stdout',
+                                new_callable=io.StringIO) as out:
+                    self.assertFalse(checker.exists('https://a/1'))
+        self.assertEqual('no route\n', out.getvalue())
+
+    def test_per_host_limit(self):
+        lock = threading.Lock()
+        active = {}
+        most_active = {}
+
+        def check(url):
+            host = url.split('/')[2]
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                most_active[host] = max(most_active.get(host, 0),
+                                        active[host])
+            time.sleep(0.01)
+            with lock:
+                active[host] -= 1
+            return (True, None)
+
+        urls = ['https://{}/{}'.format(host, i)
+                for host in ['a', 'b'] for i in range(6)]
+        with mock.patch.object(links, '_check_link', side_effect=check):
+            with links.LinkChecker(max_workers=8, per_host=2) as checker:
+                checker.add(*urls)
+                for url in urls:
+                    checker.exists(url)
+        self.assertEqual({'a': 2, 'b': 2}, most_active)
+
+    def test_min_interval(self):
+        starts = []
+
+        def check(url):
+            starts.append(time.monotonic())
+            return (True, None)
+
+        with mock.patch.object(links, '_check_link', side_effect=check):
+            with links.LinkChecker(per_host=3, min_interval=0.05) as checker:
+                checker.add('https://a/1', 'https://a/2', 'https://a/3')
+                checker.exists('https://a/3')
+                checker.exists('https://a/2')
+                checker.exists('https://a/1')
+        starts.sort()
+        self.assertGreaterEqual(starts[2] - starts[0], 0.09)
@@ -12,13 +12,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
 import os.path
 import textwrap
+from unittest import mock
 
+import fixtures
 from oslotest import base
 
 from openstack_releases.cmds import validate
 from openstack_releases import deliverable
+from openstack_releases import gitutils
 from openstack_releases import project_config
 from openstack_releases.tests import fixtures as or_fixtures
 
@@ -215,6 +219,22 @@ class TestReleaseJobsInTree(base.BaseTestCase):
             self.ctx.workdir, self.repo.name)
         self.assertEqual(['noop-jobs', 'publish-to-pypi'], templates)
 
+    def test_at_ref(self):
+        filename = os.path.join(self.repo.path, 'zuul.d/projects.yaml')
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(textwrap.dedent('''
+            - project:
+                templates:
+                  - publish-to-pypi
+            '''))
+        sha = self.repo.commit()
+        # Changes in the working tree are ignored.
+        os.unlink(filename)
+        self.addCleanup(gitutils._close_object_readers)
+        templates = project_config.read_templates_from_repo(
+            self.ctx.workdir, self.repo.name, ref=sha)
+        self.assertEqual(['publish-to-pypi'], templates)
+
     def test_dot_zuul_dot_d(self):
         filename = os.path.join(self.repo.path, '.zuul.d/projects.yaml')
         with open(filename, 'w', encoding='utf-8') as f:
@@ -227,3 +247,109 @@ class TestReleaseJobsInTree(base.BaseTestCase):
         templates = project_config.read_templates_from_repo(
             self.ctx.workdir, self.repo.name)
         self.assertEqual(['noop-jobs', 'publish-to-pypi'], templates)
+
+
+class TestGetZuulProjectData(base.BaseTestCase):
+
+    _BODY = textwrap.dedent('''
+    - project:
+        name: openstack/oslo.config
+        templates:
+          - publish-to-pypi
+    - project:
+        name: openstack/nova
+    ''')
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_CACHE_DIR',
+            self.useFixture(fixtures.TempDir()).path))
+        self.useFixture(fixtures.EnvironmentVariable(
+            project_config.PROJECT_CONFIG_DIR_ENV))
+        self.useFixture(fixtures.MockPatchObject(
+            project_config, '_zuul_projects', {}))
+        self.now = 1000
+        self.useFixture(fixtures.MockPatch(
+            'time.time', side_effect=lambda: self.now))
+        self.get = self.useFixture(fixtures.MockPatch(
+            'openstack_releases.httputils.get')).mock
+        self.get.return_value = mock.Mock(
+            status_code=200,
+            text=self._BODY,
+            headers={'ETag': '"abc"'},
+        )
+        self.expected = {
+            'openstack/oslo.config': {
+                'name': 'openstack/oslo.config',
+                'templates': ['publish-to-pypi'],
+            },
+            'openstack/nova': {'name': 'openstack/nova'},
+        }
+
+    def test_fetch(self):
+        self.assertEqual(self.expected,
+                         project_config.get_zuul_project_data())
+        self.get.assert_called_once_with(
+            project_config.ZUUL_PROJECTS_URL, headers={})
+
+    def test_cached(self):
+        project_config.get_zuul_project_data()
+        # Forget what this process loaded, so the disk cache is used.
+        project_config._zuul_projects.clear()
+        self.now += project_config.ZUUL_PROJECTS_TTL - 1
+        self.assertEqual(self.expected,
+                         project_config.get_zuul_project_data())
+        self.assertEqual(1, self.get.call_count)
+
+    def test_not_modified(self):
+        project_config.get_zuul_project_data()
+        self.now += project_config.ZUUL_PROJECTS_TTL
+        self.get.return_value = mock.Mock(status_code=304)
+        self.assertEqual(self.expected,
+                         project_config.get_zuul_project_data())
+        self.get.assert_called_with(
+            project_config.ZUUL_PROJECTS_URL,
+            headers={'If-None-Match': '"abc"'})
+
+    def test_refresh_failed(self):
+        project_config.get_zuul_project_data()
+        self.now += project_config.ZUUL_PROJECTS_TTL
+        self.get.return_value = mock.Mock(status_code=503)
+        self.assertEqual(self.expected,
+                         project_config.get_zuul_project_data())
+
+    def test_fetch_failed(self):
+        self.get.return_value = mock.Mock(status_code=503, text='error')
+        self.assertRaises(RuntimeError,
+                          project_config.get_zuul_project_data)
+        self.assertEqual({}, project_config._zuul_projects)
+        self.assertIsNone(project_config._load_entry(
+            project_config.ZUUL_PROJECTS_URL))
+
+    def test_changed(self):
+        project_config.get_zuul_project_data()
+        self.now += project_config.ZUUL_PROJECTS_TTL
+        self.get.return_value = mock.Mock(
+            status_code=200,
+            text='- project:\n    name: openstack/nova\n',
+            headers={},
+        )
+        self.assertEqual({'openstack/nova': {'name': 'openstack/nova'}},
+                         project_config.get_zuul_project_data())
+
+    def test_local_checkout(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        os.mkdir(os.path.join(tmpdir, 'zuul.d'))
+        filename = os.path.join(tmpdir, 'zuul.d', 'projects.yaml')
+        with open(filename, 'w') as f:
+            f.write(self._BODY)
+        self.useFixture(fixtures.EnvironmentVariable(
+            project_config.PROJECT_CONFIG_DIR_ENV, tmpdir))
+        self.assertEqual(self.expected,
+                         project_config.get_zuul_project_data())
+        self.get.assert_not_called()
+        with open(filename, 'a') as f:
+            f.write('- project:\n    name: openstack/oslo.log\n')
+        self.assertIn('openstack/oslo.log',
+                      project_config.get_zuul_project_data())
@@ -0,0 +1,445 @@
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import textwrap
+from unittest import mock
+import xmlrpc.client
+
+import fixtures
+from oslotest import base
+
+from openstack_releases import pythonutils
+from openstack_releases.tests import fixtures as or_fixtures
+
+
+class TestBuildCache(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.workdir = self.useFixture(fixtures.TempDir()).path
+        self.repo = 'openstack/release-test'
+        self.git_repo = self.useFixture(or_fixtures.GitRepoFixture(
+            self.workdir, self.repo, signed=False))
+        self.cache_dir = self.git_repo.cache_dir
+        self.path = self.git_repo.path
+        self.git_repo.write('setup.py', 'import setuptools\n')
+        self.git_repo.commit('first')
+        self.builds = []
+        # Build without a shared environment.
+        self.useFixture(fixtures.MockPatch(
+            'openstack_releases.pythonutils.get_build_requirements',
+            return_value=None,
+        ))
+        self.useFixture(fixtures.MockPatch(
+            'openstack_releases.processutils.check_call',
+            side_effect=self._build,
+        ))
+
+    def _build(self, cmd, cwd, env):
+        self.builds.append(cwd)
+        os.makedirs(os.path.join(cwd, 'dist'))
+        with open(os.path.join(cwd, 'dist', 'test.tar.gz'), 'w') as f:
+            f.write('sdist')
+        os.makedirs(os.path.join(cwd, 'test.egg-info'))
+        with open(os.path.join(cwd, 'test.egg-info', 'requires.txt'),
+                  'w') as f:
+            f.write('pbr\n')
+
+    def _clone(self):
+        workdir = self.useFixture(fixtures.TempDir()).path
+        os.makedirs(os.path.join(workdir, 'openstack'))
+        self.git_repo.git('clone', '-q', self.path,
+                          os.path.join(workdir, self.repo))
+        return workdir
+
+    def test_reuse(self):
+        pythonutils.build_sdist(self.workdir, self.repo)
+        other = self._clone()
+        pythonutils.build_sdist(other, self.repo)
+        self.assertEqual([self.path], self.builds)
+        dest = os.path.join(other, self.repo)
+        self.assertTrue(os.path.exists(
+            os.path.join(dest, 'dist', 'test.tar.gz')))
+        self.assertTrue(os.path.exists(
+            os.path.join(dest, 'test.egg-info', 'requires.txt')))
+
+    def test_new_tag(self):
+        pythonutils.build_sdist(self.workdir, self.repo)
+        self.git_repo.tag('1.0.0')
+        other = self._clone()
+        pythonutils.build_sdist(other, self.repo)
+        self.assertEqual(2, len(self.builds))
+
+    def test_local_changes(self):
+        with open(os.path.join(self.path, 'setup.py'), 'a') as f:
+            f.write('setuptools.setup()\n')
+        pythonutils.build_sdist(self.workdir, self.repo)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.cache_dir, 'builds')))
+
+    def test_disabled(self):
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        pythonutils.build_sdist(self.workdir, self.repo)
+        pythonutils.build_sdist(self._clone(), self.repo)
+        self.assertEqual(2, len(self.builds))
+
+    def test_prune(self):
+        root = os.path.join(self.cache_dir, 'builds')
+        for name, mtime in [('old', 1), ('new', 2)]:
+            os.makedirs(os.path.join(root, name))
+            with open(os.path.join(root, name, 'file'), 'w') as f:
+                f.write('x' * 10)
+            os.utime(os.path.join(root, name), (mtime, mtime))
+        pythonutils.prune_builds(root, 10)
+        self.assertEqual(['new'], os.listdir(root))
+
+
+class TestGetSdistName(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.workdir = self.useFixture(fixtures.TempDir()).path
+        self.repo = 'openstack/release-test'
+        self.git_repo = self.useFixture(or_fixtures.GitRepoFixture(
+            self.workdir, self.repo, signed=False))
+        self.git_repo.write(
+            'setup.py',
+            'import setuptools\n'
+            "setuptools.setup(setup_requires=['pbr'], pbr=True)\n")
+        self.git_repo.write('setup.cfg',
+                            '[metadata]\nname = release-test\n')
+        self.run_setup = self.useFixture(fixtures.MockPatch(
+            'openstack_releases.pythonutils._run_setup_name',
+            return_value='from-setup',
+        )).mock
+
+    def test_setup_cfg(self):
+        self.git_repo.commit()
+        self.assertEqual('release-test',
+                         pythonutils.get_sdist_name(self.workdir, self.repo))
+        self.run_setup.assert_not_called()
+
+    def test_pyproject(self):
+        self.git_repo.write('pyproject.toml',
+                            '[project]\nname = "other-name"\n')
+        self.assertEqual('other-name',
+                         pythonutils.get_static_sdist_name(self.workdir,
+                                                           self.repo))
+
+    def test_dynamic_name(self):
+        self.git_repo.write('pyproject.toml',
+                            '[project]\ndynamic = ["name"]\n')
+        self.assertIsNone(
+            pythonutils.get_static_sdist_name(self.workdir, self.repo))
+
+    def test_name_in_setup_py(self):
+        self.git_repo.write(
+            'setup.py', "import setuptools\nsetuptools.setup(name='x')\n")
+        self.assertEqual('from-setup',
+                         pythonutils.get_sdist_name(self.workdir, self.repo))
+
+    def test_remembered_for_commit(self):
+        self.git_repo.write('setup.cfg',
+                            '[metadata]\nname = attr: pkg.NAME\n')
+        self.git_repo.commit()
+        self.assertEqual('from-setup',
+                         pythonutils.get_sdist_name(self.workdir, self.repo))
+        self.assertEqual('from-setup',
+                         pythonutils.get_sdist_name(self.workdir, self.repo))
+        self.assertEqual(1, self.run_setup.call_count)
+
+    def test_not_remembered_with_changes(self):
+        self.git_repo.write('setup.cfg',
+                            '[metadata]\nname = attr: pkg.NAME\n')
+        self.git_repo.commit()
+        self.git_repo.write('setup.py', '# changed\n')
+        pythonutils.get_sdist_name(self.workdir, self.repo)
+        pythonutils.get_sdist_name(self.workdir, self.repo)
+        self.assertEqual(2, self.run_setup.call_count)
+
+
+class TestBuildEnv(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_CACHE_DIR', self.cache_dir))
+        self.workdir = self.useFixture(fixtures.TempDir()).path
+        self.repo = 'openstack/release-test'
+        self.path = os.path.join(self.workdir, self.repo)
+        os.makedirs(self.path)
+        self._write('setup.py', textwrap.dedent('''
+            import setuptools
+            setuptools.setup(setup_requires=['pbr>=2.0.0'], pbr=True)
+            '''))
+        self.created = []
+        self.useFixture(fixtures.MockPatch(
+            'openstack_releases.pythonutils._create_build_env',
+            side_effect=self._create,
+        ))
+
+    def _write(self, name, body):
+        with open(os.path.join(self.path, name), 'w') as f:
+            f.write(body)
+
+    def _create(self, path, requires):
+        self.created.append(requires)
+        os.makedirs(path)
+        with open(os.path.join(path, '.ready'), 'w'):
+            pass
+
+    def test_requirements_from_setup_py(self):
+        self.assertEqual(
+            ['pbr>=2.0.0', 'setuptools>=40.8.0'],
+            pythonutils.get_build_requirements(self.workdir, self.repo))
+
+    def test_requirements_from_pyproject(self):
+        self._write('pyproject.toml', textwrap.dedent('''
+            [build-system]
+            requires = ["pbr>=6.0.0", "setuptools>=64.0.0"]
+            '''))
+        self.assertEqual(
+            ['pbr>=2.0.0', 'pbr>=6.0.0', 'setuptools>=64.0.0'],
+            pythonutils.get_build_requirements(self.workdir, self.repo))
+
+    def test_dynamic_setup_requires(self):
+        self._write('setup.py', textwrap.dedent('''
+            import setuptools
+            setuptools.setup(setup_requires=REQUIRES)
+            '''))
+        self.assertIsNone(
+            pythonutils.get_build_requirements(self.workdir, self.repo))
+
+    def test_reuse(self):
+        with pythonutils.build_env(['pbr']) as first:
+            pass
+        with pythonutils.build_env(['pbr']) as second:
+            pass
+        with pythonutils.build_env(['pbr', 'setuptools']) as third:
+            pass
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertEqual([['pbr'], ['pbr', 'setuptools']], self.created)
+
+    def test_unknown_requirements(self):
+        with pythonutils.build_env(None) as python:
+            self.assertIsNone(python)
+        self.assertEqual([], self.created)
+
+    def test_prune(self):
+        with pythonutils.build_env(['a']) as old:
+            pass
+        with pythonutils.build_env(['b']) as new:
+            pass
+        old_env = os.path.dirname(os.path.dirname(old))
+        os.utime(old_env, (1, 1))
+        pythonutils.prune_build_envs(os.path.dirname(old_env), 1)
+        self.assertFalse(os.path.exists(old_env))
+        self.assertTrue(os.path.exists(os.path.dirname(os.path.dirname(new))))
+
+
+class TestPyPIInfo(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_CACHE_DIR',
+            self.useFixture(fixtures.TempDir()).path))
+        self.useFixture(fixtures.MockPatchObject(
+            pythonutils, '_pypi_info', {}))
+        self.now = 1000
+        self.useFixture(fixtures.MockPatch(
+            'time.time', side_effect=lambda: self.now))
+        self.get = self.useFixture(fixtures.MockPatch(
+            'openstack_releases.httputils.get')).mock
+        self.info = {
+            'info': {'name': 'oslo.config'},
+            'releases': {
+                '1.0.0': [
+                    {'filename': 'oslo.config-1.0.0.tar.gz',
+                     'packagetype': 'sdist'},
+                    {'filename': 'oslo.config-1.0.0-py3-none-any.whl',
+                     'packagetype': 'bdist_wheel'},
+                ],
+            },
+        }
+        self.get.return_value = self._response(200, self.info,
+                                               {'ETag': '"abc"'})
+
+    def _response(self, status, body, headers=None):
+        response = mock.Mock(status_code=status, headers=headers or {})
+        response.json.return_value = body
+        return response
+
+    def test_fetch(self):
+        self.assertEqual(self.info, pythonutils.get_pypi_info('Oslo.Config'))
+        self.get.assert_called_once_with(
+            'https://pypi.org/pypi/oslo-config/json', headers={})
+
+    def test_not_found(self):
+        self.get.return_value = self._response(404, {'message': 'Not Found'})
+        self.assertEqual({}, pythonutils.get_pypi_info('oslo.config'))
+
+    def test_reuse_within_ttl(self):
+        pythonutils.get_pypi_info('oslo.config')
+        # Forget what this process loaded, so the disk cache is used.
+        pythonutils._pypi_info.clear()
+        self.now += pythonutils.PYPI_INFO_TTL - 1
+        self.assertEqual(self.info, pythonutils.get_pypi_info('oslo.config'))
+        self.assertEqual(1, self.get.call_count)
+
+    def test_not_modified(self):
+        pythonutils.get_pypi_info('oslo.config')
+        self.now += pythonutils.PYPI_INFO_TTL + 1
+        self.get.return_value = self._response(304, None)
+        self.assertEqual(self.info, pythonutils.get_pypi_info('oslo.config'))
+        self.get.assert_called_with(
+            'https://pypi.org/pypi/oslo-config/json',
+            headers={'If-None-Match': '"abc"'})
+        # The TTL starts again.
+        self.now += 1
+        pythonutils.get_pypi_info('oslo.config')
+        self.assertEqual(2, self.get.call_count)
+
+    def test_refresh(self):
+        pythonutils.get_pypi_info('oslo.config')
+        self.now += 1
+        self.get.return_value = self._response(304, None)
+        self.assertEqual(self.info, pythonutils.get_pypi_info(
+            'oslo.config', refresh=True))
+        self.get.assert_called_with(
+            'https://pypi.org/pypi/oslo-config/json',
+            headers={'If-None-Match': '"abc"'})
+
+    def test_release_files(self):
+        self.assertEqual(
+            [{'filename': 'oslo.config-1.0.0-py3-none-any.whl',
+              'packagetype': 'bdist_wheel'},
+             {'filename': 'oslo.config-1.0.0.tar.gz',
+              'packagetype': 'sdist'}],
+            pythonutils.get_pypi_release_files('oslo.config', '1.0.0'))
+        self.assertEqual(
+            [], pythonutils.get_pypi_release_files('oslo.config', '2.0.0'))
+        self.assertEqual(1, self.get.call_count)
+
+    def test_release_files_not_found(self):
+        self.get.return_value = self._response(404, {'message': 'Not Found'})
+        self.assertIsNone(
+            pythonutils.get_pypi_release_files('oslo.config', '1.0.0'))
+
+
+class TestPyPIRolesClient(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_CACHE_DIR',
+            self.useFixture(fixtures.TempDir()).path))
+        self.now = 1000
+        self.useFixture(fixtures.MockPatch(
+            'time.time', side_effect=lambda: self.now))
+        self.sleep = self.useFixture(fixtures.MockPatch('time.sleep')).mock
+        self.proxy = self.useFixture(fixtures.MockPatch(
+            'xmlrpc.client.ServerProxy')).mock
+        self.package_roles = self.proxy.return_value.package_roles
+        self.package_roles.return_value = [
+            ['Owner', 'openstackci'],
+            ['Maintainer', 'someone'],
+            ['Other', 'nobody'],
+        ]
+        self.client = pythonutils.PyPIRolesClient()
+
+    def _throttled(self):
+        return xmlrpc.client.Fault(
+            -32500, 'HTTPTooManyRequests: The action could not be performed '
+            'because there were too many requests by the client.')
+
+    def test_get_roles(self):
+        self.assertEqual(
+            [('Owner', 'openstackci'), ('Maintainer', 'someone'),
+             ('Other', 'nobody')],
+            self.client.get_roles('oslo.config'))
+        self.package_roles.assert_called_once_with('oslo.config')
+        self.sleep.assert_not_called()
+
+    def test_reuses_connection(self):
+        self.client.get_roles('oslo.config')
+        self.client.get_roles('oslo.log')
+        self.proxy.assert_called_once_with(pythonutils.PYPI_XMLRPC_URL)
+
+    def test_cached(self):
+        self.client.get_roles('oslo.config')
+        # A new client reads the roles saved on disk.
+        client = pythonutils.PyPIRolesClient()
+        self.now += pythonutils.PYPI_ROLES_TTL - 1
+        client.get_roles('Oslo.Config')
+        self.assertEqual(1, self.package_roles.call_count)
+        self.now += 1
+        client.get_roles('oslo.config')
+        self.assertEqual(2, self.package_roles.call_count)
+
+    def test_empty_not_cached(self):
+        self.package_roles.return_value = []
+        self.assertEqual([], self.client.get_roles('oslo-config'))
+        self.package_roles.return_value = [['Owner', 'openstackci']]
+        self.assertEqual([('Owner', 'openstackci')],
+                         self.client.get_roles('oslo-config'))
+        self.assertEqual(2, self.package_roles.call_count)
+
+    def test_retry_canonical_name(self):
+        self.package_roles.side_effect = [[], [['Owner', 'openstackci']]]
+        self.assertEqual([('Owner', 'openstackci')],
+                         self.client.get_roles('Oslo_Config'))
+        self.package_roles.assert_has_calls(
+            [mock.call('Oslo_Config'), mock.call('oslo-config')])
+
+    def test_throttled(self):
+        self.package_roles.side_effect = [
+            self._throttled(),
+            self._throttled(),
+            [['Owner', 'openstackci']],
+            [['Owner', 'openstackci']],
+        ]
+        self.assertEqual([('Owner', 'openstackci')],
+                         self.client.get_roles('oslo.config'))
+        self.assertEqual(
+            [mock.call(pythonutils.PYPI_ROLES_MIN_DELAY),
+             mock.call(pythonutils.PYPI_ROLES_MIN_DELAY * 2)],
+            self.sleep.call_args_list)
+        # The wait is reduced again after a successful call.
+        self.client.get_roles('oslo.log')
+        self.sleep.assert_called_with(pythonutils.PYPI_ROLES_MIN_DELAY)
+
+    def test_throttled_too_often(self):
+        self.package_roles.side_effect = self._throttled()
+        self.assertRaises(RuntimeError, self.client.get_roles, 'oslo.config')
+        self.assertEqual(pythonutils.PYPI_ROLES_ATTEMPTS,
+                         self.package_roles.call_count)
+
+    def test_other_fault(self):
+        self.package_roles.side_effect = xmlrpc.client.Fault(1, 'broken')
+        self.assertRaises(xmlrpc.client.Fault,
+                          self.client.get_roles, 'oslo.config')
+        self.sleep.assert_not_called()
+
+    def test_get_pypi_uploaders(self):
+        self.useFixture(fixtures.MockPatchObject(
+            pythonutils, '_roles_client', self.client))
+        self.useFixture(fixtures.MockPatchObject(
+            pythonutils, '_roles_client_pid', os.getpid()))
+        self.assertEqual({'openstackci', 'someone'},
+                         pythonutils.get_pypi_uploaders('oslo.config'))
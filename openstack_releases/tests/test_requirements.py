@@ -12,13 +12,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+import subprocess
+import sys
 import textwrap
 from unittest import mock
 
+import fixtures
 from oslotest import base
 from packaging import requirements as pkg_requirements
 
 from openstack_releases import requirements
+from openstack_releases.tests import fixtures as or_fixtures
 
 
 class TestParseRequirements(base.BaseTestCase):
@@ -55,6 +60,19 @@ class TestParseRequirements(base.BaseTestCase):
             )
         )
 
+    def test_sections_normalized(self):
+        self.assertEqual(
+            [('test', 'fixtures'),
+             ('test:python_version < "3.8"', 'mock')],
+            sorted(requirements.parse_requirements(textwrap.dedent('''
+            [Test]
+            fixtures>=3.0.0
+
+            [Test:(python_version<'3.8')]
+            mock>=2.0
+            '''))),
+        )
+
 
 class TestGetMinSpecifier(base.BaseTestCase):
 
@@ -208,6 +226,21 @@ class TestCompareLowerBounds(base.BaseTestCase):
 
 class TestFindBadLowerBoundsIncreases(base.BaseTestCase):
 
+    @mock.patch('openstack_releases.requirements.get_requirements_at_ref')
+    def test_compares_both_refs(self, get_req):
+        reqs = {
+            '1.0.0': requirements.parse_requirements('pbr>=1.0\n'),
+            'abcd': requirements.parse_requirements('pbr>=2.0\n'),
+        }
+        get_req.side_effect = lambda workdir, repo, ref: reqs[ref]
+        warnings = []
+        requirements.find_bad_lower_bound_increases(
+            '/tmp', 'openstack/pbr', '1.0.0', '1.0.1', 'abcd',
+            warnings.append,
+        )
+        self.assertEqual(1, len(warnings))
+        self.assertEqual(2, get_req.call_count)
+
     @mock.patch('openstack_releases.requirements.get_requirements_at_ref')
     def test_skip_for_beta(self, get_req):
         warnings = []
@@ -251,3 +284,129 @@ class TestFindBadLowerBoundsIncreases(base.BaseTestCase):
         )
         print(warnings)
         self.assertEqual(0, len(warnings))
+
+
+class TestReadStaticRequirements(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        self.workdir = self.useFixture(fixtures.TempDir()).path
+        self.repo = 'openstack/release-test'
+        self.git_repo = self.useFixture(or_fixtures.GitRepoFixture(
+            self.workdir, self.repo, signed=False))
+        self.git_repo.write('setup.py', textwrap.dedent('''
+            import setuptools
+            setuptools.setup(setup_requires=['pbr>=2.0.0'], pbr=True)
+            '''))
+        self.git_repo.write('requirements.txt', textwrap.dedent('''
+            # The order matters.
+            pbr>=2.0.0 # Apache-2.0
+            oslo.config>=6.1.0
+            importlib-metadata>=1.7.0;python_version<'3.8'
+            '''))
+        self.git_repo.write('setup.cfg', textwrap.dedent('''
+            [metadata]
+            name = release-test
+
+            [extras]
+            test =
+              stestr>=2.0.0
+            '''))
+
+    def _read(self):
+        return requirements.read_static_requirements(
+            self.workdir, self.repo, self.git_repo.commit())
+
+    def test_pbr(self):
+        self.assertEqual(
+            textwrap.dedent('''\
+            pbr>=2.0.0
+            oslo.config>=6.1.0
+
+            [:python_version < "3.8"]
+            importlib-metadata>=1.7.0
+
+            [test]
+            stestr>=2.0.0
+            '''),
+            self._read(),
+        )
+
+    def test_extras_case(self):
+        self.git_repo.write('setup.cfg', textwrap.dedent('''
+            [metadata]
+            name = release-test
+
+            [extras]
+            Test =
+              stestr>=2.0.0
+            '''))
+        self.assertIn('\n[Test]\nstestr>=2.0.0\n', self._read())
+
+    def test_matches_egg_info(self):
+        self.git_repo.write('requirements.txt', textwrap.dedent('''
+            pbr>=2.0.0 # Apache-2.0
+            requests>=2.14.2,!=2.20.0
+            pywin32>=1.0;sys_platform=='win32'
+            '''))
+        self.git_repo.write('setup.cfg', textwrap.dedent('''
+            [metadata]
+            name = release-test
+            summary = test
+
+            [extras]
+            Test =
+              fixtures>=3.0.0 # Apache-2.0
+              mock>=2.0;python_version<'3.8'
+            other =
+              six
+            '''))
+        static = self._read()
+        subprocess.run(
+            [sys.executable, 'setup.py', '-q', 'egg_info'],
+            cwd=self.git_repo.path, check=True, capture_output=True,
+        )
+        with open(os.path.join(self.git_repo.path, 'release_test.egg-info',
+                               'requires.txt')) as f:
+            built = f.read()
+
+        def parse(body):
+            return {
+                key: str(req)
+                for key, req in requirements.parse_requirements(body).items()
+            }
+
+        self.assertEqual(parse(built), parse(static))
+
+    def test_not_pbr(self):
+        self.git_repo.write('setup.py',
+                            'import setuptools\nsetuptools.setup()\n')
+        self.assertIsNone(self._read())
+
+    def test_include(self):
+        self.git_repo.write('requirements.txt', '-r base.txt\n')
+        self.assertIsNone(self._read())
+
+    def test_install_requires(self):
+        self.git_repo.write('setup.cfg', '[options]\ninstall_requires = pbr\n')
+        self.assertIsNone(self._read())
+
+    def test_pyproject_dependencies(self):
+        self.git_repo.write('pyproject.toml',
+                            '[project]\ndependencies = ["pbr"]\n')
+        self.assertIsNone(self._read())
+
+    @mock.patch('openstack_releases.pythonutils.build_sdist')
+    def test_get_requirements_without_build(self, build_sdist):
+        self.git_repo.commit()
+        reqs = requirements.get_requirements_at_ref(
+            self.workdir, self.repo, 'HEAD')
+        build_sdist.assert_not_called()
+        self.assertEqual(
+            [('', 'oslo.config'), ('', 'pbr'),
+             (':python_version < "3.8"', 'importlib-metadata'),
+             ('test', 'stestr')],
+            sorted(reqs),
+        )
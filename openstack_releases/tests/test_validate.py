@@ -12,8 +12,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import concurrent.futures
+import io
+import multiprocessing
 import os
 import textwrap
+import threading
+import time
 from unittest import mock
 
 import fixtures
@@ -156,7 +161,7 @@ class TestValidateBugTracker(base.BaseTestCase):
         self.assertEqual(0, len(self.ctx.warnings))
         self.assertEqual(1, len(self.ctx.errors))
 
-    @mock.patch('requests.get')
+    @mock.patch('openstack_releases.httputils.get')
     def test_launchpad_invalid_name(self, get):
         get.return_value = mock.Mock(status_code=404)
         validate.validate_bugtracker(
@@ -171,7 +176,7 @@ class TestValidateBugTracker(base.BaseTestCase):
         self.assertEqual(0, len(self.ctx.warnings))
         self.assertEqual(1, len(self.ctx.errors))
 
-    @mock.patch('requests.get')
+    @mock.patch('openstack_releases.httputils.get')
     def test_launchpad_valid_name(self, get):
         get.return_value = mock.Mock(status_code=200)
         validate.validate_bugtracker(
@@ -186,7 +191,7 @@ class TestValidateBugTracker(base.BaseTestCase):
         self.assertEqual(0, len(self.ctx.warnings))
         self.assertEqual(0, len(self.ctx.errors))
 
-    @mock.patch('requests.get')
+    @mock.patch('openstack_releases.httputils.get')
     def test_launchpad_timeout(self, get):
         import requests
         get.side_effect = requests.exceptions.ConnectionError('testing')
@@ -202,7 +207,7 @@ class TestValidateBugTracker(base.BaseTestCase):
         self.assertEqual(1, len(self.ctx.warnings))
         self.assertEqual(0, len(self.ctx.errors))
 
-    @mock.patch('requests.get')
+    @mock.patch('openstack_releases.httputils.get')
     def test_storyboard_valid_id(self, get):
         get.return_value = mock.Mock(status_code=200)
         get.return_value.json.return_value = [
@@ -239,7 +244,7 @@ class TestValidateBugTracker(base.BaseTestCase):
         self.assertEqual(0, len(self.ctx.warnings))
         self.assertEqual(0, len(self.ctx.errors))
 
-    @mock.patch('requests.get')
+    @mock.patch('openstack_releases.httputils.get')
     def test_storyboard_no_such_project(self, get):
         get.return_value = mock.Mock(status_code=200)
         get.return_value.json.return_value = [
@@ -322,7 +327,7 @@ class TestValidateReleaseNotes(base.BaseTestCase):
         self.assertEqual(0, len(self.ctx.warnings))
         self.assertEqual(0, len(self.ctx.errors))
 
-    @mock.patch('requests.get')
+    @mock.patch('openstack_releases.httputils.get')
     def test_invalid_link(self, get):
         get.return_value = mock.Mock(status_code=404)
         validate.validate_release_notes(
@@ -339,7 +344,7 @@ class TestValidateReleaseNotes(base.BaseTestCase):
         self.assertEqual(0, len(self.ctx.warnings))
         self.assertEqual(1, len(self.ctx.errors))
 
-    @mock.patch('requests.get')
+    @mock.patch('openstack_releases.httputils.get')
     def test_valid_link(self, get):
         get.return_value = mock.Mock(status_code=200)
         validate.validate_release_notes(
@@ -355,7 +360,7 @@ class TestValidateReleaseNotes(base.BaseTestCase):
         self.assertEqual(0, len(self.ctx.warnings))
         self.assertEqual(0, len(self.ctx.errors))
 
-    @mock.patch('requests.get')
+    @mock.patch('openstack_releases.httputils.get')
     def test_invalid_link_multi(self, get):
         get.return_value = mock.Mock(status_code=404)
         validate.validate_release_notes(
@@ -378,7 +383,7 @@ class TestValidateReleaseNotes(base.BaseTestCase):
         self.assertEqual(0, len(self.ctx.warnings))
         self.assertEqual(1, len(self.ctx.errors))
 
-    @mock.patch('requests.get')
+    @mock.patch('openstack_releases.httputils.get')
     def test_unknown_repo(self, get):
         get.return_value = mock.Mock(status_code=200)
         validate.validate_release_notes(
@@ -401,7 +406,7 @@ class TestValidateReleaseNotes(base.BaseTestCase):
         self.assertEqual(0, len(self.ctx.warnings))
         self.assertEqual(1, len(self.ctx.errors))
 
-    @mock.patch('requests.get')
+    @mock.patch('openstack_releases.httputils.get')
     def test_valid_link_multi(self, get):
         get.return_value = mock.Mock(status_code=200)
         validate.validate_release_notes(
@@ -4393,3 +4398,327 @@ class TestValidateBranchPoints(base.BaseTestCase):
         )
         self.assertEqual(0, len(self.ctx.warnings))
         self.assertEqual(1, len(self.ctx.errors))
+
+
+class TestValidateOneFileIsolated(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = self.useFixture(fixtures.TempDir()).path
+        self.filename = os.path.join(self.tmpdir, 'name.yaml')
+        with open(self.filename, 'w') as f:
+            f.write(textwrap.dedent('''
+            team: team
+            launchpad: name
+            releases: []
+            '''))
+
+    def test_deleted_file(self):
+        output, warnings, errors, failed = \
+            validate._validate_one_file_isolated(
+                os.path.join(self.tmpdir, 'missing.yaml'), False, True)
+        self.assertIn('File was deleted, skipping.', output)
+        self.assertEqual([], warnings)
+        self.assertEqual([], errors)
+        self.assertFalse(failed)
+
+    def test_messages_captured(self):
+        def check(deliv, context):
+            "Fake check"
+            print('checking %s' % deliv.name)
+            context.warning('a warning')
+            context.error('an error')
+
+        with mock.patch.object(validate, '_CHECKS', [check]):
+            output, warnings, errors, failed = \
+                validate._validate_one_file_isolated(
+                    self.filename, False, True)
+        self.assertIn('Checking %s' % self.filename, output)
+        self.assertIn('checking name', output)
+        self.assertIn('WARNING: a warning', output)
+        self.assertIn('  ERROR: an error', output)
+        self.assertEqual(
+            ['{}: check: a warning'.format(self.filename)], warnings)
+        self.assertEqual(
+            ['{}: check: an error'.format(self.filename)], errors)
+        self.assertFalse(failed)
+
+    def test_exception_reported(self):
+        def check(deliv, context):
+            "Fake check"
+            context.error('an error')
+
+        with mock.patch.object(validate, '_CHECKS', [check]):
+            output, warnings, errors, failed = \
+                validate._validate_one_file_isolated(
+                    self.filename, True, True)
+        self.assertIn('RuntimeError: an error', output)
+        self.assertEqual(1, len(errors))
+        self.assertTrue(failed)
+
+    def test_workdir_removed(self):
+        workdirs = []
+
+        def check(deliv, context):
+            "Fake check"
+            workdirs.append(context.workdir)
+            self.assertTrue(os.path.isdir(context.workdir))
+
+        with mock.patch.object(validate, '_CHECKS', [check]):
+            validate._validate_one_file_isolated(self.filename, False, True)
+        self.assertEqual(1, len(workdirs))
+        self.assertFalse(os.path.exists(workdirs[0]))
+
+    def test_spawned_worker_logs(self):
+        # The worker does not inherit the logging settings of the
+        # parent under the spawn start method.
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=validate._init_worker) as executor:
+            output = executor.submit(
+                validate._validate_one_file_isolated,
+                self.filename, False, True,
+            ).result()[0]
+        self.assertIn('DEBUG: creating temporary files in', output)
+
+    def test_context_without_workdir(self):
+        context = validate.ValidationContext(workdir=False)
+        self.assertIsNone(context.workdir)
+        context.cleanup_workdir()
+
+
+class TestRunChecks(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ctx = validate.ValidationContext()
+        self.ctx.set_filename('name.yaml')
+        self.deliv = deliverable.Deliverable(
+            team='team',
+            series=defaults.RELEASE,
+            name='name',
+            data={},
+        )
+
+    def test_dependencies(self):
+        @validate.needs(provides=('clone',))
+        def clone(deliv, context):
+            "clone"
+
+        @validate.needs('network')
+        def network(deliv, context):
+            "network"
+
+        @validate.needs('clone', provides=('sdist',))
+        def build(deliv, context):
+            "build"
+
+        @validate.needs('git')
+        def history(deliv, context):
+            "history"
+
+        @validate.needs('clone', 'sdist')
+        def use_sdist(deliv, context):
+            "use sdist"
+
+        def data(deliv, context):
+            "data"
+
+        self.assertEqual(
+            [set(), set(), {0}, {0}, {0, 2}, set()],
+            validate._get_check_dependencies(
+                [clone, network, build, history, use_sdist, data]),
+        )
+
+    def test_tag_dependencies(self):
+        @validate.needs(provides=('clone',))
+        def clone(deliv, context):
+            "clone"
+
+        @validate.needs('git')
+        def before(deliv, context):
+            "before"
+
+        @validate.needs('clone', 'tags')
+        def tag(deliv, context):
+            "tag"
+
+        @validate.needs('git')
+        def after(deliv, context):
+            "after"
+
+        @validate.needs('network')
+        def network(deliv, context):
+            "network"
+
+        self.assertEqual(
+            [set(), {0}, {0, 1}, {0, 2}, set()],
+            validate._get_check_dependencies(
+                [clone, before, tag, after, network]),
+        )
+
+    def test_history_checks_ordered_with_sdist(self):
+        # The checks reading tags must never run while
+        # validate_build_sdist has its temporary tag in the clone.
+        dependencies = validate._get_check_dependencies(validate._CHECKS)
+
+        def waits_for(i):
+            result = set()
+            todo = list(dependencies[i])
+            while todo:
+                j = todo.pop()
+                if j not in result:
+                    result.add(j)
+                    todo.extend(dependencies[j])
+            return result
+
+        sdist = validate._CHECKS.index(validate.validate_build_sdist)
+        for check in [validate.validate_release_type,
+                      validate.validate_version_numbers]:
+            i = validate._CHECKS.index(check)
+            self.assertTrue(
+                sdist in waits_for(i) or i in waits_for(sdist),
+                '{} can run at the same time as '
+                'validate_build_sdist'.format(check.__name__),
+            )
+
+    def test_temporary_tag_not_seen(self):
+        tags = set()
+        seen = []
+
+        @validate.needs(provides=('clone',))
+        def clone(deliv, context):
+            "clone"
+
+        @validate.needs('git')
+        def before(deliv, context):
+            "before"
+            time.sleep(0.1)
+            seen.append(set(tags))
+
+        @validate.needs('clone', 'tags')
+        def add_tag(deliv, context):
+            "add a tag"
+            tags.add('1.0.0')
+            time.sleep(0.1)
+            tags.discard('1.0.0')
+
+        @validate.needs('git')
+        def after(deliv, context):
+            "after"
+            seen.append(set(tags))
+
+        validate.run_checks(
+            self.deliv, self.ctx, [clone, before, add_tag, after], 4)
+        self.assertEqual([set(), set()], seen)
+
+    def test_independent_checks_concurrent(self):
+        started = threading.Event()
+
+        @validate.needs('network')
+        def first(deliv, context):
+            "first check"
+            # Only finishes if the second check runs at the same time.
+            if not started.wait(10):
+                context.error('second check did not start')
+
+        def second(deliv, context):
+            "second check"
+            started.set()
+
+        validate.run_checks(self.deliv, self.ctx, [first, second], 2)
+        self.assertEqual([], self.ctx.errors)
+
+    def test_report_order(self):
+        finished = []
+
+        @validate.needs('network')
+        def first(deliv, context):
+            "first check"
+            context.warning('first')
+            finished.append('first')
+
+        @validate.needs(provides=('clone',))
+        def second(deliv, context):
+            "second check"
+            context.error('second')
+            finished.append('second')
+
+        @validate.needs('clone')
+        def third(deliv, context):
+            "third check"
+            self.assertIn('second', finished)
+            context.error('third')
+
+        validate.run_checks(
+            self.deliv, self.ctx, [first, second, third], 4)
+        self.assertEqual(['name.yaml: first: first'], self.ctx.warnings)
+        self.assertEqual(
+            ['name.yaml: second: second', 'name.yaml: third: third'],
+            self.ctx.errors,
+        )
+
+    def test_output_grouped(self):
+        def first(deliv, context):
+            "first check"
+            print('output from first')
+
+        def second(deliv, context):
+            "second check"
+            print('output from second')
+
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+            validate.run_checks(self.deliv, self.ctx, [first, second], 2)
+        self.assertEqual(
+            '\nfirst check\n-----------\noutput from first\n'
+            '\nsecond check\n------------\noutput from second\n',
+            out.getvalue(),
+        )
+
+    def test_error_stops(self):
+        ran = []
+
+        @validate.needs(provides=('clone',))
+        def first(deliv, context):
+            "first check"
+            raise RuntimeError('failed')
+
+        @validate.needs('clone')
+        def second(deliv, context):
+            "second check"
+            ran.append('second')
+
+        self.assertRaises(
+            RuntimeError,
+            validate.run_checks, self.deliv, self.ctx, [first, second], 2,
+        )
+        self.assertEqual([], ran)
+
+    def test_shared_data_loaded_once(self):
+        started = threading.Event()
+
+        def get_zuul_project_data():
+            started.set()
+            # Give the other check time to ask for the data too.
+            time.sleep(0.1)
+            return {'openstack/release-test': {}}
+
+        get_data = self.useFixture(fixtures.MockPatch(
+            'openstack_releases.project_config.get_zuul_project_data',
+            side_effect=get_zuul_project_data,
+        )).mock
+
+        @validate.needs()
+        def first(deliv, context):
+            "first check"
+            context.zuul_projects
+
+        @validate.needs()
+        def second(deliv, context):
+            "second check"
+            started.wait(1)
+            context.zuul_projects
+
+        validate.run_checks(self.deliv, self.ctx, [first, second], 2)
+        self.assertEqual(1, get_data.call_count)
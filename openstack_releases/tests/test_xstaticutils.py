@@ -0,0 +1,79 @@
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import fixtures
+from oslotest import base
+
+from openstack_releases.tests import fixtures as or_fixtures
+from openstack_releases import xstaticutils
+
+
+class TestGetVersionsAtRef(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OPENSTACK_RELEASES_NO_CACHE', '1'))
+        self.workdir = self.useFixture(fixtures.TempDir()).path
+        self.repo = 'openstack/xstatic-test'
+        self.git_repo = self.useFixture(or_fixtures.GitRepoFixture(
+            self.workdir, self.repo, signed=False))
+        self.git_repo.write('xstatic/pkg/test/__init__.py',
+                            'from os.path import join, dirname\n'
+                            "BASE_DIR = join(dirname(__file__), 'data')\n"
+                            "VERSION = '1.2.3'\n"
+                            "BUILD = '4'\n"
+                            "PACKAGE_VERSION = VERSION + '.' + BUILD\n")
+        self.git_repo.commit('first')
+
+    def test_versions(self):
+        sha = self.git_repo.git('rev-parse', 'HEAD')
+        # The working tree is not used.
+        self.git_repo.git('rm', '-q', '-r', 'xstatic')
+        self.assertEqual(
+            ['1.2.3.4'],
+            xstaticutils.get_versions(self.workdir, self.repo, sha),
+        )
+
+    def test_code_not_run(self):
+        self.git_repo.write('xstatic/pkg/test/__init__.py',
+                            'import not_installed\n'
+                            "VERSION = '1.2.3'\n"
+                            "BUILD = not_installed.BUILD\n"
+                            "PACKAGE_VERSION = f'{VERSION}.4'\n")
+        sha = self.git_repo.commit('second')
+        self.assertEqual(
+            ['1.2.3.4'],
+            xstaticutils.get_versions(self.workdir, self.repo, sha),
+        )
+
+    def test_relative_import(self):
+        self.git_repo.write('xstatic/pkg/test/__init__.py',
+                            'from .version import VERSION as V, BUILD\n'
+                            "PACKAGE_VERSION = V + '.' + BUILD\n")
+        self.git_repo.write('xstatic/pkg/test/version.py',
+                            "VERSION = '1.2.3'\n"
+                            "BUILD = '5'\n")
+        sha = self.git_repo.commit('second')
+        self.assertEqual(
+            ['1.2.3.5'],
+            xstaticutils.get_versions(self.workdir, self.repo, sha),
+        )
+
+    def test_no_constant_version(self):
+        self.git_repo.write('xstatic/pkg/test/__init__.py',
+                            "PACKAGE_VERSION = '.'.join(['1', '2'])\n")
+        sha = self.git_repo.commit('second')
+        self.assertEqual(
+            [], xstaticutils.get_versions(self.workdir, self.repo, sha))
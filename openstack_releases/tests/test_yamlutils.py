@@ -0,0 +1,64 @@
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import textwrap
+
+from oslotest import base
+
+from openstack_releases import yamlutils
+
+
+class TestSafeLoads(base.BaseTestCase):
+
+    def test_matches_round_trip(self):
+        body = textwrap.dedent('''
+        ---
+        launchpad: nova
+        release-model: cycle-with-rc
+        team: nova
+        slurp: yes
+        initial-release: 2019-04-11
+        releases:
+          - version: 1.0.0
+            projects:
+              - repo: openstack/nova
+                hash: a26e6a2e8a5e321b2e3517dbb01a7b9a56a8bfd5
+          - version: 2.0
+            flags: [forced]
+        numbers: [010, 0o10, 0x1F, 1_000, 1e3, 1:20, on, true]
+        ''')
+        self.assertEqual(yamlutils.loads(body), yamlutils.safe_loads(body))
+
+    def test_yaml_1_2_scalars(self):
+        data = yamlutils.safe_loads(textwrap.dedent('''
+        slurp: yes
+        octal: 010
+        time: 1:20
+        enabled: true
+        date: 2019-04-11
+        '''))
+        self.assertEqual(
+            {'slurp': 'yes',
+             'octal': 10,
+             'time': '1:20',
+             'enabled': True,
+             'date': datetime.date(2019, 4, 11)},
+            data,
+        )
+
+    def test_plain_types(self):
+        data = yamlutils.safe_loads('a: [1, 2]\n')
+        self.assertIs(dict, type(data))
+        self.assertIs(list, type(data['a']))
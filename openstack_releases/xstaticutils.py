@@ -12,13 +12,103 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import ast
 import importlib
+import logging
 import os
+import posixpath
 import sys
 
+from openstack_releases import gitutils
+
+LOG = logging.getLogger(__name__)
+
+
+def _evaluate(node, names):
+    "Return the value of a constant expression from a module."
+    if isinstance(node, ast.Name):
+        try:
+            return names[node.id]
+        except KeyError:
+            raise ValueError('unknown name {}'.format(node.id))
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        return _evaluate(node.left, names) + _evaluate(node.right, names)
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.FormattedValue):
+                if value.format_spec is not None or value.conversion != -1:
+                    raise ValueError('unsupported format')
+                parts.append(str(_evaluate(value.value, names)))
+            else:
+                parts.append(value.value)
+        return ''.join(parts)
+    return ast.literal_eval(node)
+
+
+def _read_names(workdir, repo, ref, filename, seen=()):
+    """Return the constants assigned at the top of a module.
+
+    The module is read at ref and parsed instead of being run, so
+    only values built from literals, other constants and relative
+    imports of sibling modules are known.
+    """
+    source = gitutils.read_file(workdir, repo, filename, ref)
+    names = {}
+    for stmt in ast.parse(source, filename).body:
+        if isinstance(stmt, ast.Assign):
+            targets = [t.id for t in stmt.targets if isinstance(t, ast.Name)]
+            try:
+                value = _evaluate(stmt.value, names)
+            except (ValueError, TypeError, SyntaxError):
+                # Forget any earlier value, since it has changed.
+                for target in targets:
+                    names.pop(target, None)
+                continue
+            for target in targets:
+                names[target] = value
+        elif (isinstance(stmt, ast.ImportFrom) and stmt.level == 1 and
+                stmt.module):
+            sibling = posixpath.join(
+                posixpath.dirname(filename),
+                stmt.module.replace('.', '/') + '.py')
+            if sibling in seen:
+                continue
+            try:
+                imported = _read_names(workdir, repo, ref, sibling,
+                                       seen + (filename,))
+            except FileNotFoundError:
+                continue
+            for alias in stmt.names:
+                if alias.name in imported:
+                    names[alias.asname or alias.name] = imported[alias.name]
+    return names
+
+
+def _get_versions_at_ref(workdir, repo, ref):
+    versions = []
+    for name, is_dir in gitutils.list_dir(workdir, repo, 'xstatic/pkg', ref):
+        if '__' in name or not is_dir:
+            continue
+        filename = 'xstatic/pkg/%s/__init__.py' % name
+        names = _read_names(workdir, repo, ref, filename)
+        if 'PACKAGE_VERSION' not in names:
+            LOG.warning('could not find PACKAGE_VERSION in %s', filename)
+            continue
+        versions.append(names['PACKAGE_VERSION'])
+    return versions
+
+
+def get_versions(workdir, repo, ref=None):
+    """Get the package versions from packages.
+
+    If ref is given, read the packages at that ref instead of the
+    working tree. The modules are parsed rather than imported, so the
+    versions must be built from constants in the package.
+    """
+    if ref is not None:
+        return _get_versions_at_ref(workdir, repo, ref)
 
-def get_versions(workdir, repo):
-    """Get the package versions from packages."""
     versions = []
 
     # Switch to the workdir
@@ -12,8 +12,77 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import re
+import threading
+
 import ruamel.yaml
 import ruamel.yaml.compat
+import yaml
+
+# Use the libyaml parser if PyYAML was built with it.
+_BaseSafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class _SafeLoader(_BaseSafeLoader):
+    """A safe loader that resolves plain scalars like ruamel.yaml does.
+
+    PyYAML follows the YAML 1.1 rules, which treat values such as
+    "yes" and "on" as booleans and "010" as an octal number. The
+    round-trip loader follows YAML 1.2, so replace the implicit
+    resolvers for those types to make both loaders return the same
+    data.
+    """
+
+    def construct_yaml_int(self, node):
+        value = self.construct_scalar(node).replace('_', '')
+        sign = 1
+        if value[0] in '+-':
+            if value[0] == '-':
+                sign = -1
+            value = value[1:]
+        for prefix, base in (('0x', 16), ('0o', 8), ('0b', 2)):
+            if value.startswith(prefix):
+                return sign * int(value[2:], base)
+        return sign * int(value)
+
+
+_SafeLoader.yaml_implicit_resolvers = {
+    first: [
+        (tag, regexp)
+        for tag, regexp in resolvers
+        if tag not in ('tag:yaml.org,2002:bool',
+                       'tag:yaml.org,2002:int',
+                       'tag:yaml.org,2002:float')
+    ]
+    for first, resolvers in _BaseSafeLoader.yaml_implicit_resolvers.items()
+}
+_SafeLoader.add_implicit_resolver(
+    'tag:yaml.org,2002:bool',
+    re.compile(r'^(?:true|True|TRUE|false|False|FALSE)$'),
+    list('tTfF'),
+)
+_SafeLoader.add_implicit_resolver(
+    'tag:yaml.org,2002:int',
+    re.compile(r'''^(?:[-+]?[0-9][0-9_]*
+                    |0o[0-7_]+
+                    |0x[0-9a-fA-F_]+
+                    |0b[01_]+)$''', re.X),
+    list('-+0123456789'),
+)
+_SafeLoader.add_implicit_resolver(
+    'tag:yaml.org,2002:float',
+    re.compile(r'''^(?:[-+]?[0-9][0-9_]*(?:\.[0-9_]*)?(?:[eE][-+]?[0-9]+)?
+                    |[-+]?\.[0-9_]+(?:[eE][-+]?[0-9]+)?
+                    |[-+]?\.(?:inf|Inf|INF)
+                    |\.(?:nan|NaN|NAN))$''', re.X),
+    list('-+0123456789.'),
+)
+_SafeLoader.add_constructor(
+    'tag:yaml.org,2002:int', _SafeLoader.construct_yaml_int)
+
+# ruamel.yaml.YAML instances can be reused for loading, but not from
+# more than one thread at a time.
+_round_trip = threading.local()
 
 
 def dumps(obj):
@@ -37,5 +106,17 @@ def dumps(obj):
 
 def loads(blob):
     """Load a yaml blob and retain key ordering."""
-    yaml = ruamel.yaml.YAML()
-    return yaml.load(blob)
+    loader = getattr(_round_trip, 'loader', None)
+    if loader is None:
+        loader = _round_trip.loader = ruamel.yaml.YAML()
+    return loader.load(blob)
+
+
+def safe_loads(blob):
+    """Load a yaml blob for reading only.
+
+    This is much faster than loads() but returns plain dicts and
+    lists, without the comments and formatting details needed to
+    write the data back out with dumps().
+    """
+    return yaml.load(blob, Loader=_SafeLoader)
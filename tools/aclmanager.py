@@ -42,7 +42,7 @@ EXCEPTIONS = ['openstack/release-test']
 
 def repositories_list(deliverables_dir, series):
     """Yields (team, repo) tuples for cycle-with-milestones deliverables"""
-    deliverables = deliverable.Deliverables(deliverables_dir)
+    deliverables = deliverable.Deliverables(deliverables_dir, lazy=True)
     for d in deliverables.get_deliverables(None, series):
         if d.model not in ['cycle-with-milestones', 'cycle-with-rc']:
             continue
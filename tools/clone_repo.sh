@@ -30,7 +30,7 @@ USAGE:
     clone_repo.sh -h
 
     clone_repo.sh [--workspace WORK_DIR] [--cache-dir CACHE]
-                  [--branch BRANCH] [--ref REF]
+                  [--branch BRANCH] [--ref REF] [--mode MODE]
                   [--upstream URL] repo-name
 
 Arguments:
@@ -60,6 +60,21 @@ Options:
   --upstream -- The upstream server URL, without the git repo
                 part. Defaults to https://opendev.org
 
+  --mode -- How much of the repository to copy when a new clone is
+            made, from the cache or the upstream server. Defaults to
+            "full".
+
+            full        -- All of the history and file contents, with
+                           the branch or ref checked out.
+            blobless    -- All of the history, but only the file
+                           contents needed for the branch or ref that
+                           is checked out. Other file contents are
+                           fetched by git when they are used.
+            no-checkout -- Like blobless, but nothing is checked out.
+            ref-only    -- Only the commits and refs, for tools that
+                           look at history but not at files. Nothing
+                           is checked out.
+
 EOF
 }
 
@@ -69,9 +84,11 @@ CACHE_DIR="${ZUUL_CACHE_DIR:-/opt/git}"
 BRANCH="master"
 REF=""
 UPSTREAM="https://opendev.org"
+MODE="full"
 
 if [[ $(uname) != "Darwin" ]]; then
-    OPTS=`getopt -o hv --long branch:,cache-dir:,ref:,upstream:,workspace: \
+    OPTS=`getopt -o hv \
+        --long branch:,cache-dir:,mode:,ref:,upstream:,workspace: \
         -n $0 -- "$@"`
     if [ $? != 0 ] ; then
         echo "Failed parsing options." >&2
@@ -100,6 +117,11 @@ while true; do
             shift
             shift
             ;;
+        --mode)
+            MODE="$2"
+            shift
+            shift
+            ;;
         --ref)
             REF="$2"
             shift
@@ -143,6 +165,30 @@ if [ ! -d "$WORKSPACE" ]; then
     exit 1
 fi
 
+case "$MODE" in
+    full)
+        FILTER_ARGS=""
+        CHECKOUT_ARGS=""
+        ;;
+    blobless)
+        FILTER_ARGS="--filter=blob:none"
+        CHECKOUT_ARGS=""
+        ;;
+    no-checkout)
+        FILTER_ARGS="--filter=blob:none"
+        CHECKOUT_ARGS="--no-checkout"
+        ;;
+    ref-only)
+        FILTER_ARGS="--filter=tree:0"
+        CHECKOUT_ARGS="--no-checkout"
+        ;;
+    *)
+        print_help
+        echo "ERROR: Unknown mode $MODE."
+        exit 1
+        ;;
+esac
+
 set -e
 
 cache_remote="$CACHE_DIR/opendev.org/$REPO"
@@ -160,15 +206,31 @@ if [ -d $local_dir ]; then
 
 elif [ ! -z "$cache_remote" ]; then
     # Clone from the cache then update the origin remote to point
-    # upstream so we can pull down more recent changes.
-    (cd $WORKSPACE &&
-            git clone $cache_remote $REPO &&
-            cd $REPO &&
+    # upstream so we can pull down more recent changes. A plain local
+    # clone copies or links every object in the cache and ignores the
+    # filter, so in the partial modes the objects are sent through
+    # upload-pack instead, allowing the filter even if the cache
+    # repository is not configured to. Objects left out are fetched
+    # from the upstream remote when they are needed.
+    if [ -z "$FILTER_ARGS" ]; then
+        (cd $WORKSPACE &&
+                git clone $CHECKOUT_ARGS $cache_remote $REPO)
+    else
+        (cd $WORKSPACE &&
+                git clone --no-local $FILTER_ARGS $CHECKOUT_ARGS \
+                    --upload-pack "git -c uploadpack.allowFilter=true upload-pack" \
+                    $cache_remote $REPO)
+    fi
+    (cd $local_dir &&
             git remote set-url origin "$upstream_remote"
     )
 
 else
-    (cd $WORKSPACE && git clone $upstream_remote $REPO)
+    # In the partial modes the repository remembers the filter, so
+    # later fetches skip the same objects and git downloads any that
+    # are missing when a command needs them.
+    (cd $WORKSPACE &&
+            git clone $FILTER_ARGS $CHECKOUT_ARGS $upstream_remote $REPO)
 fi
 
 # Make sure it is up to date compared to the upstream remote.
@@ -176,7 +238,11 @@ fi
         git fetch origin --tags --prune
 )
 
-if [ ! -z "$REF" ]; then
+if [ ! -z "$CHECKOUT_ARGS" ]; then
+    # The caller only wants the history, so leave the working tree
+    # alone.
+    echo "Not checking out $REPO in $MODE mode"
+elif [ ! -z "$REF" ]; then
     # Check out the specified reference.
     (cd $local_dir && git checkout -f "$REF")
 else
@@ -146,6 +146,7 @@ def main():
     all_deliv = deliverable.Deliverables(
         root_dir=args.deliverables_dir,
         collapse_history=False,
+        lazy=True,
     )
     for deliv in all_deliv.get_deliverables(None, args.series):
         if deliv.name not in args.deliverable:
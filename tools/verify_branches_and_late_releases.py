@@ -116,6 +116,7 @@ def main():
     all_deliv = deliverable.Deliverables(
         root_dir=args.deliverables_dir,
         collapse_history=False,
+        lazy=True,
     )
     for deliv in all_deliv.get_deliverables(args.team, series):
         branch_loc = deliv.get_branch_location(branch)
@@ -136,6 +137,7 @@ def main():
             gitutils.clone_repo(
                 workdir,
                 repo,
+                mode=gitutils.CLONE_REF_ONLY,
             )
             for version in late_releases:
                 containing_br = gitutils.branches_containing(